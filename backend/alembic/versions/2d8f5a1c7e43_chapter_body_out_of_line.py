@@ -0,0 +1,25 @@
+"""chapter body out of line
+
+Revision ID: 2d8f5a1c7e43
+Revises: 9a4c6e2f1b08
+Create Date: 2026-10-17 19:12:38.551027
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2d8f5a1c7e43'
+down_revision = '9a4c6e2f1b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Move raw/content/alignment to the TOAST table whenever a row exceeds 128 bytes
+    # (default ~2 kB), so list/relink/navigation scans read only small heap rows.
+    # Applies to rows as they are written; VACUUM FULL chapters rewrites existing ones.
+    op.execute("ALTER TABLE chapters SET (toast_tuple_target = 128)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE chapters RESET (toast_tuple_target)")
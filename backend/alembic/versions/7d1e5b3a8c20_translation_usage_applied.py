@@ -0,0 +1,29 @@
+"""translation usage applied
+
+Revision ID: 7d1e5b3a8c20
+Revises: 15af3c60eb0e
+Create Date: 2026-10-17 23:40:12.518304
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d1e5b3a8c20'
+down_revision = '15af3c60eb0e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('translation_usage', sa.Column('applied', sa.Boolean(), server_default='false', nullable=False))
+    op.add_column('translation_usage_hourly', sa.Column('applied', sa.Integer(), server_default='0', nullable=False))
+    # Attempts were only recorded once their result was stored
+    op.execute("UPDATE translation_usage SET applied = true")
+    op.execute("UPDATE translation_usage_hourly SET applied = attempts")
+
+
+def downgrade() -> None:
+    op.drop_column('translation_usage_hourly', 'applied')
+    op.drop_column('translation_usage', 'applied')
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUEST_SECONDS
+from app.db.query_stats import QueryStats, count_queries
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    Observes each HTTP request's latency, labelled by route template (e.g.
+    /chapters/{chapter_id}/translate) so ids do not explode the label set. Plain ASGI:
+    streamed responses are timed to their last chunk and nothing is buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        status = 500
+        done = False
+
+        def observe() -> None:
+            route: Any = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - t0)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, done
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                done = True
+                observe()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not done:
+                # Failed or disconnected before the body finished
+                observe()
+
+
+class QueryStatsMiddleware:
+    """
+    Counts the SQL statements each request issues and their total time. The counts go
+    out as X-DB-Queries / X-DB-Time-Ms headers (statements run before the response
+    starts; streamed bodies can add more). A request over QUERY_BUDGET_WARN statements,
+    or running one statement QUERY_REPEAT_WARN+ times (an N+1 loop), is logged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.statements)
+                    headers["X-DB-Time-Ms"] = f"{stats.total_s * 1000:.1f}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _log_if_over_budget(scope, stats)
+
+
+def _log_if_over_budget(scope: Scope, stats: QueryStats) -> None:
+    route: Any = scope.get("route")
+    where = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+    budget = settings.QUERY_BUDGET_WARN
+    if budget and stats.statements > budget:
+        logger.warning(
+            "%s ran %d SQL statements (budget %d, %.1f ms)",
+            where,
+            stats.statements,
+            budget,
+            stats.total_s * 1000,
+        )
+    if settings.QUERY_REPEAT_WARN:
+        for sql, n in stats.repeated(settings.QUERY_REPEAT_WARN):
+            logger.warning("%s ran the same statement %d times (N+1?): %s", where, n, sql[:300])
@@ -1,6 +1,25 @@
+from .batch import router as batch_router
+from .cache import router as cache_router
 from .chapters import router as chapters_router
 from .export import router as export_router
 from .health import router as health_router
+from .jobs import router as jobs_router
+from .metrics import router as metrics_router
 from .novels import router as novels_router
+from .rate_limit import router as rate_limit_router
+from .reader import router as reader_router
+from .usage import router as usage_router
 
-all_routers = [health_router, novels_router, chapters_router, export_router]
+all_routers = [
+    health_router,
+    novels_router,
+    chapters_router,
+    reader_router,
+    jobs_router,
+    export_router,
+    batch_router,
+    cache_router,
+    usage_router,
+    rate_limit_router,
+    metrics_router,
+]
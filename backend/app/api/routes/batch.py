@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.repos import novel as novel_repo
+from app.services.batch import BatchImport, stream_batch_requests
+from app.services.ingest import IngestError, is_gzipped, iter_ndjson
+
+router = APIRouter(prefix="/novels", tags=["batch"])
+
+
+@router.get("/{novel_id}/batch/requests.jsonl")
+def export_batch_requests(
+    novel_id: int,
+    start: int | None = Query(None, description="Start chapter_no (inclusive)"),
+    end: int | None = Query(None, description="End chapter_no (inclusive)"),
+    retranslate: bool = Query(False, description="Also export already translated chapters"),
+    db: Session = Depends(get_db),
+):
+    if not novel_repo.novel_exists(db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+    body = stream_batch_requests(novel_id, start_no=start, end_no=end, retranslate=retranslate)
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="novel-{novel_id}-batch.jsonl"'},
+    )
+
+
+def _feed(batch: BatchImport, items: list[tuple[int, dict[str, Any]]]) -> None:
+    for line_no, obj in items:
+        batch.add(line_no, obj)
+
+
+@router.post("/{novel_id}/batch/results")
+async def import_batch_results(
+    novel_id: int,
+    request: Request,
+    batch_size: int = Query(50, ge=1, le=1000, description="Commit every N chapters"),
+    db: Session = Depends(get_db),
+):
+    """
+    Body: the batch results JSONL (optionally gzip, as for chapters/bulk). Chapters
+    are applied in chapter_no order and committed in batches; re-posting the same
+    file after an interruption continues where it stopped.
+    """
+    if not await run_in_threadpool(novel_repo.novel_exists, db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+
+    started = time.perf_counter()
+    try:
+        with BatchImport(db=db, novel_id=novel_id, batch_size=batch_size) as batch:
+            pending: list[tuple[int, dict[str, Any]]] = []
+            stream = iter_ndjson(request.stream(), gzipped=is_gzipped(request.headers))
+            async for item in stream:
+                pending.append(item)
+                if len(pending) >= batch_size:
+                    await run_in_threadpool(_feed, batch, pending)
+                    pending = []
+            await run_in_threadpool(_feed, batch, pending)
+            stats = await run_in_threadpool(batch.finish)
+    except IngestError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"ok": True, **stats, "elapsed_s": round(time.perf_counter() - started, 3)}
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.repos import novel as novel_repo
+from app.repos import translation_cache as cache_repo
+from app.repos import translation_memory as tm_repo
+from app.services.translation_cache import cache_stats
+
+router = APIRouter(tags=["cache"])
+
+
+@router.get("/translation-cache")
+def get_translation_cache_stats():
+    return cache_stats()
+
+
+@router.delete("/translation-cache")
+def clear_translation_cache(db: Session = Depends(get_db)):
+    deleted = cache_repo.clear(db)
+    db.commit()
+    return {"ok": True, "deleted": deleted}
+
+
+@router.get("/novels/{novel_id}/translation-memory")
+def get_translation_memory_stats(novel_id: int, db: Session = Depends(get_db)):
+    totals = tm_repo.memory_totals(db, novel_id)
+    if not totals["entries"] and not novel_repo.novel_exists(db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+    return totals
+
+
+@router.delete("/novels/{novel_id}/translation-memory")
+def clear_translation_memory(novel_id: int, db: Session = Depends(get_db)):
+    deleted = tm_repo.clear(db, novel_id)
+    if not deleted and not novel_repo.novel_exists(db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+    db.commit()
+    return {"ok": True, "deleted": deleted}
@@ -1,29 +1,57 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.models.chapter import Chapter
+from app.api.deps import get_async_db, get_db
+from app.core.config import settings
+from app.core.metrics import TRANSLATE_STREAM_FIRST_TEXT_SECONDS, TRANSLATE_STREAMS
+from app.db.session import AsyncSessionLocal
 from app.repos import chapter as chapter_repo
 from app.repos import novel as novel_repo
 from app.schemas import ChapterCreate, ChapterListItem, ChapterOut, ChapterUpdate
 from app.services.chapters import (
+    chapter_page,
     delete_chapter_and_relink,
+    delete_chapter_by_no_and_relink,
     delete_chapter_for_novel_and_relink,
     insert_chapter_and_link,
     rebuild_links_from_chapter_no,
 )
 from app.services.formatting import format_translated_chapter
-from app.services.translation import translate_chapter
+from app.services.ingest import ChapterIngest, IngestError, is_gzipped, iter_ndjson
+from app.services.translation import (
+    ChapterTranslation,
+    arun_chapter_translation,
+    astream_chapter_translation,
+    finish_chapter_translation,
+    prepare_chapter_translation,
+    record_cut_stream,
+    translate_chapter,
+)
 
 router = APIRouter(tags=["chapters"])
 
 
+def _chapter_not_found(db: Session, novel_id: int, detail: str = "Chapter not found"):
+    """404 for a chapter lookup that came back empty, checking the novel only then."""
+    if not novel_repo.novel_exists(db, novel_id):
+        detail = "Novel not found"
+    return HTTPException(status_code=404, detail=detail)
+
+
 @router.post("/novels/{novel_id}/chapters", response_model=ChapterOut)
 def create_chapter(novel_id: int, payload: ChapterCreate, db: Session = Depends(get_db)):
-    n = novel_repo.get_novel(db, novel_id)
-    if not n:
+    if not novel_repo.novel_exists(db, novel_id):
         raise HTTPException(status_code=404, detail="Novel not found")
 
     existing = chapter_repo.get_chapter_by_no(db, novel_id=novel_id, chapter_no=payload.chapter_no)
@@ -40,57 +68,129 @@ def create_chapter(novel_id: int, payload: ChapterCreate, db: Session = Depends(
         source_url=payload.source_url,
     )
     db.commit()
-    db.refresh(ch)
-    return ch
+    return chapter_repo.reload_chapter(db, ch)
+
+
+def _feed(ingest: ChapterIngest, items: list[tuple[int, dict[str, Any]]]) -> None:
+    for line_no, obj in items:
+        ingest.add(line_no, obj)
+
+
+@router.post("/novels/{novel_id}/chapters/bulk")
+async def bulk_ingest_chapters(
+    novel_id: int,
+    request: Request,
+    on_conflict: str = Query("skip", pattern="^(skip|overwrite|fail)$"),
+    batch_size: int = Query(500, ge=1, le=5000, description="Rows per multi-row INSERT"),
+    db: Session = Depends(get_db),
+):
+    """
+    Body: NDJSON, one ChapterCreate object per line (optionally gzip: send
+    Content-Encoding: gzip or Content-Type: application/gzip). Streamed; never
+    buffered whole.
+    """
+    if not await run_in_threadpool(novel_repo.novel_exists, db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+
+    gzipped = is_gzipped(request.headers)
+
+    started = time.perf_counter()
+    ingest = ChapterIngest(db=db, novel_id=novel_id, on_conflict=on_conflict, batch_size=batch_size)
+    try:
+        pending: list[tuple[int, dict[str, Any]]] = []
+        async for item in iter_ndjson(request.stream(), gzipped=gzipped):
+            pending.append(item)
+            if len(pending) >= batch_size:
+                await run_in_threadpool(_feed, ingest, pending)
+                pending = []
+        await run_in_threadpool(_feed, ingest, pending)
+        stats = await run_in_threadpool(ingest.finish)
+        await run_in_threadpool(db.commit)
+    except IngestError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=409 if e.conflict else 400, detail=str(e))
+
+    elapsed = time.perf_counter() - started
+    return {
+        "ok": True,
+        **stats,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_sec": round(stats["received"] / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+# Page size caps: list items are tiny, full chapters carry both text columns
+LIST_MAX_LIMIT = 2000
+FULL_MAX_LIMIT = 500
 
 
 @router.get("/novels/{novel_id}/chapters", response_model=list[ChapterListItem])
-def list_chapters(novel_id: int, db: Session = Depends(get_db), limit: int = 500, offset: int = 0):
-    n = novel_repo.get_novel(db, novel_id)
-    if not n:
+def list_chapters(
+    novel_id: int,
+    response: Response,
+    db: Session = Depends(get_db),
+    limit: int = Query(500, ge=1, le=LIST_MAX_LIMIT),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+):
+    try:
+        chapters, next_cursor = chapter_page(
+            db, novel_id=novel_id, limit=limit, cursor=cursor, offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # An empty page is the only case where the novel might not exist
+    if not chapters and not novel_repo.novel_exists(db, novel_id):
         raise HTTPException(status_code=404, detail="Novel not found")
-    return chapter_repo.list_chapters(db, novel_id=novel_id, limit=limit, offset=offset)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return chapters
 
 
 @router.get("/novels/{novel_id}/chapters/full", response_model=list[ChapterOut])
 def list_chapters_full(
     novel_id: int,
+    response: Response,
     db: Session = Depends(get_db),
-    limit: int = 10_000,
-    offset: int = 0,
+    limit: int = Query(100, ge=1, le=FULL_MAX_LIMIT),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
     only_translated: bool = Query(
         False, description="If true, return only chapters that have translated content."
     ),
 ):
-    n = novel_repo.get_novel(db, novel_id)
-    if not n:
+    try:
+        chapters, next_cursor = chapter_page(
+            db,
+            novel_id=novel_id,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            with_body=True,
+            only_translated=only_translated,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not chapters and not novel_repo.novel_exists(db, novel_id):
         raise HTTPException(status_code=404, detail="Novel not found")
-
-    q = db.query(chapter_repo.Chapter) if hasattr(chapter_repo, "Chapter") else db.query(Chapter)  # type: ignore[name-defined]
-    q = db.query(Chapter).filter(Chapter.novel_id == novel_id)
-
-    if only_translated:
-        q = q.filter(Chapter.content.isnot(None)).filter(Chapter.content != "")
-
-    chapters = q.order_by(Chapter.chapter_no.asc()).offset(offset).limit(limit).all()
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return chapters
 
 
 @router.get("/novels/{novel_id}/chapters/{chapter_no}", response_model=ChapterOut)
 def get_chapter_by_no(novel_id: int, chapter_no: int, db: Session = Depends(get_db)):
-    n = novel_repo.get_novel(db, novel_id)
-    if not n:
-        raise HTTPException(status_code=404, detail="Novel not found")
-
-    ch = chapter_repo.get_chapter_by_no(db, novel_id=novel_id, chapter_no=chapter_no)
+    ch = chapter_repo.get_chapter_by_no(
+        db, novel_id=novel_id, chapter_no=chapter_no, with_body=True
+    )
     if not ch:
-        raise HTTPException(status_code=404, detail="Chapter not found")
+        raise _chapter_not_found(db, novel_id)
     return ch
 
 
 @router.patch("/chapters/{chapter_id}", response_model=ChapterOut)
 def update_chapter(chapter_id: int, payload: ChapterUpdate, db: Session = Depends(get_db)):
-    ch = chapter_repo.get_chapter(db, chapter_id)
+    ch = chapter_repo.get_chapter(db, chapter_id, with_body=True)
     if not ch:
         raise HTTPException(status_code=404, detail="Chapter not found")
 
@@ -104,20 +204,50 @@ def update_chapter(chapter_id: int, payload: ChapterUpdate, db: Session = Depend
         status=payload.status,
     )
     db.commit()
-    db.refresh(ch)
-    return ch
+    return chapter_repo.reload_chapter(db, ch)
 
 
-@router.post("/chapters/{chapter_id}/translate", response_model=ChapterOut)
-def translate_one(chapter_id: int, db: Session = Depends(get_db)):
-    ch = chapter_repo.get_chapter(db, chapter_id)
+def _stats_headers(response: Response, stats: dict[str, Any]) -> None:
+    response.headers["X-Context-Slice-Tokens"] = str(stats.get("slice_tokens", 0))
+    response.headers["X-Context-Prefix-Tokens"] = str(stats.get("prefix_tokens", 0))
+    response.headers["X-Cached-Prompt-Tokens"] = str(stats.get("cached_tokens", 0))
+    response.headers["X-Chapter-Tokens"] = str(stats.get("chapter_tokens", 0))
+    response.headers["X-Context-Items-Dropped"] = str(stats.get("items_dropped", 0))
+    response.headers["X-Translation-Cache"] = str(stats.get("cache") or "off")
+    if "tm_hit_ratio" in stats:
+        response.headers["X-TM-Hit-Ratio"] = str(stats["tm_hit_ratio"])
+        response.headers["X-TM-Tokens-Saved"] = str(stats["tm_tokens_saved"])
+    if stats.get("paragraphs_retranslated") is not None:
+        response.headers["X-Paragraphs-Retranslated"] = str(stats["paragraphs_retranslated"])
+
+
+def translate_one(
+    chapter_id: int,
+    response: Response,
+    token_budget: int | None = Query(
+        None, ge=0, description="Context slice token budget (0 = count caps only)"
+    ),
+    force: bool = Query(False, description="Bypass the translation cache"),
+    db: Session = Depends(get_db),
+):
+    # With body: translate_chapter reads raw from this same identity-mapped object
+    ch = chapter_repo.get_chapter(db, chapter_id, with_body=True)
     if not ch:
         raise HTTPException(status_code=404, detail="Chapter not found")
 
     try:
-        updated = translate_chapter(db, novel_id=ch.novel_id, chapter_id=ch.id)
+        stats: dict = {}
+        updated = translate_chapter(
+            db,
+            novel_id=ch.novel_id,
+            chapter_id=ch.id,
+            token_budget=token_budget,
+            force=force,
+            stats=stats,
+        )
         db.commit()
-        db.refresh(updated)
+        updated = chapter_repo.reload_chapter(db, updated)
+        _stats_headers(response, stats)
         return updated
     except ValueError as e:
         db.rollback()
@@ -127,15 +257,183 @@ def translate_one(chapter_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def translate_one_async(
+    chapter_id: int,
+    response: Response,
+    token_budget: int | None = Query(
+        None, ge=0, description="Context slice token budget (0 = count caps only)"
+    ),
+    force: bool = Query(False, description="Bypass the translation cache"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """translate_one for ASYNC_MODE: no connection or thread is held during the model call."""
+    ch = await db.run_sync(chapter_repo.get_chapter, chapter_id)
+    if not ch:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+
+    try:
+        stats: dict = {}
+        job = await db.run_sync(
+            lambda s: prepare_chapter_translation(
+                s,
+                novel_id=ch.novel_id,
+                chapter_id=ch.id,
+                token_budget=token_budget,
+                force=force,
+                stats=stats,
+                source="async",
+            )
+        )
+        # Hand the connection back to the pool while the model works
+        await db.close()
+
+        result = await arun_chapter_translation(job)
+
+        updated = await db.run_sync(
+            lambda s: finish_chapter_translation(s, job, result, stats=stats)
+        )
+        await db.commit()
+        # Only the server-generated column; the body is loaded and must stay loaded
+        await db.refresh(updated, ["updated_at"])
+        _stats_headers(response, stats)
+        return updated
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+router.add_api_route(
+    "/chapters/{chapter_id}/translate",
+    translate_one_async if settings.ASYNC_MODE else translate_one,
+    methods=["POST"],
+    response_model=ChapterOut,
+)
+
+
+# Comment lines keep idle streams (the model has not started writing yet) from being
+# cut by proxies
+_SSE_PING_S = 15.0
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _translate_events(
+    job: ChapterTranslation, stats: dict[str, Any], started: float
+) -> AsyncIterator[str]:
+    """
+    `delta` events while the model writes, then the stored chapter (`done`) or an
+    `error`. The result is stored, in a session of its own, only after the stream
+    completes; if the client goes away first the model call is cancelled, nothing is
+    stored and what was already written is recorded as usage (see record_cut_stream).
+    """
+    queue: asyncio.Queue[str | None] = asyncio.Queue()
+    written: list[str] = []
+    task = asyncio.create_task(astream_chapter_translation(job, queue.put_nowait))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    outcome = "disconnected"
+    try:
+        first = True
+        while True:
+            try:
+                text = await asyncio.wait_for(queue.get(), _SSE_PING_S)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if text is None:
+                break
+            if first:
+                TRANSLATE_STREAM_FIRST_TEXT_SECONDS.observe(time.perf_counter() - started)
+                first = False
+            written.append(text)
+            yield _sse("delta", {"text": text})
+
+        try:
+            result = task.result()
+            async with AsyncSessionLocal() as db:
+                updated = await db.run_sync(
+                    lambda s: finish_chapter_translation(s, job, result, stats=stats)
+                )
+                await db.commit()
+                await db.refresh(updated, ["updated_at"])
+                chapter = ChapterOut.model_validate(updated).model_dump(mode="json")
+        except ValueError as e:
+            outcome = "error"
+            yield _sse("error", {"status": 400, "detail": str(e)})
+            return
+        except Exception as e:
+            outcome = "error"
+            yield _sse("error", {"status": 500, "detail": str(e)})
+            return
+        outcome = "completed"
+        yield _sse("done", {"chapter": chapter, "stats": stats})
+    finally:
+        if not task.done():
+            task.cancel()
+            record_cut_stream(job, "".join(written))
+        TRANSLATE_STREAMS.labels(outcome).inc()
+
+
+@router.post("/chapters/{chapter_id}/translate/stream")
+async def translate_one_stream(
+    chapter_id: int,
+    token_budget: int | None = Query(
+        None, ge=0, description="Context slice token budget (0 = count caps only)"
+    ),
+    force: bool = Query(False, description="Bypass the translation cache"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    translate_one as Server-Sent Events, for readers that render the translation as it
+    is written. Errors found before the model is called are plain HTTP errors.
+    """
+    started = time.perf_counter()
+    ch = await db.run_sync(chapter_repo.get_chapter, chapter_id)
+    if not ch:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+
+    stats: dict[str, Any] = {}
+    try:
+        job = await db.run_sync(
+            lambda s: prepare_chapter_translation(
+                s,
+                novel_id=ch.novel_id,
+                chapter_id=ch.id,
+                token_budget=token_budget,
+                force=force,
+                stats=stats,
+                source="stream",
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The connection goes back to the pool for the whole stream
+    await db.close()
+
+    return StreamingResponse(
+        _translate_events(job, stats, started),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/novels/{novel_id}/chapters/rebuild-links")
-def rebuild_links(novel_id: int, db: Session = Depends(get_db)):
-    n = novel_repo.get_novel(db, novel_id)
-    if not n:
+def rebuild_links(
+    novel_id: int,
+    start: int | None = Query(None, description="Only relink from this chapter_no (inclusive)"),
+    end: int | None = Query(None, description="Only relink up to this chapter_no (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    relinked = rebuild_links_from_chapter_no(db, novel_id=novel_id, start_no=start, end_no=end)
+    count = chapter_repo.count_chapters(db, novel_id=novel_id, start_no=start, end_no=end)
+    if not count and not novel_repo.novel_exists(db, novel_id):
         raise HTTPException(status_code=404, detail="Novel not found")
-
-    chapters = rebuild_links_from_chapter_no(db, novel_id=novel_id)
     db.commit()
-    return {"ok": True, "count": len(chapters)}
+    return {"ok": True, "count": count, "relinked": relinked}
 
 
 @router.delete("/chapters/{chapter_id}", response_model=ChapterOut)
@@ -171,11 +469,6 @@ def delete_chapter_scoped(
         False, description="If true, rebuild prev/next pointers from chapter_no after delete."
     ),
 ):
-    # ensure novel exists (matches your style)
-    n = novel_repo.get_novel(db, novel_id)
-    if not n:
-        raise HTTPException(status_code=404, detail="Novel not found")
-
     try:
         deleted = delete_chapter_for_novel_and_relink(db, novel_id=novel_id, chapter_id=chapter_id)
 
@@ -183,11 +476,10 @@ def delete_chapter_scoped(
             rebuild_links_from_chapter_no(db, novel_id=novel_id)
 
         db.commit()
-        db.refresh(deleted)
         return deleted
     except ValueError as e:
         db.rollback()
-        raise HTTPException(status_code=404, detail=str(e))
+        raise _chapter_not_found(db, novel_id, str(e))
 
 
 @router.delete("/novels/{novel_id}/chapters/by-no/{chapter_no}", response_model=ChapterOut)
@@ -199,37 +491,27 @@ def delete_chapter_by_no(
         True, description="Rebuild prev/next pointers from chapter_no after delete"
     ),
 ):
-    n = novel_repo.get_novel(db, novel_id)
-    if not n:
-        raise HTTPException(status_code=404, detail="Novel not found")
-
-    ch = chapter_repo.get_chapter_by_no(db, novel_id=novel_id, chapter_no=chapter_no)
-    if not ch:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-
     try:
-        deleted = delete_chapter_for_novel_and_relink(db, novel_id=novel_id, chapter_id=ch.id)
+        deleted = delete_chapter_by_no_and_relink(db, novel_id=novel_id, chapter_no=chapter_no)
         if rebuild:
             rebuild_links_from_chapter_no(db, novel_id=novel_id)
         db.commit()
-        db.refresh(deleted)
         return deleted
     except ValueError as e:
         db.rollback()
-        raise HTTPException(status_code=404, detail=str(e))
+        raise _chapter_not_found(db, novel_id, str(e))
 
 
 @router.post("/chapters/{chapter_id}/format", response_model=ChapterOut)
 def format_one(chapter_id: int, db: Session = Depends(get_db)):
-    ch = chapter_repo.get_chapter(db, chapter_id)
+    ch = chapter_repo.get_chapter(db, chapter_id, with_body=True)
     if not ch:
         raise HTTPException(status_code=404, detail="Chapter not found")
 
     try:
         updated = format_translated_chapter(db, chapter_id=chapter_id)
         db.commit()
-        db.refresh(updated)
-        return updated
+        return chapter_repo.reload_chapter(db, updated)
     except ValueError as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
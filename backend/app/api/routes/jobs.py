@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.repos import chapter as chapter_repo
+from app.repos import job as job_repo
+from app.repos import novel as novel_repo
+from app.schemas import TranslationJobOut
+from app.services.jobs import (
+    enqueue_chapter_translation,
+    enqueue_range_translation,
+    worker_pool,
+)
+
+router = APIRouter(tags=["jobs"])
+
+
+@router.post(
+    "/chapters/{chapter_id}/translate/jobs", response_model=TranslationJobOut, status_code=202
+)
+def enqueue_translate(
+    chapter_id: int,
+    force: bool = Query(False, description="Bypass the translation cache"),
+    db: Session = Depends(get_db),
+):
+    ch = chapter_repo.get_chapter(db, chapter_id, with_body=True)
+    if not ch:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    if not ch.raw or not ch.raw.strip():
+        raise HTTPException(status_code=400, detail="Chapter has no raw text to translate")
+
+    job = enqueue_chapter_translation(db, novel_id=ch.novel_id, chapter_id=ch.id, force=force)
+    db.commit()
+    db.refresh(job)
+    worker_pool.notify()
+    return job
+
+
+@router.post("/novels/{novel_id}/translate", response_model=TranslationJobOut, status_code=202)
+def enqueue_translate_range(
+    novel_id: int,
+    start: int = Query(..., description="Start chapter_no (inclusive)"),
+    end: int = Query(..., description="End chapter_no (inclusive)"),
+    batch_size: int = Query(10, ge=1, le=500, description="Commit every N chapters"),
+    retranslate: bool = Query(False, description="Also retranslate already translated chapters"),
+    db: Session = Depends(get_db),
+):
+    if not novel_repo.novel_exists(db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+
+    try:
+        job = enqueue_range_translation(
+            db,
+            novel_id=novel_id,
+            start_no=start,
+            end_no=end,
+            batch_size=batch_size,
+            retranslate=retranslate,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    db.commit()
+    db.refresh(job)
+    worker_pool.notify()
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=TranslationJobOut)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = job_repo.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/novels/{novel_id}/jobs", response_model=list[TranslationJobOut])
+def list_jobs(
+    novel_id: int,
+    db: Session = Depends(get_db),
+    status: str | None = Query(None, description="Filter by status (queued/running/...)"),
+    limit: int = 100,
+    offset: int = 0,
+):
+    if not novel_repo.novel_exists(db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+    return job_repo.list_jobs_for_novel(db, novel_id, status=status, limit=limit, offset=offset)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.core.metrics import CONTEXT_BYTES, CONTEXT_ENTRIES, MODEL_LIMITER, set_pool_gauges
+from app.db.session import async_engine, engine
+from app.repos import context as context_repo
+from app.services.translation import limiter
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(db: Session = Depends(get_db)):
+    set_pool_gauges("sync", engine.pool)
+    set_pool_gauges("async", async_engine.sync_engine.pool)
+
+    for field, value in limiter.snapshot().items():
+        MODEL_LIMITER.labels(field).set(value)
+
+    # Novels that were deleted since the last scrape must not linger
+    CONTEXT_ENTRIES.clear()
+    CONTEXT_BYTES.clear()
+    for novel_id, locks, entities, size in context_repo.context_sizes(db):
+        CONTEXT_ENTRIES.labels(str(novel_id), "locks").set(locks)
+        CONTEXT_ENTRIES.labels(str(novel_id), "entities").set(entities)
+        CONTEXT_BYTES.labels(str(novel_id)).set(size)
+
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
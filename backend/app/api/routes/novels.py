@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.repos import context as context_repo
 from app.repos import novel as novel_repo
 from app.schemas import NovelContextUpdate, NovelCreate, NovelOut
 from app.services.chapters import rebuild_links_from_chapter_no
@@ -48,7 +49,7 @@ def get_context(novel_id: int, db: Session = Depends(get_db)):
     n = novel_repo.get_novel(db, novel_id)
     if not n:
         raise HTTPException(status_code=404, detail="Novel not found")
-    return n.context_json or {}
+    return context_repo.load_context(db, n)
 
 
 @router.put("/{novel_id}/context")
@@ -57,7 +58,7 @@ def put_context(novel_id: int, payload: NovelContextUpdate, db: Session = Depend
     if not n:
         raise HTTPException(status_code=404, detail="Novel not found")
 
-    novel_repo.set_context(db, n, payload.context_json)
+    context_repo.replace_context(db, n, payload.context_json)
     db.commit()
     return {"ok": True}
 
@@ -107,7 +108,8 @@ def delete_chapters_range(
         count = delete_chapters_by_no_range(db, novel_id=novel_id, start_no=start, end_no=end)
 
         if rebuild:
-            rebuild_links_from_chapter_no(db, novel_id=novel_id)
+            # Only the neighbours of the removed span can have stale pointers
+            rebuild_links_from_chapter_no(db, novel_id=novel_id, start_no=start, end_no=end)
 
         db.commit()
         return {"ok": True, "deleted": count, "range": {"start": start, "end": end}}
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.services.translation import limiter
+
+router = APIRouter(tags=["rate-limit"])
+
+
+@router.get("/rate-limiter")
+def get_rate_limiter_stats():
+    return limiter.snapshot()
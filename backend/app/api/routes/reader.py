@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.repos import novel as novel_repo
+from app.repos import reader as reader_repo
+from app.schemas import ReadingProgressOut, ReadingProgressUpsert
+from app.services.jobs import worker_pool
+from app.services.read_ahead import record_progress
+
+router = APIRouter(prefix="/novels", tags=["reader"])
+
+
+@router.get("/{novel_id}/progress", response_model=ReadingProgressOut)
+def get_progress(novel_id: int, db: Session = Depends(get_db)):
+    row = reader_repo.get_progress(db, novel_id)
+    if row is None:
+        if not novel_repo.novel_exists(db, novel_id):
+            raise HTTPException(status_code=404, detail="Novel not found")
+        raise HTTPException(status_code=404, detail="No reading progress yet")
+    return row
+
+
+@router.put("/{novel_id}/progress", response_model=ReadingProgressOut)
+def put_progress(
+    novel_id: int,
+    payload: ReadingProgressUpsert,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    try:
+        row, ahead = record_progress(
+            db,
+            novel_id=novel_id,
+            current_chapter_id=payload.current_chapter_id,
+            position=payload.position,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    db.commit()
+    db.refresh(row)
+    if ahead is not None:
+        if ahead.queued:
+            worker_pool.notify()
+        response.headers["X-Read-Ahead-Queued"] = ",".join(map(str, ahead.queued))
+        response.headers["X-Read-Ahead-Cancelled"] = str(ahead.cancelled)
+    return row
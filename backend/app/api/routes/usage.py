@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.repos import novel as novel_repo
+from app.services.usage import all_usage, chapter_usage, novel_usage
+
+router = APIRouter(tags=["usage"])
+
+Bucket = Literal["hour", "day"]
+
+
+@router.get("/novels/{novel_id}/usage")
+def get_novel_usage(
+    novel_id: int,
+    since: datetime | None = Query(None, description="Window start (rounded down to the hour)"),
+    until: datetime | None = Query(None, description="Window end (exclusive)"),
+    bucket: Bucket = Query("day", description="Time series bucket"),
+    db: Session = Depends(get_db),
+):
+    usage = novel_usage(db, novel_id=novel_id, since=since, until=until, bucket=bucket)
+    if not usage["by_model"] and not novel_repo.novel_exists(db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+    return usage
+
+
+@router.get("/novels/{novel_id}/usage/chapters")
+def get_chapter_usage(
+    novel_id: int,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    rows = chapter_usage(db, novel_id=novel_id, limit=limit)
+    if not rows and not novel_repo.novel_exists(db, novel_id):
+        raise HTTPException(status_code=404, detail="Novel not found")
+    return rows
+
+
+@router.get("/usage")
+def get_usage(
+    since: datetime | None = Query(None, description="Window start (rounded down to the hour)"),
+    until: datetime | None = Query(None, description="Window end (exclusive)"),
+    bucket: Bucket = Query("day", description="Time series bucket"),
+    top: int = Query(10, ge=0, le=100, description="Novels with the most tokens to list"),
+    db: Session = Depends(get_db),
+):
+    return all_usage(db, since=since, until=until, bucket=bucket, top=top)
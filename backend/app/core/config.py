@@ -12,6 +12,100 @@ class Settings(BaseSettings):
 
     # ---- OpenAI ----
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: str | None = None
+    OPENAI_MODEL: str = "gpt-4.1-mini"
+
+    # Use the in-process stub model instead of OpenAI (local dev / load tests)
+    OPENAI_STUB: bool = False
+    STUB_LATENCY_MS: int = 0
+    STUB_MS_PER_TOKEN: float = 0.0
+    # Share of stub calls that fail with a 429 (exercises retries)
+    STUB_ERROR_RATE: float = 0.0
+    # Share of stub calls that stall for STUB_TAIL_MS more (a long latency tail)
+    STUB_TAIL_RATE: float = 0.0
+    STUB_TAIL_MS: int = 0
+
+    # ---- Model rate limits ----
+    # Requests / tokens per minute for all model calls of this process (0 = unlimited)
+    OPENAI_RPM: int = 0
+    OPENAI_TPM: int = 0
+    # Retries of 429 / 5xx / timeouts, with jittered exponential backoff (Retry-After wins;
+    # a call told to wait longer than OPENAI_RETRY_MAX_S fails instead)
+    OPENAI_MAX_RETRIES: int = 5
+    OPENAI_RETRY_BASE_S: float = 0.5
+    OPENAI_RETRY_MAX_S: float = 30.0
+    # Hedging: a model call still running after this percentile of recent call latency
+    # gets an identical second request and the first answer wins (0 = off)
+    OPENAI_HEDGE_PERCENTILE: float = 0.0
+    # At most this share of calls is hedged (each hedge is an extra paid request)
+    OPENAI_HEDGE_MAX_RATE: float = 0.05
+    # Calls observed before hedging starts
+    OPENAI_HEDGE_MIN_SAMPLES: int = 20
+
+    # ---- Context slicing ----
+    # Token budget for the context slice sent with each chapter (0 = count caps only)
+    CONTEXT_TOKEN_BUDGET: int = 0
+    # Locks/entities seen in at least this many chapters are sent as a prefix that is
+    # identical across a novel's chapters, so provider prompt caching can reuse it (0 = off)
+    CONTEXT_PREFIX_MIN_COUNT: int = 5
+    # Token cap for that prefix (most frequent entries first). The prefix counts against
+    # the slice caps and CONTEXT_TOKEN_BUDGET, taking at most half of the budget
+    CONTEXT_PREFIX_MAX_TOKENS: int = 4000
+
+    # ---- Translation cache ----
+    # Size cap for cached model results in Postgres (0 = cache disabled)
+    TRANSLATION_CACHE_MAX_MB: int = 256
+
+    # ---- Translation memory ----
+    # Paragraphs whose normalized source was translated before in the novel are reused
+    # without a model call; only the rest of the chapter is sent
+    TRANSLATION_MEMORY: bool = True
+    # Paragraphs shorter than this (normalized characters) are neither stored nor reused
+    TM_MIN_CHARS: int = 10
+
+    # ---- Usage accounting ----
+    # Record each translation attempt's token usage (translation_usage and its rollups)
+    USAGE_ACCOUNTING: bool = True
+
+    # ---- Chunked translation ----
+    # Split chapters longer than this many tokens into paragraph segments (0 = never)
+    TRANSLATE_SEGMENT_TOKENS: int = 0
+    # Concurrent model calls per chapter when segmented
+    TRANSLATE_SEGMENT_WORKERS: int = 4
+
+    # ---- Incremental re-translation ----
+    # Edited chapters re-translate only changed paragraphs unless more than this share changed
+    INCREMENTAL_MAX_CHANGED_RATIO: float = 0.5
+    # Unchanged neighbouring paragraphs sent with each changed run, for reference
+    INCREMENTAL_CONTEXT_PARAGRAPHS: int = 1
+
+    # ---- Async mode ----
+    # Serve POST /chapters/{id}/translate from an async handler (AsyncSession +
+    # AsyncOpenAI) that holds no DB connection or thread while the model works
+    ASYNC_MODE: bool = False
+
+    # ---- Query stats ----
+    # Count SQL statements per request: X-DB-Queries / X-DB-Time-Ms headers, and a log
+    # warning above QUERY_BUDGET_WARN statements or for one statement run
+    # QUERY_REPEAT_WARN+ times (N+1). 0 disables either warning.
+    QUERY_STATS: bool = False
+    QUERY_BUDGET_WARN: int = 20
+    QUERY_REPEAT_WARN: int = 5
+
+    # ---- Translation jobs ----
+    TRANSLATE_WORKERS: int = 2
+    JOB_POLL_INTERVAL_S: float = 2.0
+    # "running" jobs with no progress for this long are re-queued on startup
+    JOB_STALE_AFTER_S: int = 600
+
+    # ---- Read-ahead ----
+    # When the reader moves to a chapter (PUT /novels/{id}/progress), the next this many
+    # untranslated chapters along next_chapter_id are queued for translation (0 = off)
+    READ_AHEAD_CHAPTERS: int = 3
+    # Cap on a novel's queued + running read-ahead jobs
+    READ_AHEAD_MAX_ACTIVE: int = 3
+    # Linked chapters looked at past the current one to find them
+    READ_AHEAD_SCAN: int = 50
 
     # ---- Optional future config ----
     DEFAULT_SOURCE_LANG: str = "ko"
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Process-local metrics, served by GET /metrics. The hot path only observes histograms
+# and bumps counters; gauges that need a query (pool state, context sizes, limiter queue)
+# are refreshed when /metrics is scraped. Each worker process reports its own.
+
+# Model calls and whole translations take seconds to minutes
+SLOW_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the last body byte, by route template",
+    ["method", "route", "status"],
+    buckets=SLOW_BUCKETS,
+)
+
+TRANSLATE_STAGE_SECONDS = Histogram(
+    "translate_stage_duration_seconds",
+    "Time spent in each stage of a chapter translation",
+    ["stage"],
+    buckets=SLOW_BUCKETS,
+)
+
+TRANSLATE_STREAM_FIRST_TEXT_SECONDS = Histogram(
+    "translate_stream_first_text_seconds",
+    "Time from a streaming translate request to its first translated text",
+    buckets=SLOW_BUCKETS,
+)
+TRANSLATE_STREAMS = Counter(
+    "translate_streams",
+    "Streaming translate requests by how they ended (completed / disconnected / error)",
+    ["outcome"],
+)
+
+READ_AHEAD_OPENS = Counter(
+    "read_ahead_opens",
+    "Chapters the reader moved to, by move (next / jump) and translation state "
+    "(ready / pending = job queued or running / missing)",
+    ["move", "state"],
+)
+READ_AHEAD_JOBS = Counter(
+    "read_ahead_jobs",
+    "Read-ahead translation jobs queued / cancelled (reader moved elsewhere) / skipped "
+    "(chapter translated by then)",
+    ["outcome"],
+)
+
+MODEL_CALL_SECONDS = Histogram(
+    "model_call_duration_seconds",
+    "Latency of one model API attempt",
+    ["outcome"],
+    buckets=SLOW_BUCKETS,
+)
+MODEL_HEDGED_CALLS = Counter(
+    "model_hedged_calls",
+    "Model calls by hedging outcome: none (answered before the hedge delay), won / lost "
+    "(a second request was sent and answered first / second), capped (over the hedge rate), "
+    "queued (not hedged while calls wait for the rate limiter)",
+    ["outcome"],
+)
+MODEL_HEDGE_SAVED_SECONDS = Counter(
+    "model_hedge_saved_seconds",
+    "Seconds won hedges answered before their first request did (sync calls, whose "
+    "abandoned first request still completes)",
+)
+MODEL_TOKENS = Counter(
+    "model_tokens",
+    "Tokens reported in model responses' usage",
+    ["kind"],
+)
+TRANSLATION_MEMORY_PARAGRAPHS = Counter(
+    "translation_memory_paragraphs",
+    "Paragraphs looked up in translation memory (hit = reused without a model call)",
+    ["outcome"],
+)
+TRANSLATION_MEMORY_TOKENS_SAVED = Counter(
+    "translation_memory_tokens_saved",
+    "Estimated model tokens (prompt + completion) saved by translation memory",
+)
+MODEL_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "model_rate_limit_wait_seconds",
+    "Time a model call waited for RPM/TPM budget (calls that waited)",
+    buckets=SLOW_BUCKETS,
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool (includes connecting new ones)",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 10, 30),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pool connections by state (at scrape time)",
+    ["pool", "state"],
+)
+
+MODEL_LIMITER = Gauge(
+    "model_rate_limiter",
+    "Rate limiter state and totals since start (at scrape time)",
+    ["field"],
+)
+
+CONTEXT_ENTRIES = Gauge(
+    "novel_context_entries",
+    "Stored context entries per novel (at scrape time)",
+    ["novel_id", "kind"],
+)
+CONTEXT_BYTES = Gauge(
+    "novel_context_bytes",
+    "Stored size of a novel's context: lock/entity rows plus the context_json document",
+    ["novel_id"],
+)
+
+
+def stage_timer(stage: str) -> Any:
+    """`with stage_timer("build_context_slice"): ...` observes the block's duration."""
+    return TRANSLATE_STAGE_SECONDS.labels(stage).time()
+
+
+def observe_usage(usage: dict[str, int]) -> None:
+    MODEL_TOKENS.labels("prompt").inc(usage.get("prompt_tokens", 0))
+    MODEL_TOKENS.labels("completion").inc(usage.get("completion_tokens", 0))
+    # A subset of prompt: the part served from the provider's prompt cache
+    MODEL_TOKENS.labels("cached").inc(usage.get("cached_tokens", 0))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    metrics_label = "sync"
+
+    def _do_get(self) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.metrics_label).observe(time.perf_counter() - t0)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """TimedQueuePool for the async engine."""
+
+    metrics_label = "async"
+
+    def _do_get(self) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.metrics_label).observe(time.perf_counter() - t0)
+
+
+def set_pool_gauges(label: str, pool: Any) -> None:
+    if not isinstance(pool, QueuePool):
+        return
+    DB_POOL_CONNECTIONS.labels(label, "checked_out").set(pool.checkedout())
+    DB_POOL_CONNECTIONS.labels(label, "idle").set(pool.checkedin())
+    DB_POOL_CONNECTIONS.labels(label, "overflow").set(max(0, pool.overflow()))
+    DB_POOL_CONNECTIONS.labels(label, "size").set(pool.size())
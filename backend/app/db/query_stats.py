@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+@dataclass
+class QueryStats:
+    """SQL statements issued while counting is active (see count_queries)."""
+
+    statements: int = 0
+    total_s: float = 0.0
+    by_sql: Counter[str] = field(default_factory=Counter)
+
+    def add(self, sql: str, elapsed_s: float) -> None:
+        self.statements += 1
+        self.total_s += elapsed_s
+        self.by_sql[sql] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least `threshold` times: the signature of an N+1 loop."""
+        return [(sql, n) for sql, n in self.by_sql.most_common() if n >= threshold]
+
+
+# Set per request (or per `count_queries` block). Starlette's threadpool and
+# AsyncSession.run_sync both run in a copy of the caller's context, so statements from
+# sync handlers, dependencies and run_sync'd code are all seen by the same object.
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+# Blocks counting every thread's statements (count_queries(all_threads=True)), e.g. a
+# test driving the app through TestClient, whose requests run in another thread.
+_global: list[QueryStats] = []
+_global_lock = threading.Lock()
+
+
+def _before(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    if _current.get() is not None or _global:
+        conn.info.setdefault("query_stats_t0", []).append(time.perf_counter())
+
+
+def _after(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    stats = _current.get()
+    if stats is None and not _global:
+        return
+    started = conn.info.get("query_stats_t0")
+    elapsed = time.perf_counter() - started.pop() if started else 0.0
+    # Literal ids in the SQL text (rare with bound parameters) would hide repeats
+    sql = _NUMBER_RE.sub("?", " ".join(statement.split()))
+    if stats is not None:
+        stats.add(sql, elapsed)
+    if _global:
+        with _global_lock:
+            for s in _global:
+                s.add(sql, elapsed)
+
+
+def install(engine: Engine) -> None:
+    """Counts this engine's statements into the active QueryStats (a no-op without one)."""
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+
+
+@contextmanager
+def count_queries(*, all_threads: bool = False) -> Iterator[QueryStats]:
+    """
+    Counts the statements run inside the block (on the app's engines), by this
+    context, or with `all_threads` by any thread of the process:
+
+        with count_queries(all_threads=True) as q:
+            client.get("/novels/1/chapters")
+        assert q.statements <= 2, q.by_sql
+    """
+    stats = QueryStats()
+    if all_threads:
+        with _global_lock:
+            _global.append(stats)
+        try:
+            yield stats
+        finally:
+            with _global_lock:
+                _global.remove(stats)
+        return
+
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_statements: int, *, max_repeats: int | None = None) -> Iterator[QueryStats]:
+    """
+    count_queries(all_threads=True) that fails with AssertionError when the block runs
+    more than `max_statements` statements, or one statement more than `max_repeats`
+    times. For tests: run with TRANSLATE_WORKERS=0 so job workers do not add theirs.
+    """
+    with count_queries(all_threads=True) as stats:
+        yield stats
+    if stats.statements > max_statements:
+        raise AssertionError(
+            f"{stats.statements} SQL statements, budget {max_statements}:\n"
+            + "\n".join(f"  {n}x {sql}" for sql, n in stats.by_sql.most_common())
+        )
+    if max_repeats is not None:
+        repeated = stats.repeated(max_repeats + 1)
+        if repeated:
+            sql, n = repeated[0]
+            raise AssertionError(f"Statement repeated {n}x (max {max_repeats}): {sql}")
@@ -1,12 +1,31 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import TimedAsyncQueuePool, TimedQueuePool
+from app.db import query_stats
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, poolclass=TimedQueuePool)
+
+query_stats.install(engine)
 
 SessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
     autocommit=False,
 )
+
+# Async stack (settings.ASYNC_MODE). postgresql+psycopg URLs get psycopg's async driver.
+# Objects stay usable after commit: async code cannot lazy-load expired attributes.
+async_engine = create_async_engine(
+    settings.DATABASE_URL, pool_pre_ping=True, poolclass=TimedAsyncQueuePool
+)
+
+query_stats.install(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
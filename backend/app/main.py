@@ -1,7 +1,24 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+
+from app.api.middleware import QueryStatsMiddleware, RequestMetricsMiddleware
 from app.api.routes import all_routers
+from app.core.config import settings
+from app.services.jobs import start_workers, stop_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_workers()
+    yield
+    stop_workers()
+
 
-app = FastAPI(title="Novel Translator API")
+app = FastAPI(title="Novel Translator API", lifespan=lifespan)
+app.add_middleware(RequestMetricsMiddleware)
+if settings.QUERY_STATS:
+    app.add_middleware(QueryStatsMiddleware)
 
 for r in all_routers:
     app.include_router(r)
@@ -2,3 +2,8 @@ from .novel import Novel
 from .chapter import Chapter
 from .reading_progress import ReadingProgress
 from .bookmark import Bookmark
+from .translation_job import TranslationJob
+from .context import ContextConflict, ContextEntity, ContextLock
+from .translation_cache import TranslationCacheEntry
+from .translation_memory import TranslationMemoryEntry
+from .translation_usage import ChapterUsage, TranslationUsage, TranslationUsageHourly
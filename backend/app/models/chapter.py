@@ -13,10 +13,14 @@ from sqlalchemy import (
     UniqueConstraint,
     func,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
+# Deferred column group holding the chapter text
+BODY = "body"
+
 
 class Chapter(Base):
     __tablename__ = "chapters"
@@ -32,16 +36,30 @@ class Chapter(Base):
     # Canonical ordering/display number (unique per novel)
     chapter_no: Mapped[int] = mapped_column(Integer, nullable=False)
 
-    title: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
-
-    raw: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # untranslated
-    content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # translated
+    title: Mapped[str | None] = mapped_column(String(500), nullable=True)
+
+    # Chapter text is the deferred "body" group: plain loads fetch metadata only and
+    # the body is loaded on first access (or up front with undefer_group("body"), see
+    # app.repos.chapter). The table has toast_tuple_target=128 (migration 2d8f5a1c7e43),
+    # so the text is stored out of line and the heap rows stay small.
+    raw: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group=BODY
+    )  # untranslated
+    content: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, deferred_group=BODY
+    )  # translated
+
+    # Raw paragraph hashes -> translated text, for incremental re-translation
+    # (app.services.alignment). Cleared whenever content is edited directly.
+    alignment: Mapped[dict | None] = mapped_column(
+        JSONB, nullable=True, deferred=True, deferred_group=BODY
+    )
 
-    source_url: Mapped[Optional[str]] = mapped_column(String(2048), nullable=True)
+    source_url: Mapped[str | None] = mapped_column(String(2048), nullable=True)
 
     # Workflow state for reader/translation pipeline
     status: Mapped[str] = mapped_column(String(30), nullable=False, default="raw_only")
-    translated_at: Mapped[Optional[datetime]] = mapped_column(
+    translated_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
 
@@ -53,24 +71,24 @@ class Chapter(Base):
     )
 
     # Doubly linked list pointers
-    prev_chapter_id: Mapped[Optional[int]] = mapped_column(
+    prev_chapter_id: Mapped[int | None] = mapped_column(
         ForeignKey("chapters.id", ondelete="SET NULL"),
         nullable=True,
     )
-    next_chapter_id: Mapped[Optional[int]] = mapped_column(
+    next_chapter_id: Mapped[int | None] = mapped_column(
         ForeignKey("chapters.id", ondelete="SET NULL"),
         nullable=True,
     )
 
     # Self-referential relationships
-    prev_chapter: Mapped[Optional["Chapter"]] = relationship(
+    prev_chapter: Mapped[Chapter | None] = relationship(
         "Chapter",
         foreign_keys=[prev_chapter_id],
         remote_side="Chapter.id",
         uselist=False,
         post_update=True,
     )
-    next_chapter: Mapped[Optional["Chapter"]] = relationship(
+    next_chapter: Mapped[Chapter | None] = relationship(
         "Chapter",
         foreign_keys=[next_chapter_id],
         remote_side="Chapter.id",
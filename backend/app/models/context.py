@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+# Novel "consistency memory" rows. Novel.context_json keeps only the small document
+# parts (version, style, ...); locks and canon entities live here so a translation
+# only touches the terms it actually updates.
+
+
+class ContextLock(Base):
+    __tablename__ = "context_locks"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    src: Mapped[str] = mapped_column(Text, nullable=False)
+    dst: Mapped[str] = mapped_column(Text, nullable=False)
+    reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    last_seen_chapter: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Any other keys from the JSON document entry (kept for round-trips)
+    extra: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    conflicts: Mapped[list[ContextConflict]] = relationship(
+        "ContextConflict",
+        foreign_keys="ContextConflict.lock_id",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="ContextConflict.id",
+    )
+
+    __table_args__ = (UniqueConstraint("novel_id", "src", name="uq_context_locks_novel_src"),)
+
+
+class ContextEntity(Base):
+    __tablename__ = "context_entities"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # person | place | org | item | skill | title | other
+    type: Mapped[str] = mapped_column(String(30), nullable=False, default="other")
+    src: Mapped[str] = mapped_column(Text, nullable=False)
+    dst: Mapped[str] = mapped_column(Text, nullable=False)
+
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    last_seen_chapter: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    extra: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    conflicts: Mapped[list[ContextConflict]] = relationship(
+        "ContextConflict",
+        foreign_keys="ContextConflict.entity_id",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="ContextConflict.id",
+    )
+
+    __table_args__ = (
+        UniqueConstraint("novel_id", "type", "src", name="uq_context_entities_novel_type_src"),
+    )
+
+
+class ContextConflict(Base):
+    """A rendering the model proposed that disagreed with an existing lock/entity."""
+
+    __tablename__ = "context_conflicts"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+
+    # Exactly one of lock_id / entity_id is set
+    lock_id: Mapped[int | None] = mapped_column(
+        ForeignKey("context_locks.id", ondelete="CASCADE"),
+        index=True,
+        nullable=True,
+    )
+    entity_id: Mapped[int | None] = mapped_column(
+        ForeignKey("context_entities.id", ondelete="CASCADE"),
+        index=True,
+        nullable=True,
+    )
+
+    dst: Mapped[str] = mapped_column(Text, nullable=False)
+    reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    chapter_no: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -19,6 +19,8 @@ class Novel(Base):
     source_lang: Mapped[str] = mapped_column(String(20), nullable=False, default="ko")
     target_lang: Mapped[str] = mapped_column(String(20), nullable=False, default="en")
 
+    # Small document part of the context (version, style, ...). Locks and canon entities
+    # are stored in context_locks / context_entities (see app.repos.context).
     context_json: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
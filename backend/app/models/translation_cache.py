@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TranslationCacheEntry(Base):
+    """
+    Content-addressed model results. `key` is a sha256 over (model, languages, raw text,
+    context slice fingerprint); see app.services.translation_cache.cache_key.
+    """
+
+    __tablename__ = "translation_cache"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    source_lang: Mapped[str] = mapped_column(String(20), nullable=False)
+    target_lang: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    # {"translation": str, "context_updates": {...}}
+    response: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # Eviction is least-recently-used first
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
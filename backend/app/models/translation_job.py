@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TranslationJob(Base):
+    __tablename__ = "translation_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # What the worker should run (see app.services.jobs.JOB_HANDLERS)
+    kind: Mapped[str] = mapped_column(String(30), nullable=False, default="translate_chapter")
+
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    chapter_id: Mapped[int | None] = mapped_column(
+        ForeignKey("chapters.id", ondelete="SET NULL"),
+        index=True,
+        nullable=True,
+    )
+
+    # queued -> running -> succeeded | failed; queued -> cancelled (read-ahead the reader
+    # moved away from)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    stage: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Workers claim the oldest queued job
+        Index("ix_translation_jobs_status_id", "status", "id"),
+    )
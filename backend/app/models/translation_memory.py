@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TranslationMemoryEntry(Base):
+    """
+    A translated paragraph of a novel, reused for later paragraphs with the same
+    normalized source. `key` hashes the source with digit runs masked, so stat blocks
+    that differ only in numbers share an entry (see app.services.translation_memory).
+    """
+
+    __tablename__ = "translation_memory"
+    __table_args__ = (UniqueConstraint("novel_id", "key", name="uq_translation_memory_novel_key"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    key: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    # Normalized source paragraph and its translation as last stored
+    source: Mapped[str] = mapped_column(Text, nullable=False)
+    target: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Times the paragraph was stored from a translated chapter, and the latest one
+    seen: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    last_chapter_no: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TranslationUsage(Base):
+    """
+    One chapter translation attempt: the model's token usage summed over its requests
+    (0 for cache hits), how long the model phase took and how large the context slice
+    was. Written together with the rollups below (see app.repos.usage) as soon as the
+    model has answered, and marked `applied` once the result is stored.
+    """
+
+    __tablename__ = "translation_usage"
+    __table_args__ = (
+        Index("ix_translation_usage_novel_created", "novel_id", "created_at"),
+        # For ON DELETE SET NULL when chapters are deleted
+        Index("ix_translation_usage_chapter", "chapter_id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # Kept when the chapter is deleted: the tokens were still paid for
+    chapter_id: Mapped[int | None] = mapped_column(
+        ForeignKey("chapters.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    chapter_no: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # api | async | stream | translate_chapter | read_ahead | translate_range | batch
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    model: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Part of prompt_tokens served from the provider's prompt cache
+    cached_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Model requests made (segments / hunks; 0 for a cache hit)
+    calls: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    cache_hit: Mapped[bool] = mapped_column(nullable=False, default=False)
+    # The result was stored on the chapter (false: paid for, then discarded)
+    applied: Mapped[bool] = mapped_column(nullable=False, default=False)
+    latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Context slice sent vs. the whole candidate context (see build_context_slice)
+    slice_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    context_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    chapter_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class TranslationUsageHourly(Base):
+    """Per novel, hour, model and source sums of translation_usage, for windowed totals."""
+
+    __tablename__ = "translation_usage_hourly"
+    __table_args__ = (Index("ix_translation_usage_hourly_hour", "hour"),)
+
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    model: Mapped[str] = mapped_column(String(64), primary_key=True)
+    source: Mapped[str] = mapped_column(String(32), primary_key=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cache_hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    applied: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    prompt_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    cached_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # Sums over the attempts that report them (timed / sliced counts those)
+    latency_ms: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    timed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    slice_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    context_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sliced: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ChapterUsage(Base):
+    """Per chapter sums of translation_usage over all its attempts."""
+
+    __tablename__ = "chapter_usage"
+    __table_args__ = (Index("ix_chapter_usage_novel", "novel_id"),)
+
+    chapter_id: Mapped[int] = mapped_column(
+        ForeignKey("chapters.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    novel_id: Mapped[int] = mapped_column(
+        ForeignKey("novels.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    chapter_no: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    prompt_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    cached_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # Size of the chapter at its latest attempt
+    chapter_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
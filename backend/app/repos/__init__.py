@@ -1 +1 @@
-from . import novel, chapter, reader  # noqa: F401
+from . import chapter, context, job, novel, reader, translation_cache  # noqa: F401
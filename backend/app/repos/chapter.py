@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import Any
 
-from app.models.chapter import Chapter
+from sqlalchemy import and_, func, inspect, literal, select
+from sqlalchemy.orm import Session, undefer_group
+
+from app.models.chapter import BODY, Chapter
 
 
 def create_chapter(
@@ -31,21 +34,60 @@ def create_chapter(
     return ch
 
 
-def get_chapter(db: Session, chapter_id: int) -> Chapter | None:
-    return db.get(Chapter, chapter_id)
+# Chapter text (raw, content, alignment) is a deferred column group: by default only
+# metadata is loaded. Pass with_body=True when the text will be read or returned.
+_BODY_ATTRS = ("raw", "content", "alignment")
+
 
+def _body(with_body: bool) -> list:
+    return [undefer_group(BODY)] if with_body else []
 
-def get_chapter_by_no(db: Session, novel_id: int, chapter_no: int) -> Chapter | None:
+
+def get_chapter(db: Session, chapter_id: int, *, with_body: bool = False) -> Chapter | None:
+    ch = db.get(Chapter, chapter_id, options=_body(with_body))
+    if ch is not None and with_body:
+        # db.get() skips SQL for a chapter already in the session (loaded without body)
+        unloaded = [a for a in _BODY_ATTRS if a in inspect(ch).unloaded]
+        if unloaded:
+            db.refresh(ch, attribute_names=unloaded)
+    return ch
+
+
+def reload_chapter(db: Session, chapter: Chapter) -> Chapter:
+    """
+    Re-reads a chapter with its body in one SELECT, e.g. after a commit expired it and
+    before it is returned (db.refresh() would load the body with a second SELECT).
+    """
+    ch = db.get(
+        Chapter, inspect(chapter).identity, options=_body(True), populate_existing=True
+    )
+    if ch is None:
+        raise ValueError("Chapter not found")
+    return ch
+
+
+def get_chapter_by_no(
+    db: Session, novel_id: int, chapter_no: int, *, with_body: bool = False
+) -> Chapter | None:
     return (
         db.query(Chapter)
+        .options(*_body(with_body))
         .filter(Chapter.novel_id == novel_id, Chapter.chapter_no == chapter_no)
         .first()
     )
 
 
-def list_chapters(db: Session, novel_id: int, limit: int = 500, offset: int = 0) -> list[Chapter]:
+def list_chapters(
+    db: Session,
+    novel_id: int,
+    limit: int = 500,
+    offset: int = 0,
+    *,
+    with_body: bool = False,
+) -> list[Chapter]:
     return (
         db.query(Chapter)
+        .options(*_body(with_body))
         .filter(Chapter.novel_id == novel_id)
         .order_by(Chapter.chapter_no.asc())
         .offset(offset)
@@ -54,6 +96,72 @@ def list_chapters(db: Session, novel_id: int, limit: int = 500, offset: int = 0)
     )
 
 
+def list_chapters_after(
+    db: Session,
+    novel_id: int,
+    *,
+    after_no: int | None = None,
+    limit: int = 500,
+    with_body: bool = False,
+    only_translated: bool = False,
+) -> list[Chapter]:
+    """
+    Keyset page: the first `limit` chapters with chapter_no > after_no. Seeks straight
+    into ix_chapters_novel_chapter_no, so every page costs the same.
+    """
+    q = db.query(Chapter).options(*_body(with_body)).filter(Chapter.novel_id == novel_id)
+    if after_no is not None:
+        q = q.filter(Chapter.chapter_no > after_no)
+    if only_translated:
+        q = q.filter(Chapter.content.isnot(None)).filter(Chapter.content != "")
+    return q.order_by(Chapter.chapter_no.asc()).limit(limit).all()
+
+
+def chapters_ahead(db: Session, chapter_id: int, *, limit: int) -> list[Any]:
+    """
+    (id, status, has_raw) of up to `limit` chapters following `chapter_id` along
+    next_chapter_id, nearest first, in one recursive query (no chapter text loaded).
+    """
+    c = Chapter.__table__
+
+    def columns(t: Any) -> list[Any]:
+        has_raw = and_(t.c.raw.isnot(None), t.c.raw != "")
+        return [t.c.id, t.c.next_chapter_id, t.c.status, has_raw.label("has_raw")]
+
+    first_id = select(c.c.next_chapter_id).where(c.c.id == chapter_id).scalar_subquery()
+    ahead = (
+        select(*columns(c), literal(1).label("depth"))
+        .where(c.c.id == first_id)
+        .cte("ahead", recursive=True)
+    )
+    nxt = c.alias("nxt")
+    ahead = ahead.union_all(
+        select(*columns(nxt), ahead.c.depth + 1).where(
+            nxt.c.id == ahead.c.next_chapter_id, ahead.c.depth < limit
+        )
+    )
+    return list(
+        db.execute(
+            select(ahead.c.id, ahead.c.status, ahead.c.has_raw).order_by(ahead.c.depth)
+        ).all()
+    )
+
+
+def count_chapters(
+    db: Session,
+    novel_id: int,
+    *,
+    start_no: int | None = None,
+    end_no: int | None = None,
+) -> int:
+    q = db.query(func.count(Chapter.id)).filter(Chapter.novel_id == novel_id)
+    if start_no is not None:
+        q = q.filter(Chapter.chapter_no >= start_no)
+    if end_no is not None:
+        q = q.filter(Chapter.chapter_no <= end_no)
+    return int(q.scalar() or 0)
+
+
 def update_chapter(
     db: Session,
     chapter: Chapter,
@@ -70,6 +178,7 @@ def update_chapter(
         chapter.raw = raw
     if content is not None:
         chapter.content = content
+        chapter.alignment = None
     if source_url is not None:
         chapter.source_url = source_url
     if status is not None:
@@ -87,6 +196,7 @@ def set_translation(
     status: str = "translated",
 ) -> Chapter:
     chapter.content = content
+    chapter.alignment = None
     chapter.status = status
     chapter.translated_at = translated_at or datetime.utcnow()
     db.flush()
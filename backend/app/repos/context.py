@@ -0,0 +1,532 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any, cast
+
+from sqlalchemy import delete, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.context import ContextConflict, ContextEntity, ContextLock
+from app.models.novel import Novel
+
+# Keys stored in dedicated columns; anything else on an entry goes to `extra`.
+_LOCK_KEYS = {"src", "dst", "reason", "count", "last_seen_chapter", "conflicts"}
+_ENTITY_KEYS = {"type", "src", "dst", "count", "last_seen_chapter", "conflicts"}
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_at(value: Any) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# -------- Document assembly --------
+
+
+def document_part(ctx: dict[str, Any] | None) -> dict[str, Any]:
+    """The part of a context document that stays in Novel.context_json."""
+    doc = dict(ctx or {})
+    doc.pop("locks", None)
+    canon = doc.get("canon")
+    if isinstance(canon, dict):
+        canon = dict(canon)
+        canon.pop("entities", None)
+        doc["canon"] = canon
+    return doc
+
+
+def _conflict_dict(c: Any, *, with_reason: bool) -> dict[str, Any]:
+    out: dict[str, Any] = {"dst": c.dst}
+    if with_reason:
+        out["reason"] = c.reason
+    out["chapter_no"] = c.chapter_no
+    if c.at is not None:
+        out["at"] = c.at.isoformat()
+    return out
+
+
+def load_context(db: Session, novel: Novel) -> dict[str, Any]:
+    """
+    Assembles the full context document (same shape the JSONB blob used to have):
+    {version, style, locks: [...], canon: {entities: [...]}, ...}
+    Entries are in insertion order.
+    """
+    doc = document_part(novel.context_json)
+    canon = cast(dict[str, Any], doc.get("canon") if isinstance(doc.get("canon"), dict) else {})
+
+    lock_conflicts: dict[int, list[dict[str, Any]]] = {}
+    entity_conflicts: dict[int, list[dict[str, Any]]] = {}
+    for c in db.execute(
+        select(
+            ContextConflict.lock_id,
+            ContextConflict.entity_id,
+            ContextConflict.dst,
+            ContextConflict.reason,
+            ContextConflict.chapter_no,
+            ContextConflict.at,
+        )
+        .where(ContextConflict.novel_id == novel.id)
+        .order_by(ContextConflict.id.asc())
+    ):
+        if c.lock_id is not None:
+            lock_conflicts.setdefault(c.lock_id, []).append(_conflict_dict(c, with_reason=True))
+        elif c.entity_id is not None:
+            entity_conflicts.setdefault(c.entity_id, []).append(
+                _conflict_dict(c, with_reason=False)
+            )
+
+    locks: list[dict[str, Any]] = []
+    for r in db.execute(
+        select(
+            ContextLock.id,
+            ContextLock.src,
+            ContextLock.dst,
+            ContextLock.reason,
+            ContextLock.count,
+            ContextLock.last_seen_chapter,
+            ContextLock.extra,
+        )
+        .where(ContextLock.novel_id == novel.id)
+        .order_by(ContextLock.id.asc())
+    ):
+        entry: dict[str, Any] = {
+            **(r.extra or {}),
+            "src": r.src,
+            "dst": r.dst,
+            "reason": r.reason,
+            "count": r.count,
+            "last_seen_chapter": r.last_seen_chapter,
+        }
+        if r.id in lock_conflicts:
+            entry["conflicts"] = lock_conflicts[r.id]
+        locks.append(entry)
+
+    entities: list[dict[str, Any]] = []
+    for r in db.execute(
+        select(
+            ContextEntity.id,
+            ContextEntity.type,
+            ContextEntity.src,
+            ContextEntity.dst,
+            ContextEntity.count,
+            ContextEntity.last_seen_chapter,
+            ContextEntity.extra,
+        )
+        .where(ContextEntity.novel_id == novel.id)
+        .order_by(ContextEntity.id.asc())
+    ):
+        entry = {
+            **(r.extra or {}),
+            "type": r.type,
+            "src": r.src,
+            "dst": r.dst,
+            "count": r.count,
+            "last_seen_chapter": r.last_seen_chapter,
+        }
+        if r.id in entity_conflicts:
+            entry["conflicts"] = entity_conflicts[r.id]
+        entities.append(entry)
+
+    doc["locks"] = locks
+    doc["canon"] = {**canon, "entities": entities}
+    return doc
+
+
+def replace_context(db: Session, novel: Novel, ctx: dict[str, Any]) -> Novel:
+    """Full overwrite (PUT /novels/{id}/context). Duplicate srcs keep their first entry."""
+    db.execute(delete(ContextLock).where(ContextLock.novel_id == novel.id))
+    db.execute(delete(ContextEntity).where(ContextEntity.novel_id == novel.id))
+
+    seen_locks: set[str] = set()
+    for e in ctx.get("locks") or []:
+        if not isinstance(e, dict):
+            continue
+        src, dst = e.get("src"), e.get("dst")
+        if not isinstance(src, str) or not isinstance(dst, str) or src in seen_locks:
+            continue
+        seen_locks.add(src)
+        row = ContextLock(
+            novel_id=novel.id,
+            src=src,
+            dst=dst,
+            reason=str(e["reason"]) if e.get("reason") is not None else None,
+            count=_to_int(e.get("count")),
+            last_seen_chapter=_to_int(e.get("last_seen_chapter")),
+            extra={k: v for k, v in e.items() if k not in _LOCK_KEYS} or None,
+        )
+        for c in e.get("conflicts") or []:
+            if isinstance(c, dict) and isinstance(c.get("dst"), str):
+                row.conflicts.append(
+                    ContextConflict(
+                        novel_id=novel.id,
+                        dst=c["dst"],
+                        reason=str(c["reason"]) if c.get("reason") is not None else None,
+                        chapter_no=_to_int(c.get("chapter_no")) or None,
+                        at=_parse_at(c.get("at")),
+                    )
+                )
+        db.add(row)
+
+    canon = ctx.get("canon") if isinstance(ctx.get("canon"), dict) else {}
+    seen_entities: set[tuple[str, str]] = set()
+    for e in cast(dict[str, Any], canon).get("entities") or []:
+        if not isinstance(e, dict):
+            continue
+        etype, src, dst = str(e.get("type") or "other"), e.get("src"), e.get("dst")
+        if not isinstance(src, str) or not isinstance(dst, str) or (etype, src) in seen_entities:
+            continue
+        seen_entities.add((etype, src))
+        row_e = ContextEntity(
+            novel_id=novel.id,
+            type=etype,
+            src=src,
+            dst=dst,
+            count=_to_int(e.get("count")),
+            last_seen_chapter=_to_int(e.get("last_seen_chapter")),
+            extra={k: v for k, v in e.items() if k not in _ENTITY_KEYS} or None,
+        )
+        for c in e.get("conflicts") or []:
+            if isinstance(c, dict) and isinstance(c.get("dst"), str):
+                row_e.conflicts.append(
+                    ContextConflict(
+                        novel_id=novel.id,
+                        dst=c["dst"],
+                        chapter_no=_to_int(c.get("chapter_no")) or None,
+                        at=_parse_at(c.get("at")),
+                    )
+                )
+        db.add(row_e)
+
+    novel.context_json = document_part(ctx)
+    db.flush()
+    return novel
+
+
+def context_sizes(db: Session) -> list[tuple[int, int, int, int]]:
+    """
+    (novel_id, locks, entities, bytes) for every novel; bytes is the stored size of the
+    lock and entity rows plus Novel.context_json.
+    """
+    totals: dict[int, list[int]] = {}
+    for idx, model in ((0, ContextLock), (1, ContextEntity)):
+        row_size = func.pg_column_size(literal_column(model.__tablename__ + ".*"))
+        for novel_id, n, size in db.execute(
+            select(model.novel_id, func.count(), func.coalesce(func.sum(row_size), 0)).group_by(
+                model.novel_id
+            )
+        ):
+            t = totals.setdefault(novel_id, [0, 0, 0])
+            t[idx] = n
+            t[2] += int(size)
+    for novel_id, size in db.execute(
+        select(Novel.id, func.coalesce(func.pg_column_size(Novel.context_json), 0))
+    ):
+        totals.setdefault(novel_id, [0, 0, 0])[2] += int(size)
+    return [(novel_id, t[0], t[1], t[2]) for novel_id, t in sorted(totals.items())]
+
+
+# -------- Incremental updates --------
+
+
+def _locked_locks(db: Session, *, novel_id: int, srcs: set[str]) -> dict[str, ContextLock]:
+    # Row locks are taken in key order, so two translations touching overlapping terms
+    # queue behind each other instead of deadlocking.
+    return {
+        row.src: row
+        for row in db.query(ContextLock)
+        .filter(ContextLock.novel_id == novel_id, ContextLock.src.in_(srcs))
+        .order_by(ContextLock.src)
+        .with_for_update()
+    }
+
+
+def _fold_locks(
+    db: Session,
+    existing: dict[str, ContextLock],
+    items: list[tuple[str, str, str]],
+    *,
+    novel_id: int,
+    chapter_no: int,
+    now: datetime,
+) -> list[tuple[str, str, str]]:
+    """Applies the proposals for existing locks; returns the ones for unknown terms."""
+    rest = []
+    for src, dst, reason in items:
+        row = existing.get(src)
+        if row is None:
+            rest.append((src, dst, reason))
+            continue
+        if row.dst == dst:
+            row.count = int(row.count or 0) + 1
+        else:
+            db.add(
+                ContextConflict(
+                    novel_id=novel_id,
+                    lock_id=row.id,
+                    dst=dst,
+                    reason=reason,
+                    chapter_no=chapter_no,
+                    at=now,
+                )
+            )
+        row.last_seen_chapter = chapter_no
+    return rest
+
+
+def upsert_locks(
+    db: Session,
+    *,
+    novel_id: int,
+    items: list[tuple[str, str, str]],
+    chapter_no: int,
+) -> None:
+    """
+    Applies (src, dst, reason) proposals: same dst -> count+1, different dst -> conflict row,
+    unknown src -> new lock. Only the touched rows are read (and row-locked) and written.
+    """
+    if not items:
+        return
+    now = datetime.now(UTC)
+
+    existing = _locked_locks(db, novel_id=novel_id, srcs={src for src, _, _ in items})
+    rest = _fold_locks(db, existing, items, novel_id=novel_id, chapter_no=chapter_no, now=now)
+    fresh: dict[str, dict[str, Any]] = {}
+
+    for src, dst, reason in rest:
+        new = fresh.get(src)
+        if new is None:
+            fresh[src] = {
+                "novel_id": novel_id,
+                "src": src,
+                "dst": dst,
+                "reason": reason,
+                "count": 1,
+                "last_seen_chapter": chapter_no,
+                "conflicts": [],
+            }
+        elif new["dst"] == dst:
+            new["count"] += 1
+        else:
+            new["conflicts"].append((dst, reason))
+
+    db.flush()
+    if not fresh:
+        return
+
+    # A concurrent translation may have inserted the same term meanwhile: fold into it.
+    t = ContextLock.__table__
+    stmt = pg_insert(ContextLock).values(
+        [{k: v for k, v in f.items() if k != "conflicts"} for _, f in sorted(fresh.items())]
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_context_locks_novel_src",
+        set_={
+            "count": t.c.count + stmt.excluded.count,
+            "last_seen_chapter": stmt.excluded.last_seen_chapter,
+            "updated_at": now,
+        },
+        where=t.c.dst == stmt.excluded.dst,
+    ).returning(t.c.id, t.c.src)
+    ids = {r.src: r.id for r in db.execute(stmt)}
+
+    conflicts = [
+        {
+            "novel_id": novel_id,
+            "lock_id": ids[src],
+            "dst": dst,
+            "reason": reason,
+            "chapter_no": chapter_no,
+            "at": now,
+        }
+        for src, f in fresh.items()
+        if src in ids
+        for dst, reason in f["conflicts"]
+    ]
+    if conflicts:
+        db.execute(pg_insert(ContextConflict).values(conflicts))
+
+    # Terms it inserted with another dst are skipped by the WHERE (and not RETURNed), but
+    # their rows are locked now: apply the proposals to them like to existing locks.
+    missed = [item for item in rest if item[0] not in ids]
+    if missed:
+        existing = _locked_locks(db, novel_id=novel_id, srcs={src for src, _, _ in missed})
+        _fold_locks(db, existing, missed, novel_id=novel_id, chapter_no=chapter_no, now=now)
+        db.flush()
+
+
+def _locked_entities(
+    db: Session, *, novel_id: int, keys: set[tuple[str, str]]
+) -> dict[tuple[str, str], ContextEntity]:
+    # Key order, as in _locked_locks
+    return {
+        (row.type, row.src): row
+        for row in db.query(ContextEntity)
+        .filter(
+            ContextEntity.novel_id == novel_id,
+            ContextEntity.src.in_({src for _, src in keys}),
+        )
+        .order_by(ContextEntity.type, ContextEntity.src)
+        .with_for_update()
+    }
+
+
+def _fold_entities(
+    db: Session,
+    existing: dict[tuple[str, str], ContextEntity],
+    items: list[tuple[str, str, str]],
+    *,
+    novel_id: int,
+    chapter_no: int,
+    now: datetime,
+) -> list[tuple[str, str, str]]:
+    """_fold_locks for (type, src, dst) proposals."""
+    rest = []
+    for etype, src, dst in items:
+        row = existing.get((etype, src))
+        if row is None:
+            rest.append((etype, src, dst))
+            continue
+        if row.dst == dst:
+            row.count = int(row.count or 0) + 1
+        else:
+            db.add(
+                ContextConflict(
+                    novel_id=novel_id, entity_id=row.id, dst=dst, chapter_no=chapter_no, at=now
+                )
+            )
+        row.last_seen_chapter = chapter_no
+    return rest
+
+
+def upsert_entities(
+    db: Session,
+    *,
+    novel_id: int,
+    items: list[tuple[str, str, str]],
+    chapter_no: int,
+) -> None:
+    """Same as upsert_locks for (type, src, dst) proposals, keyed by (type, src)."""
+    if not items:
+        return
+    now = datetime.now(UTC)
+
+    existing = _locked_entities(db, novel_id=novel_id, keys={(e, s) for e, s, _ in items})
+    rest = _fold_entities(db, existing, items, novel_id=novel_id, chapter_no=chapter_no, now=now)
+    fresh: dict[tuple[str, str], dict[str, Any]] = {}
+
+    for etype, src, dst in rest:
+        new = fresh.get((etype, src))
+        if new is None:
+            fresh[(etype, src)] = {
+                "novel_id": novel_id,
+                "type": etype,
+                "src": src,
+                "dst": dst,
+                "count": 1,
+                "last_seen_chapter": chapter_no,
+                "conflicts": [],
+            }
+        elif new["dst"] == dst:
+            new["count"] += 1
+        else:
+            new["conflicts"].append(dst)
+
+    db.flush()
+    if not fresh:
+        return
+
+    t = ContextEntity.__table__
+    stmt = pg_insert(ContextEntity).values(
+        [{k: v for k, v in f.items() if k != "conflicts"} for _, f in sorted(fresh.items())]
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_context_entities_novel_type_src",
+        set_={
+            "count": t.c.count + stmt.excluded.count,
+            "last_seen_chapter": stmt.excluded.last_seen_chapter,
+            "updated_at": now,
+        },
+        where=t.c.dst == stmt.excluded.dst,
+    ).returning(t.c.id, t.c.type, t.c.src)
+    ids = {(r.type, r.src): r.id for r in db.execute(stmt)}
+
+    conflicts = [
+        {
+            "novel_id": novel_id,
+            "entity_id": ids[key],
+            "dst": dst,
+            "chapter_no": chapter_no,
+            "at": now,
+        }
+        for key, f in fresh.items()
+        if key in ids
+        for dst in f["conflicts"]
+    ]
+    if conflicts:
+        db.execute(pg_insert(ContextConflict).values(conflicts))
+
+    missed = [item for item in rest if (item[0], item[1]) not in ids]
+    if missed:
+        existing = _locked_entities(db, novel_id=novel_id, keys={(e, s) for e, s, _ in missed})
+        _fold_entities(db, existing, missed, novel_id=novel_id, chapter_no=chapter_no, now=now)
+        db.flush()
+
+
+def lock_document(db: Session, novel_id: int) -> Novel:
+    """
+    Re-reads the novel row FOR UPDATE, so concurrent translations of the same novel
+    serialize their Novel.context_json (style) patches instead of overwriting them.
+    """
+    return (
+        db.query(Novel)
+        .filter(Novel.id == novel_id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+
+
+def prune_context(
+    db: Session,
+    *,
+    novel_id: int,
+    current_chapter_no: int,
+    keep_recent_window: int = 200,
+    min_count_keep: int = 2,
+    max_locks: int = 1000,
+    max_entities: int = 1500,
+) -> None:
+    """
+    SQL version of translation.prune_context_in_db: keep entries that are frequent or
+    recently seen, capped to the top N by (count, last_seen_chapter).
+    """
+    for model, cap in ((ContextLock, max_locks), (ContextEntity, max_entities)):
+        keep = (
+            select(model.id)
+            .where(
+                model.novel_id == novel_id,
+                or_(
+                    model.count >= min_count_keep,
+                    model.last_seen_chapter >= current_chapter_no - keep_recent_window,
+                ),
+            )
+            .order_by(model.count.desc(), model.last_seen_chapter.desc())
+            .limit(cap)
+        )
+        db.execute(
+            delete(model)
+            .where(model.novel_id == novel_id, model.id.not_in(keep))
+            .execution_options(synchronize_session=False)
+        )
+    db.flush()
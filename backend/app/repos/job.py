@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models.translation_job import TranslationJob
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def create_job(
+    db: Session,
+    *,
+    novel_id: int,
+    chapter_id: int | None = None,
+    kind: str = "translate_chapter",
+    params: dict[str, Any] | None = None,
+) -> TranslationJob:
+    job = TranslationJob(
+        kind=kind,
+        novel_id=novel_id,
+        chapter_id=chapter_id,
+        status="queued",
+        progress=0.0,
+        params=params or {},
+        attempts=0,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def get_job(db: Session, job_id: int) -> TranslationJob | None:
+    return db.get(TranslationJob, job_id)
+
+
+def get_active_job_for_chapter(
+    db: Session, *, chapter_id: int, kinds: tuple[str, ...] = ("translate_chapter",)
+) -> TranslationJob | None:
+    return (
+        db.query(TranslationJob)
+        .filter(
+            TranslationJob.chapter_id == chapter_id,
+            TranslationJob.kind.in_(kinds),
+            TranslationJob.status.in_(ACTIVE_STATUSES),
+        )
+        .order_by(TranslationJob.id.desc())
+        .first()
+    )
+
+
+def get_active_job_for_novel(db: Session, *, novel_id: int, kind: str) -> TranslationJob | None:
+    return (
+        db.query(TranslationJob)
+        .filter(
+            TranslationJob.novel_id == novel_id,
+            TranslationJob.kind == kind,
+            TranslationJob.status.in_(ACTIVE_STATUSES),
+        )
+        .order_by(TranslationJob.id.desc())
+        .first()
+    )
+
+
+def list_active_jobs_for_novel(db: Session, novel_id: int) -> list[TranslationJob]:
+    return (
+        db.query(TranslationJob)
+        .filter(
+            TranslationJob.novel_id == novel_id,
+            TranslationJob.status.in_(ACTIVE_STATUSES),
+        )
+        .all()
+    )
+
+
+def cancel_queued_jobs(db: Session, job_ids: list[int]) -> int:
+    """
+    Cancels those of `job_ids` still queued; a worker that already claimed one keeps it
+    (the claim's row lock makes this wait, then skip it). Returns count cancelled.
+    """
+    if not job_ids:
+        return 0
+    cancelled = (
+        db.query(TranslationJob)
+        .filter(TranslationJob.id.in_(job_ids), TranslationJob.status == "queued")
+        .update(
+            {
+                TranslationJob.status: "cancelled",
+                TranslationJob.finished_at: datetime.now(UTC),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.flush()
+    return int(cancelled)
+
+
+def list_jobs_for_novel(
+    db: Session,
+    novel_id: int,
+    *,
+    status: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> list[TranslationJob]:
+    q = db.query(TranslationJob).filter(TranslationJob.novel_id == novel_id)
+    if status:
+        q = q.filter(TranslationJob.status == status)
+    return q.order_by(TranslationJob.id.desc()).offset(offset).limit(limit).all()
+
+
+def claim_next_job(db: Session) -> TranslationJob | None:
+    """
+    Atomically moves the oldest queued job to "running"; read-ahead jobs only when no
+    other job is queued (a chapter someone is waiting for goes first).
+    SKIP LOCKED lets several workers (threads or API processes) poll the same table.
+    """
+    job = (
+        db.query(TranslationJob)
+        .filter(TranslationJob.status == "queued")
+        .order_by(TranslationJob.kind == "read_ahead", TranslationJob.id.asc())
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        return None
+
+    job.status = "running"
+    job.stage = "starting"
+    job.progress = 0.0
+    job.error = None
+    job.attempts = int(job.attempts or 0) + 1
+    job.started_at = datetime.now(UTC)
+    db.flush()
+    return job
+
+
+def set_progress(db: Session, job: TranslationJob, *, stage: str, progress: float) -> TranslationJob:
+    job.stage = stage
+    job.progress = max(0.0, min(1.0, progress))
+    # Also when stage and progress are unchanged: updated_at is the worker's heartbeat
+    job.updated_at = datetime.now(UTC)
+    db.flush()
+    return job
+
+
+def finish_job(
+    db: Session,
+    job: TranslationJob,
+    *,
+    status: str,
+    result: dict[str, Any] | None = None,
+    error: str | None = None,
+) -> TranslationJob:
+    job.status = status
+    job.stage = None
+    if status == "succeeded":
+        job.progress = 1.0
+    # A failed range job keeps its committed checkpoint (last_chapter_no)
+    if result is not None:
+        job.result = result
+    job.error = error
+    job.finished_at = datetime.now(UTC)
+    db.flush()
+    return job
+
+
+def requeue_stale_jobs(db: Session, *, older_than_s: int) -> int:
+    """
+    Puts "running" jobs back in the queue when their worker stopped reporting progress
+    (process crash / redeploy). Returns count requeued.
+    """
+    cutoff = datetime.now(UTC) - timedelta(seconds=older_than_s)
+    requeued = (
+        db.query(TranslationJob)
+        .filter(TranslationJob.status == "running", TranslationJob.updated_at < cutoff)
+        .update(
+            {TranslationJob.status: "queued", TranslationJob.stage: None},
+            synchronize_session=False,
+        )
+    )
+    db.flush()
+    return int(requeued)
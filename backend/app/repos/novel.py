@@ -19,6 +19,11 @@ def get_novel(db: Session, novel_id: int) -> Novel | None:
     return db.get(Novel, novel_id)
 
 
+def novel_exists(db: Session, novel_id: int) -> bool:
+    """Existence check that does not load the row (context_json can be large)."""
+    return db.query(Novel.id).filter(Novel.id == novel_id).first() is not None
+
+
 def get_novel_by_name(db: Session, name: str) -> Novel | None:
     return db.query(Novel).filter(Novel.name == name).first()
 
@@ -44,8 +49,3 @@ def update_novel(
     db.flush()
     return novel
 
-
-def set_context(db: Session, novel: Novel, context_json: dict) -> Novel:
-    novel.context_json = context_json
-    db.flush()
-    return novel
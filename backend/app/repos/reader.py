@@ -19,13 +19,15 @@ def upsert_progress(
     novel_id: int,
     current_chapter_id: int | None,
     position: float,
-) -> ReadingProgress:
+) -> tuple[ReadingProgress, int | None]:
+    """Returns the row and the chapter id it pointed to before (None for a new row)."""
     row = get_progress(db, novel_id)
     if row:
+        previous = row.current_chapter_id
         row.current_chapter_id = current_chapter_id
         row.position = position
         db.flush()
-        return row
+        return row, previous
 
     row = ReadingProgress(
         novel_id=novel_id,
@@ -34,7 +36,7 @@ def upsert_progress(
     )
     db.add(row)
     db.flush()
-    return row
+    return row, None
 
 
 # -------- Bookmarks --------
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.translation_cache import TranslationCacheEntry
+
+
+def get_entry(db: Session, key: str) -> dict[str, Any] | None:
+    """Returns the cached response for `key` and marks it as recently used."""
+    t = TranslationCacheEntry.__table__
+    row = db.execute(
+        update(TranslationCacheEntry)
+        .where(t.c.key == key)
+        .values(hits=t.c.hits + 1, last_used_at=func.now())
+        .returning(t.c.response)
+    ).first()
+    return dict(row.response) if row else None
+
+
+def put_entry(
+    db: Session,
+    *,
+    key: str,
+    model: str,
+    source_lang: str,
+    target_lang: str,
+    response: dict[str, Any],
+    size_bytes: int,
+) -> None:
+    stmt = pg_insert(TranslationCacheEntry).values(
+        key=key,
+        model=model,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        response=response,
+        size_bytes=size_bytes,
+        hits=0,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={
+            "response": stmt.excluded.response,
+            "size_bytes": stmt.excluded.size_bytes,
+            "last_used_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def evict_to_size(db: Session, *, max_bytes: int) -> int:
+    """Deletes least-recently-used entries beyond `max_bytes` in total. Returns rows deleted."""
+    e = TranslationCacheEntry
+    running = (
+        select(
+            e.id,
+            func.sum(e.size_bytes)
+            .over(order_by=(e.last_used_at.desc(), e.id.desc()))
+            .label("running_bytes"),
+        )
+    ).subquery()
+    result = db.execute(
+        delete(e)
+        .where(e.id.in_(select(running.c.id).where(running.c.running_bytes > max_bytes)))
+        .execution_options(synchronize_session=False)
+    )
+    return int(result.rowcount or 0)
+
+
+def cache_totals(db: Session) -> tuple[int, int]:
+    """(entries, bytes) currently stored."""
+    e = TranslationCacheEntry
+    row = db.execute(select(func.count(e.id), func.coalesce(func.sum(e.size_bytes), 0))).one()
+    return int(row[0]), int(row[1])
+
+
+def clear(db: Session) -> int:
+    result = db.execute(
+        delete(TranslationCacheEntry).execution_options(synchronize_session=False)
+    )
+    return int(result.rowcount or 0)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.translation_memory import TranslationMemoryEntry
+
+
+def lookup(db: Session, *, novel_id: int, keys: Iterable[str]) -> dict[str, tuple[str, str]]:
+    """key -> (source, target) for the stored entries among `keys`, in one query."""
+    keys = list(set(keys))
+    if not keys:
+        return {}
+    e = TranslationMemoryEntry
+    rows = db.execute(
+        select(e.key, e.source, e.target).where(e.novel_id == novel_id, e.key.in_(keys))
+    )
+    return {r.key: (r.source, r.target) for r in rows}
+
+
+def upsert(
+    db: Session,
+    *,
+    novel_id: int,
+    chapter_no: int,
+    entries: dict[str, tuple[str, str]],
+) -> None:
+    """
+    Stores key -> (source, target) in one statement. An existing key takes the latest
+    source and translation and counts one more sighting (seen + 1).
+    """
+    if not entries:
+        return
+    t = TranslationMemoryEntry.__table__
+    stmt = pg_insert(TranslationMemoryEntry).values(
+        [
+            {
+                "novel_id": novel_id,
+                "key": key,
+                "source": source,
+                "target": target,
+                "seen": 1,
+                "last_chapter_no": chapter_no,
+            }
+            for key, (source, target) in entries.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_translation_memory_novel_key",
+        set_={
+            "source": stmt.excluded.source,
+            "target": stmt.excluded.target,
+            "seen": t.c.seen + 1,
+            "last_chapter_no": func.greatest(t.c.last_chapter_no, stmt.excluded.last_chapter_no),
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def memory_totals(db: Session, novel_id: int) -> dict[str, int]:
+    e = TranslationMemoryEntry
+    row = db.execute(
+        select(
+            func.count(e.id),
+            func.coalesce(func.sum(e.seen), 0),
+            func.coalesce(func.sum(func.length(e.source) + func.length(e.target)), 0),
+        ).where(e.novel_id == novel_id)
+    ).one()
+    return {"entries": int(row[0]), "paragraphs_stored": int(row[1]), "chars": int(row[2])}
+
+
+def clear(db: Session, novel_id: int) -> int:
+    result = db.execute(
+        delete(TranslationMemoryEntry)
+        .where(TranslationMemoryEntry.novel_id == novel_id)
+        .execution_options(synchronize_session=False)
+    )
+    return int(result.rowcount or 0)
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import case, func, literal, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.translation_usage import ChapterUsage, TranslationUsage, TranslationUsageHourly
+
+# Summed per hour / per chapter on every recorded attempt
+HOURLY_SUMS = (
+    "attempts",
+    "cache_hits",
+    "applied",
+    "calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "cached_tokens",
+    "latency_ms",
+    "timed",
+    "slice_tokens",
+    "context_tokens",
+    "sliced",
+)
+_CHAPTER_SUMS = ("attempts", "prompt_tokens", "completion_tokens", "cached_tokens")
+
+BUCKETS = ("hour", "day")
+
+# chapter_usage.chapter_tokens bands: (label, lower bound inclusive)
+SIZE_BANDS = (
+    ("<1k", 0),
+    ("1k-2k", 1_000),
+    ("2k-4k", 2_000),
+    ("4k-8k", 4_000),
+    ("8k-16k", 8_000),
+    ("16k+", 16_000),
+)
+
+
+def record_usage(db: Session, *, values: dict[str, Any]) -> int:
+    """
+    Inserts one translation_usage row and adds it to its translation_usage_hourly and
+    chapter_usage rows, in a single statement (data-modifying CTEs), so recording costs
+    one round trip whatever the rollups. Returns the row's id.
+    """
+    u = TranslationUsage.__table__
+    # clock_timestamp(): the time of this row, not of its transaction's start (a range
+    # job's transaction spans many chapters and hours)
+    attempt = (
+        pg_insert(TranslationUsage)
+        .values(**values, created_at=func.clock_timestamp())
+        .returning(*u.c)
+        .cte("attempt")
+    )
+
+    h = TranslationUsageHourly.__table__
+    hourly = pg_insert(TranslationUsageHourly).from_select(
+        ["novel_id", "hour", "model", "source", *HOURLY_SUMS],
+        select(
+            attempt.c.novel_id,
+            func.date_trunc("hour", attempt.c.created_at),
+            attempt.c.model,
+            attempt.c.source,
+            literal(1),
+            case((attempt.c.cache_hit, 1), else_=0),
+            case((attempt.c.applied, 1), else_=0),
+            attempt.c.calls,
+            attempt.c.prompt_tokens,
+            attempt.c.completion_tokens,
+            attempt.c.cached_tokens,
+            func.coalesce(attempt.c.latency_ms, 0),
+            case((attempt.c.latency_ms.isnot(None), 1), else_=0),
+            func.coalesce(attempt.c.slice_tokens, 0),
+            func.coalesce(attempt.c.context_tokens, 0),
+            case((attempt.c.slice_tokens.isnot(None), 1), else_=0),
+        ),
+    )
+    hourly = hourly.on_conflict_do_update(
+        index_elements=["novel_id", "hour", "model", "source"],
+        set_={k: h.c[k] + hourly.excluded[k] for k in HOURLY_SUMS},
+    )
+    stmt = select(attempt.c.id).add_cte(hourly.cte("hourly"))
+    if values.get("chapter_id") is not None:
+        c = ChapterUsage.__table__
+        chapter = pg_insert(ChapterUsage).from_select(
+            ["chapter_id", "novel_id", "chapter_no", *_CHAPTER_SUMS, "chapter_tokens", "last_at"],
+            select(
+                attempt.c.chapter_id,
+                attempt.c.novel_id,
+                attempt.c.chapter_no,
+                literal(1),
+                attempt.c.prompt_tokens,
+                attempt.c.completion_tokens,
+                attempt.c.cached_tokens,
+                attempt.c.chapter_tokens,
+                attempt.c.created_at,
+            ),
+        )
+        chapter = chapter.on_conflict_do_update(
+            index_elements=["chapter_id"],
+            set_={
+                **{k: c.c[k] + chapter.excluded[k] for k in _CHAPTER_SUMS},
+                "chapter_no": chapter.excluded.chapter_no,
+                "chapter_tokens": func.coalesce(
+                    chapter.excluded.chapter_tokens, c.c.chapter_tokens
+                ),
+                "last_at": chapter.excluded.last_at,
+            },
+        )
+        stmt = stmt.add_cte(chapter.cte("chapter"))
+    return int(db.execute(stmt).scalar_one())
+
+
+def mark_applied(db: Session, *, usage_ids: list[int]) -> None:
+    """Flags recorded attempts as stored on their chapters, in their hourly rollups too."""
+    u = TranslationUsage.__table__
+    rows = (
+        update(TranslationUsage)
+        .where(u.c.id.in_(usage_ids), u.c.applied.is_(False))
+        .values(applied=True)
+        .returning(
+            u.c.novel_id,
+            func.date_trunc("hour", u.c.created_at).label("hour"),
+            u.c.model,
+            u.c.source,
+        )
+        .cte("applied_rows")
+    )
+    keys = (rows.c.novel_id, rows.c.hour, rows.c.model, rows.c.source)
+    counts = select(*keys, func.count().label("n")).group_by(*keys).subquery("counts")
+    h = TranslationUsageHourly.__table__
+    db.execute(
+        update(TranslationUsageHourly)
+        .where(
+            h.c.novel_id == counts.c.novel_id,
+            h.c.hour == counts.c.hour,
+            h.c.model == counts.c.model,
+            h.c.source == counts.c.source,
+        )
+        .values(applied=h.c.applied + counts.c.n)
+        .add_cte(rows)
+    )
+
+
+def _window(stmt: Any, *, novel_id: int | None, since: datetime | None, until: datetime | None):
+    h = TranslationUsageHourly
+    if novel_id is not None:
+        stmt = stmt.where(h.novel_id == novel_id)
+    if since is not None:
+        stmt = stmt.where(h.hour >= func.date_trunc("hour", since))
+    if until is not None:
+        stmt = stmt.where(h.hour < until)
+    return stmt
+
+
+def _sums() -> list[Any]:
+    h = TranslationUsageHourly
+    return [func.sum(getattr(h, k)).label(k) for k in HOURLY_SUMS]
+
+
+def usage_by_model(
+    db: Session,
+    *,
+    novel_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Hourly rollup sums per (model, source) for the window (hours starting in it)."""
+    h = TranslationUsageHourly
+    stmt = select(h.model, h.source, *_sums()).group_by(h.model, h.source)
+    stmt = _window(stmt, novel_id=novel_id, since=since, until=until)
+    return [dict(r._mapping) for r in db.execute(stmt.order_by(h.model, h.source))]
+
+
+def usage_buckets(
+    db: Session,
+    *,
+    bucket: str,
+    novel_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Sums per (`bucket` = "hour" | "day" start, model, source), oldest first."""
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    h = TranslationUsageHourly
+    start = func.date_trunc(literal_column(f"'{bucket}'"), h.hour).label("start")
+    stmt = select(start, h.model, h.source, *_sums()).group_by(start, h.model, h.source)
+    stmt = _window(stmt, novel_id=novel_id, since=since, until=until)
+    return [dict(r._mapping) for r in db.execute(stmt.order_by(start, h.model, h.source))]
+
+
+def top_novels(
+    db: Session,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 10,
+) -> list[dict[str, Any]]:
+    """Sums per (novel_id, model, source) of the `limit` novels with the most tokens."""
+    h = TranslationUsageHourly
+    top = _window(
+        select(h.novel_id)
+        .group_by(h.novel_id)
+        .order_by(func.sum(h.prompt_tokens + h.completion_tokens).desc(), h.novel_id)
+        .limit(limit),
+        novel_id=None,
+        since=since,
+        until=until,
+    ).cte("top")
+    stmt = (
+        select(h.novel_id, h.model, h.source, *_sums())
+        .where(h.novel_id.in_(select(top.c.novel_id)))
+        .group_by(h.novel_id, h.model, h.source)
+    )
+    stmt = _window(stmt, novel_id=None, since=since, until=until)
+    return [dict(r._mapping) for r in db.execute(stmt)]
+
+
+def chapter_usage(db: Session, *, novel_id: int, limit: int = 50) -> list[ChapterUsage]:
+    """The novel's chapters with the most tokens over all their attempts."""
+    c = ChapterUsage
+    return (
+        db.query(c)
+        .filter(c.novel_id == novel_id)
+        .order_by((c.prompt_tokens + c.completion_tokens).desc(), c.chapter_no.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def usage_by_size(db: Session, *, novel_id: int) -> list[dict[str, Any]]:
+    """chapter_usage sums per chapter size band (SIZE_BANDS), smallest first."""
+    c = ChapterUsage
+    band = case(
+        *[(c.chapter_tokens >= lower, label) for label, lower in reversed(SIZE_BANDS[1:])],
+        else_=SIZE_BANDS[0][0],
+    ).label("band")
+    stmt = (
+        select(
+            band,
+            func.count().label("chapters"),
+            *[func.sum(getattr(c, k)).label(k) for k in _CHAPTER_SUMS],
+            func.sum(c.chapter_tokens).label("chapter_tokens"),
+        )
+        .where(c.novel_id == novel_id, c.chapter_tokens.isnot(None))
+        # By output name: the band labels are bound parameters
+        .group_by(literal_column("band"))
+    )
+    rows = {r.band: dict(r._mapping) for r in db.execute(stmt)}
+    return [rows[label] for label, _ in SIZE_BANDS if label in rows]
@@ -2,3 +2,20 @@ from .novel import NovelCreate, NovelUpdate, NovelContextUpdate, NovelOut
 from .chapter import ChapterCreate, ChapterUpdate, ChapterOut, ChapterListItem
 from .reader import ReadingProgressUpsert, ReadingProgressOut
 from .bookmark import BookmarkCreate, BookmarkOut
+from .job import TranslationJobOut
+
+__all__ = [
+    "NovelCreate",
+    "NovelUpdate",
+    "NovelContextUpdate",
+    "NovelOut",
+    "ChapterCreate",
+    "ChapterUpdate",
+    "ChapterOut",
+    "ChapterListItem",
+    "ReadingProgressUpsert",
+    "ReadingProgressOut",
+    "BookmarkCreate",
+    "BookmarkOut",
+    "TranslationJobOut",
+]
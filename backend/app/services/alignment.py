@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import difflib
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.services.chunking import Segment, split_paragraphs
+
+ALIGNMENT_VERSION = 1
+
+
+def paragraph_hash(paragraph: str) -> str:
+    return hashlib.sha1(paragraph.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def _unit(paragraphs: list[Segment], translation: str) -> dict[str, Any]:
+    return {"h": [paragraph_hash(p.text) for p in paragraphs], "t": translation.strip()}
+
+
+def _body(paragraphs: list[Segment]) -> tuple[int, int]:
+    """
+    [start, end) of the paragraphs between the empty ones at the edges of a text (a
+    leading or trailing newline); paragraph breaks swallow any blank lines inside it.
+    """
+    start, end = 0, len(paragraphs)
+    while start < end and not paragraphs[start].text.strip():
+        start += 1
+    while end > start and not paragraphs[end - 1].text.strip():
+        end -= 1
+    return start, end
+
+
+def build_alignment(
+    raw: str,
+    translation: str,
+    units: list[tuple[str, str]] | None = None,
+) -> dict[str, Any]:
+    """
+    Maps raw paragraphs to translated text as a list of units
+    {"h": [raw paragraph hashes], "t": translated text}, as fine-grained as possible:
+      - one unit per paragraph when the translation has the same number of paragraphs,
+      - else one unit per (raw, translation) pair in `units` (e.g. translated segments),
+      - else a single unit for the whole chapter.
+    Empty paragraphs at the edges of `raw` are left out of the comparison and get
+    units of their own, with no translation.
+    """
+    raw_paragraphs = split_paragraphs(raw)
+    start, end = _body(raw_paragraphs)
+    if start == end:
+        return {"version": ALIGNMENT_VERSION, "units": [_unit(raw_paragraphs, translation)]}
+    body = raw_paragraphs[start:end]
+    lead = [_unit([p], "") for p in raw_paragraphs[:start]]
+    trail = [_unit([p], "") for p in raw_paragraphs[end:]]
+
+    translated = split_paragraphs(translation.strip())
+    if len(body) == len(translated):
+        paired = [_unit([p], t.text) for p, t in zip(body, translated)]
+        return {"version": ALIGNMENT_VERSION, "units": lead + paired + trail}
+
+    if units:
+        out: list[dict[str, Any]] = []
+        for unit_raw, unit_translation in units:
+            unit_paragraphs = split_paragraphs(unit_raw)
+            first, last = _body(unit_paragraphs)
+            unit_paragraphs = unit_paragraphs[first:last]
+            if not unit_paragraphs:
+                continue
+            sub = split_paragraphs(unit_translation.strip())
+            if len(unit_paragraphs) == len(sub):
+                out.extend(_unit([p], t.text) for p, t in zip(unit_paragraphs, sub))
+            else:
+                out.append(_unit(unit_paragraphs, unit_translation))
+        if sum(len(u["h"]) for u in out) == len(body):
+            return {"version": ALIGNMENT_VERSION, "units": lead + out + trail}
+
+    return {"version": ALIGNMENT_VERSION, "units": [*lead, _unit(body, translation), *trail]}
+
+
+@dataclass
+class Hunk:
+    """A run of new paragraphs [start, end) to translate, with neighbours for reference."""
+
+    start: int
+    end: int
+    text: str
+    before: list[dict[str, str]] = field(default_factory=list)
+    after: list[dict[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class IncrementalPlan:
+    paragraphs: list[Segment]
+    # In new paragraph order: ("keep", start, end, unit) or ("hunk", start, end, Hunk)
+    items: list[tuple[str, int, int, Any]]
+    hunks: list[Hunk]
+
+    @property
+    def changed_paragraphs(self) -> int:
+        return sum(h.end - h.start for h in self.hunks)
+
+
+def plan_incremental(
+    alignment: dict[str, Any] | None,
+    raw: str,
+    *,
+    context_paragraphs: int = 1,
+) -> IncrementalPlan | None:
+    """
+    Diffs the new `raw` against the paragraph hashes in `alignment`. Old units whose
+    paragraphs all survive unchanged (and in order) are kept; the remaining new
+    paragraphs are grouped into hunks to translate. Returns None without a usable
+    alignment.
+    """
+    if not alignment or alignment.get("version") != ALIGNMENT_VERSION:
+        return None
+    units = alignment.get("units") or []
+    if not units:
+        return None
+
+    paragraphs = split_paragraphs(raw)
+    new_hashes = [paragraph_hash(p.text) for p in paragraphs]
+    old_hashes: list[str] = []
+    unit_start: list[int] = []
+    for u in units:
+        unit_start.append(len(old_hashes))
+        old_hashes.extend(u["h"])
+
+    # old index -> new index for paragraphs inside unchanged blocks
+    old_to_new: dict[int, int] = {}
+    matcher = difflib.SequenceMatcher(a=old_hashes, b=new_hashes, autojunk=False)
+    for tag, i1, i2, j1, _ in matcher.get_opcodes():
+        if tag == "equal":
+            for k in range(i2 - i1):
+                old_to_new[i1 + k] = j1 + k
+
+    kept: dict[int, tuple[int, dict[str, Any]]] = {}  # new start -> (new end, unit)
+    for u, start in zip(units, unit_start):
+        n = len(u["h"])
+        if n == 0 or start not in old_to_new:
+            continue
+        new_start = old_to_new[start]
+        if all(old_to_new.get(start + k) == new_start + k for k in range(n)):
+            kept[new_start] = (new_start + n, u)
+
+    return plan_from_kept(paragraphs, kept, context_paragraphs=context_paragraphs)
+
+
+def plan_from_kept(
+    paragraphs: list[Segment],
+    kept: dict[int, tuple[int, dict[str, Any]]],
+    *,
+    context_paragraphs: int = 1,
+) -> IncrementalPlan:
+    """
+    Plan that keeps the given translations (new start -> (new end, unit)) and groups
+    every other paragraph into hunks to translate, each with its kept neighbours.
+    Empty paragraphs at the edges (see build_alignment) are kept with no translation
+    rather than sent.
+    """
+    start, end = _body(paragraphs)
+    edges = [*range(start), *range(end, len(paragraphs))]
+    kept = {i: (i + 1, _unit([paragraphs[i]], "")) for i in edges} | kept
+    items: list[tuple[str, int, int, Any]] = []
+    hunks: list[Hunk] = []
+    i = 0
+    while i < len(paragraphs):
+        if i in kept:
+            end, unit = kept[i]
+            items.append(("keep", i, end, unit))
+            i = end
+            continue
+        j = i + 1
+        while j < len(paragraphs) and j not in kept:
+            j += 1
+        hunk = Hunk(start=i, end=j, text=_join(paragraphs[i:j]))
+        hunks.append(hunk)
+        items.append(("hunk", i, j, hunk))
+        i = j
+
+    # Neighbouring kept paragraphs (raw + existing translation) give the model context
+    for idx, (kind, _, _, hunk) in enumerate(items):
+        if kind != "hunk":
+            continue
+        if idx > 0 and items[idx - 1][0] == "keep":
+            _, s, e, unit = items[idx - 1]
+            hunk.before = _neighbour(paragraphs[s:e], unit, context_paragraphs, tail=True)
+        if idx + 1 < len(items) and items[idx + 1][0] == "keep":
+            _, s, e, unit = items[idx + 1]
+            hunk.after = _neighbour(paragraphs[s:e], unit, context_paragraphs, tail=False)
+
+    return IncrementalPlan(paragraphs=paragraphs, items=items, hunks=hunks)
+
+
+def _join(paragraphs: list[Segment]) -> str:
+    """Paragraphs joined with their separators, without the trailing one."""
+    if not paragraphs:
+        return ""
+    return "".join(p.text + p.separator for p in paragraphs[:-1]) + paragraphs[-1].text
+
+
+def _neighbour(
+    paragraphs: list[Segment], unit: dict[str, Any], n: int, *, tail: bool
+) -> list[dict[str, str]]:
+    if n <= 0 or not unit["t"].strip():
+        return []
+    # Paragraph-level units give exact pairs; a coarser unit is passed whole.
+    picked = paragraphs[-n:] if tail else paragraphs[:n]
+    if len(unit["h"]) == 1 or len(picked) == len(paragraphs):
+        return [{"raw": _join(paragraphs), "translation": unit["t"]}]
+    return [{"raw": _join(picked), "translation": ""}]
+
+
+def splice(
+    plan: IncrementalPlan, hunk_translations: list[str]
+) -> tuple[str, dict[str, Any]]:
+    """
+    Builds the new content and alignment from kept units and translated hunks (in
+    plan.hunks order). Paragraph breaks between items come from the new raw text.
+    """
+    translated = iter(hunk_translations)
+    pieces: list[str] = []
+    units: list[dict[str, Any]] = []
+    for kind, start, end, obj in plan.items:
+        paragraphs = plan.paragraphs[start:end]
+        if kind == "keep":
+            text = obj["t"]
+            units.append(obj)
+        else:
+            text = next(translated).strip()
+            if not obj.text.strip():
+                text = ""
+            sub = split_paragraphs(text)
+            if len(sub) == len(paragraphs):
+                units.extend(_unit([p], t.text) for p, t in zip(paragraphs, sub))
+            else:
+                units.append(_unit(paragraphs, text))
+        pieces.append(text + paragraphs[-1].separator)
+
+    return "".join(pieces), {"version": ALIGNMENT_VERSION, "units": units}
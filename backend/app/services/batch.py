@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import IO, Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker, undefer_group
+
+from app.core.metrics import observe_usage
+from app.db.session import SessionLocal
+from app.models.chapter import BODY, Chapter
+from app.models.novel import Novel
+from app.repos import context as context_repo
+from app.services.export import EXPORT_BATCH_SIZE, EXPORT_CHUNK_BYTES, _buffered, _dumps
+from app.services.ingest import IngestError
+from app.services.term_matcher import matcher_for_context
+from app.services.translation import (
+    _normalize_context,
+    apply_translation_result,
+    build_context_slice,
+    chat_request,
+    resolve_token_budget,
+    validate_translation_result,
+)
+from app.services.usage import record_attempt
+
+# Offline batch translation in the OpenAI Batch API's JSONL format: the export has one
+# {"custom_id", "method", "url", "body"} line per pending chapter, where body is exactly
+# the request translate_text_with_context sends; the results file has one
+# {"custom_id", "response": {"status_code", "body"}, "error"} line per request, in any
+# order. All context slices are built from the context as it is at export time (a
+# chapter cannot see the updates of the chapters before it in the same batch); the
+# import then merges every chapter's context_updates in chapter_no order.
+
+BATCH_URL = "/v1/chat/completions"
+
+# chapter-<chapter_no>-<chapter id>-<raw digest>: the digest detects raw edited since export
+_CUSTOM_ID = re.compile(r"^chapter-(\d+)-(\d+)-([0-9a-f]{16})$")
+
+# Failed requests listed by custom_id in the import result
+MAX_REPORTED_FAILURES = 50
+
+
+def raw_digest(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def custom_id(chapter: Any) -> str:
+    return f"chapter-{chapter.chapter_no}-{chapter.id}-{raw_digest(chapter.raw)}"
+
+
+def iter_pending_raw(
+    db: Session,
+    novel_id: int,
+    *,
+    start_no: int | None = None,
+    end_no: int | None = None,
+    retranslate: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Any]:
+    """(id, chapter_no, raw) of chapters to translate, in chapter_no order, streamed."""
+    stmt = (
+        select(Chapter.id, Chapter.chapter_no, Chapter.raw)
+        .where(Chapter.novel_id == novel_id, Chapter.raw.isnot(None), Chapter.raw != "")
+        .order_by(Chapter.chapter_no.asc())
+        .execution_options(yield_per=batch_size)
+    )
+    if start_no is not None:
+        stmt = stmt.where(Chapter.chapter_no >= start_no)
+    if end_no is not None:
+        stmt = stmt.where(Chapter.chapter_no <= end_no)
+    if not retranslate:
+        stmt = stmt.where(Chapter.status != "translated")
+    yield from db.execute(stmt)
+
+
+def _request_lines(
+    db: Session,
+    novel_id: int,
+    *,
+    start_no: int | None,
+    end_no: int | None,
+    retranslate: bool,
+) -> Iterator[str]:
+    novel = db.get(Novel, novel_id)
+    if novel is None:
+        return
+    ctx = _normalize_context(context_repo.load_context(db, novel))
+    matcher = matcher_for_context(novel_id, ctx)
+    token_budget = resolve_token_budget()
+    rows = iter_pending_raw(
+        db, novel_id, start_no=start_no, end_no=end_no, retranslate=retranslate
+    )
+    for row in rows:
+        context_slice = build_context_slice(
+            ctx,
+            chapter_no=int(row.chapter_no),
+            raw_text=row.raw,
+            matcher=matcher,
+            token_budget=token_budget,
+        )
+        body = chat_request(
+            novel_id=novel_id,
+            source_lang=novel.source_lang,
+            target_lang=novel.target_lang,
+            text=row.raw,
+            context=context_slice,
+        )
+        line = {"custom_id": custom_id(row), "method": "POST", "url": BATCH_URL, "body": body}
+        yield _dumps(line) + "\n"
+
+
+def stream_batch_requests(
+    novel_id: int,
+    *,
+    start_no: int | None = None,
+    end_no: int | None = None,
+    retranslate: bool = False,
+    session_factory: sessionmaker = SessionLocal,
+    chunk_bytes: int = EXPORT_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """
+    Encoded batch input file for the novel's untranslated chapters (all chapters with
+    raw text when `retranslate`), optionally limited to a chapter_no range. Runs in its
+    own session like stream_export.
+    """
+    with session_factory() as db:
+        lines = _request_lines(
+            db, novel_id, start_no=start_no, end_no=end_no, retranslate=retranslate
+        )
+        yield from _buffered(lines, chunk_bytes)
+
+
+def _result_content(line_no: int, obj: dict[str, Any]) -> tuple[str, dict[str, Any], str | None]:
+    """(message content, usage, model) of a successful result line; ValueError otherwise."""
+    if obj.get("error"):
+        error = obj["error"]
+        message = error.get("message") if isinstance(error, dict) else error
+        raise ValueError(str(message or "request failed"))
+    response = obj.get("response")
+    if not isinstance(response, dict):
+        raise IngestError(f"Line {line_no}: missing response")
+    if response.get("status_code") != 200:
+        raise ValueError(f"status {response.get('status_code')}")
+    body = response.get("body")
+    if not isinstance(body, dict):
+        raise IngestError(f"Line {line_no}: response body is not an object")
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError) as e:
+        raise IngestError(f"Line {line_no}: response body has no message content") from e
+    if not isinstance(content, str):
+        raise ValueError("message content is not a string")
+    usage = body.get("usage")
+    usage = usage if isinstance(usage, dict) else {}
+    details = usage.get("prompt_tokens_details")
+    details = details if isinstance(details, dict) else {}
+    return content, {
+        "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+        "completion_tokens": int(usage.get("completion_tokens") or 0),
+        "cached_tokens": int(details.get("cached_tokens") or 0),
+    }, body.get("model")
+
+
+@dataclass
+class _Pending:
+    chapter_no: int
+    chapter_id: int
+    digest: str
+    offset: int
+    size: int
+    usage: dict[str, int]
+    model: str | None
+
+
+@dataclass
+class BatchImport:
+    """
+    Applies a batch results file. `add()` validates each line and spools the model's
+    JSON to a temporary file, so only a small index is kept in memory; `finish()` applies
+    the results in chapter_no order, committing every `batch_size` chapters. Use it as a
+    context manager so the spool is closed also when `add()` rejects the file.
+
+    Resumable: a chapter whose content already equals its result is skipped, so an
+    import interrupted midway can simply be run again with the same file. Results for
+    chapters whose raw text changed since the export (or that are gone) are skipped as
+    stale; failed requests are counted and listed by custom_id.
+    """
+
+    db: Session
+    novel_id: int
+    batch_size: int = 50
+
+    received: int = 0
+    applied: int = 0
+    unchanged: int = 0
+    stale: int = 0
+    failed: int = 0
+    failures: list[dict[str, str]] = field(default_factory=list)
+    usage: dict[str, int] = field(
+        default_factory=lambda: {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    )
+    _index: dict[int, _Pending] = field(default_factory=dict)
+    _spool: IO[bytes] = field(default_factory=lambda: tempfile.TemporaryFile())
+
+    def __post_init__(self) -> None:
+        self.batch_size = max(1, self.batch_size)
+
+    def __enter__(self) -> BatchImport:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._spool.close()
+
+    def _fail(self, cid: str, error: str) -> None:
+        self.failed += 1
+        if len(self.failures) < MAX_REPORTED_FAILURES:
+            self.failures.append({"custom_id": cid, "error": error})
+
+    def add(self, line_no: int, obj: dict[str, Any]) -> None:
+        cid = obj.get("custom_id")
+        m = _CUSTOM_ID.match(cid) if isinstance(cid, str) else None
+        if m is None:
+            raise IngestError(f"Line {line_no}: custom_id is not from a batch export")
+        self.received += 1
+        try:
+            content, usage, model = _result_content(line_no, obj)
+            data = json.loads(content)
+            if not isinstance(data, dict):
+                raise ValueError("Model returned non-object JSON")
+            validate_translation_result(data)
+        except IngestError:
+            raise
+        except ValueError as e:
+            self._fail(m.group(0), str(e))
+            return
+        for key, value in usage.items():
+            self.usage[key] += value
+
+        encoded = content.encode("utf-8")
+        offset = self._spool.seek(0, 2)
+        self._spool.write(encoded)
+        # A repeated custom_id (results merged from several runs): the later line wins
+        chapter_id = int(m.group(2))
+        self._index[chapter_id] = _Pending(
+            chapter_no=int(m.group(1)),
+            chapter_id=chapter_id,
+            digest=m.group(3),
+            offset=offset,
+            size=len(encoded),
+            usage=usage,
+            model=model if isinstance(model, str) else None,
+        )
+
+    def _read(self, item: _Pending) -> dict[str, Any]:
+        self._spool.seek(item.offset)
+        return json.loads(self._spool.read(item.size))
+
+    def finish(self) -> dict[str, Any]:
+        observe_usage(self.usage)
+        last_no: int | None = None
+        pending = 0
+        try:
+            for item in sorted(self._index.values(), key=lambda p: p.chapter_no):
+                ch = self.db.get(Chapter, item.chapter_id, options=[undefer_group(BODY)])
+                if ch is None or ch.novel_id != self.novel_id or not ch.raw:
+                    self.stale += 1
+                    continue
+                if raw_digest(ch.raw) != item.digest:
+                    self.stale += 1
+                    continue
+                result = self._read(item)
+                if ch.status == "translated" and ch.content == result["translation"]:
+                    self.unchanged += 1
+                    continue
+
+                apply_translation_result(
+                    self.db, novel_id=self.novel_id, chapter=ch, result=result, prune=False
+                )
+                # Only applied results: an unchanged one was recorded when first applied
+                record_attempt(
+                    self.db,
+                    novel_id=self.novel_id,
+                    chapter_id=ch.id,
+                    chapter_no=int(ch.chapter_no),
+                    source="batch",
+                    usage=item.usage,
+                    model=item.model,
+                )
+                self.applied += 1
+                last_no = int(ch.chapter_no)
+                pending += 1
+                if pending >= self.batch_size:
+                    self._commit(last_no)
+                    pending = 0
+            if pending:
+                self._commit(last_no)
+        finally:
+            self.close()
+        return {
+            "received": self.received,
+            "applied": self.applied,
+            "unchanged": self.unchanged,
+            "stale": self.stale,
+            "failed": self.failed,
+            "failures": self.failures,
+            **self.usage,
+        }
+
+    def _commit(self, last_no: int | None) -> None:
+        if last_no is not None:
+            context_repo.prune_context(self.db, novel_id=self.novel_id, current_chapter_no=last_no)
+        self.db.commit()
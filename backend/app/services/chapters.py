@@ -1,32 +1,163 @@
 from __future__ import annotations
 
+import base64
+import json
+from typing import Any
+
+from sqlalchemy import and_, case, delete, func, or_, select, update
 from sqlalchemy.orm import Session
 
 from app.models.chapter import Chapter
 from app.repos import chapter as chapter_repo
 
 
-def rebuild_links_from_chapter_no(db: Session, novel_id: int) -> list[Chapter]:
+def encode_cursor(novel_id: int, chapter_no: int) -> str:
+    raw = json.dumps({"n": novel_id, "c": chapter_no}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *, novel_id: int) -> int:
+    """chapter_no the cursor points after. Raises ValueError for a foreign or bad cursor."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        n, chapter_no = int(data["n"]), int(data["c"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    if n != novel_id:
+        raise ValueError("Cursor belongs to a different novel")
+    return chapter_no
+
+
+def chapter_page(
+    db: Session,
+    *,
+    novel_id: int,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0,
+    with_body: bool = False,
+    only_translated: bool = False,
+) -> tuple[list[Chapter], str | None]:
+    """
+    One page of chapters in chapter_no order plus the cursor for the next page (None
+    on the last page). Pages are keyset-based; `offset` is honoured only without a
+    cursor, for old clients, and skips rows the slow way.
+    """
+    after_no = decode_cursor(cursor, novel_id=novel_id) if cursor else None
+    if after_no is None and offset > 0:
+        skipped = (
+            select(Chapter.chapter_no)
+            .where(Chapter.novel_id == novel_id)
+            .order_by(Chapter.chapter_no.asc())
+            .offset(offset - 1)
+            .limit(1)
+        )
+        if only_translated:
+            skipped = skipped.where(Chapter.content.isnot(None), Chapter.content != "")
+        after_no = db.scalar(skipped)
+        if after_no is None:
+            return [], None
+
+    # One extra row tells whether there is a next page
+    rows = chapter_repo.list_chapters_after(
+        db,
+        novel_id,
+        after_no=after_no,
+        limit=limit + 1,
+        with_body=with_body,
+        only_translated=only_translated,
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(novel_id, rows[-1].chapter_no)
+
+
+def rebuild_links_from_chapter_no(
+    db: Session,
+    novel_id: int,
+    *,
+    start_no: int | None = None,
+    end_no: int | None = None,
+) -> int:
     """
-    Rebuilds prev/next pointers for all chapters of a novel using chapter_no ordering.
+    Rebuilds prev/next pointers from chapter_no ordering, for the whole novel or only
+    for chapter_no in [start_no, end_no] (stitched to the chapters just outside).
     This is your "fix everything" button if links ever get corrupted.
+    Returns the number of chapters whose pointers changed.
     """
-    chapters = chapter_repo.list_chapters(db, novel_id=novel_id, limit=10_000, offset=0)
+    return relink_chapter_range(db, novel_id=novel_id, start_no=start_no, end_no=end_no)
 
-    # Clear pointers first
-    for ch in chapters:
-        ch.prev_chapter_id = None
-        ch.next_chapter_id = None
 
-    # Re-link by order
-    for i, ch in enumerate(chapters):
-        prev_ch = chapters[i - 1] if i > 0 else None
-        next_ch = chapters[i + 1] if i < len(chapters) - 1 else None
-        ch.prev_chapter_id = prev_ch.id if prev_ch else None
-        ch.next_chapter_id = next_ch.id if next_ch else None
+def relink_chapter_range(
+    db: Session,
+    *,
+    novel_id: int,
+    start_no: int | None = None,
+    end_no: int | None = None,
+) -> int:
+    """
+    Recomputes prev/next pointers for chapters with chapter_no in [start_no, end_no]
+    (either bound may be None for open-ended) in one UPDATE with LAG/LEAD over
+    chapter_no; no ORM rows or text columns are loaded. The nearest chapters just
+    outside the range are included so the range is stitched into the rest of the list:
+    the one before only gets its next pointer fixed, the one after only its prev
+    pointer. Only rows whose pointers actually change are written. Returns that count.
+    """
+    if start_no is not None and end_no is not None and start_no > end_no:
+        start_no, end_no = end_no, start_no
+
+    bounds = [Chapter.novel_id == novel_id]
+    if start_no is not None:
+        before = (
+            select(func.max(Chapter.chapter_no))
+            .where(Chapter.novel_id == novel_id, Chapter.chapter_no < start_no)
+            .correlate(None)
+            .scalar_subquery()
+        )
+        bounds.append(Chapter.chapter_no >= func.coalesce(before, start_no))
+    if end_no is not None:
+        after = (
+            select(func.min(Chapter.chapter_no))
+            .where(Chapter.novel_id == novel_id, Chapter.chapter_no > end_no)
+            .correlate(None)
+            .scalar_subquery()
+        )
+        bounds.append(Chapter.chapter_no <= func.coalesce(after, end_no))
+    w = (
+        select(
+            Chapter.id,
+            Chapter.chapter_no,
+            func.lag(Chapter.id).over(order_by=Chapter.chapter_no).label("prev_id"),
+            func.lead(Chapter.id).over(order_by=Chapter.chapter_no).label("next_id"),
+        )
+        .where(*bounds)
+        .subquery()
+    )
 
-    db.flush()
-    return chapters
+    # Outside [start_no, end_no] only the stitching pointer is rewritten
+    new_prev: Any = w.c.prev_id
+    if start_no is not None:
+        new_prev = case((w.c.chapter_no >= start_no, w.c.prev_id), else_=Chapter.prev_chapter_id)
+    new_next: Any = w.c.next_id
+    if end_no is not None:
+        new_next = case((w.c.chapter_no <= end_no, w.c.next_id), else_=Chapter.next_chapter_id)
+
+    result = db.execute(
+        update(Chapter)
+        .where(
+            and_(
+                Chapter.id == w.c.id,
+                or_(
+                    Chapter.prev_chapter_id.is_distinct_from(new_prev),
+                    Chapter.next_chapter_id.is_distinct_from(new_next),
+                ),
+            )
+        )
+        .values(prev_chapter_id=new_prev, next_chapter_id=new_next)
+        .execution_options(synchronize_session=False)
+    )
+    return int(result.rowcount or 0)
 
 
 def insert_chapter_and_link(
@@ -45,8 +176,10 @@ def insert_chapter_and_link(
     Rules:
     - chapter_no is canonical ordering.
     - prev/next pointers are updated on neighbors to keep list consistent.
+
+    One INSERT plus one set-based relink of [chapter_no, chapter_no], which sets the new
+    chapter's pointers and stitches both neighbours to it.
     """
-    # Create the new chapter row first
     new_ch = chapter_repo.create_chapter(
         db,
         novel_id=novel_id,
@@ -57,35 +190,22 @@ def insert_chapter_and_link(
         source_url=source_url,
         status="translated" if content else "raw_only",
     )
+    relink_chapter_range(db, novel_id=novel_id, start_no=chapter_no, end_no=chapter_no)
+    # The relink bypassed the ORM; reload the pointers on next access
+    db.expire(new_ch, ["prev_chapter_id", "next_chapter_id"])
+    return new_ch
 
-    # Find immediate neighbors by chapter_no
-    # Previous = max chapter_no < new
-    prev_ch = (
-        db.query(Chapter)
-        .filter(Chapter.novel_id == novel_id, Chapter.chapter_no < chapter_no)
-        .order_by(Chapter.chapter_no.desc())
-        .first()
-    )
-    # Next = min chapter_no > new
-    next_ch = (
-        db.query(Chapter)
-        .filter(Chapter.novel_id == novel_id, Chapter.chapter_no > chapter_no)
-        .order_by(Chapter.chapter_no.asc())
-        .first()
-    )
-
-    # Link new chapter
-    new_ch.prev_chapter_id = prev_ch.id if prev_ch else None
-    new_ch.next_chapter_id = next_ch.id if next_ch else None
-
-    # Update neighbors to point to new chapter
-    if prev_ch:
-        prev_ch.next_chapter_id = new_ch.id
-    if next_ch:
-        next_ch.prev_chapter_id = new_ch.id
 
-    db.flush()
-    return new_ch
+def _delete_and_relink(db: Session, ch: Chapter) -> Chapter:
+    """
+    Deletes a loaded chapter and stitches its neighbours together. The prev/next FKs are
+    ON DELETE SET NULL, so a plain DELETE is safe and the relink is one UPDATE over the
+    chapter_no gap. The chapter is detached with everything loaded, for the response.
+    """
+    db.execute(delete(Chapter).where(Chapter.id == ch.id))
+    db.expunge(ch)
+    relink_chapter_range(db, novel_id=ch.novel_id, start_no=ch.chapter_no, end_no=ch.chapter_no)
+    return ch
 
 
 def delete_chapter_and_relink(db: Session, *, chapter_id: int) -> Chapter:
@@ -95,29 +215,22 @@ def delete_chapter_and_relink(db: Session, *, chapter_id: int) -> Chapter:
     - prev.next -> deleted.next
     - next.prev -> deleted.prev
     """
-    ch = chapter_repo.get_chapter(db, chapter_id)
+    # With body: the deleted chapter is returned in full
+    ch = chapter_repo.get_chapter(db, chapter_id, with_body=True)
     if not ch:
         raise ValueError("Chapter not found")
-
-    # Load neighbors (if present)
-    prev_ch = chapter_repo.get_chapter(db, ch.prev_chapter_id) if ch.prev_chapter_id else None
-    next_ch = chapter_repo.get_chapter(db, ch.next_chapter_id) if ch.next_chapter_id else None
-
-    # Relink neighbors around the deleted chapter
-    if prev_ch:
-        prev_ch.next_chapter_id = next_ch.id if next_ch else None
-    if next_ch:
-        next_ch.prev_chapter_id = prev_ch.id if prev_ch else None
-
-    # Delete the chapter itself
-    chapter_repo.delete_chapter(db, ch)
-
-    db.flush()
-    return ch
+    return _delete_and_relink(db, ch)
 
 
 def delete_chapter_for_novel_and_relink(db: Session, *, novel_id: int, chapter_id: int):
-    ch = chapter_repo.get_chapter(db, chapter_id)
+    ch = chapter_repo.get_chapter(db, chapter_id, with_body=True)
     if not ch or ch.novel_id != novel_id:
         raise ValueError("Chapter not found for this novel")
-    return delete_chapter_and_relink(db, chapter_id=chapter_id)
+    return _delete_and_relink(db, ch)
+
+
+def delete_chapter_by_no_and_relink(db: Session, *, novel_id: int, chapter_no: int) -> Chapter:
+    ch = chapter_repo.get_chapter_by_no(db, novel_id, chapter_no, with_body=True)
+    if not ch:
+        raise ValueError("Chapter not found")
+    return _delete_and_relink(db, ch)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from app.services.tokens import count_tokens
+
+# A paragraph boundary: a newline plus any blank lines / indentation that follow it.
+_PARAGRAPH_BREAK = re.compile(r"(\n\s*)")
+
+
+@dataclass(frozen=True)
+class Segment:
+    text: str
+    # Whitespace that followed the segment in the original text (restored when stitching)
+    separator: str
+
+
+def split_paragraphs(text: str) -> list[Segment]:
+    """Paragraphs with their trailing separators; joining them gives back `text`."""
+    parts = _PARAGRAPH_BREAK.split(text or "")
+    # parts alternates paragraph, separator, paragraph, ...; pad to full pairs
+    if len(parts) % 2:
+        parts.append("")
+    return [Segment(parts[i], parts[i + 1]) for i in range(0, len(parts), 2)]
+
+
+def split_segments(text: str, target_tokens: int) -> list[Segment]:
+    """
+    Splits `text` at paragraph boundaries into segments of about `target_tokens` each.
+    Paragraphs are never cut, so one longer than the target becomes its own segment.
+    Joining `segment.text + segment.separator` over the result gives back `text`.
+    """
+    segments: list[Segment] = []
+    current = ""
+    current_tokens = 0
+    for paragraph in split_paragraphs(text):
+        tokens = count_tokens(paragraph.text)
+        if current and current_tokens + tokens > target_tokens:
+            body, trailing = _split_trailing(current)
+            segments.append(Segment(body, trailing))
+            current, current_tokens = "", 0
+        current += paragraph.text + paragraph.separator
+        current_tokens += tokens
+
+    if current or not segments:
+        body, trailing = _split_trailing(current)
+        segments.append(Segment(body, trailing))
+    return segments
+
+
+def _split_trailing(chunk: str) -> tuple[str, str]:
+    body = chunk.rstrip()
+    return body, chunk[len(body) :]
+
+
+def stitch_segments(segments: list[Segment], translations: list[str]) -> str:
+    """Joins per-segment translations in order, restoring the original paragraph breaks."""
+    return "".join(t.strip() + seg.separator for seg, t in zip(segments, translations))
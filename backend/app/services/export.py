@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.session import SessionLocal
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_BATCH_SIZE = 200
+# Bytes buffered before a chunk is handed to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def iter_export_chapters(
+    db: Session, novel_id: int, *, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[Any]:
+    """
+    Chapters in chapter_no order with only the exported columns. `text` is content,
+    falling back to raw, picked in SQL so the other body column is never fetched.
+    Rows are streamed through a server-side cursor, `batch_size` at a time.
+    """
+    text = func.coalesce(func.nullif(Chapter.content, ""), Chapter.raw, "").label("text")
+    stmt = (
+        select(
+            Chapter.id,
+            Chapter.chapter_no,
+            Chapter.title,
+            Chapter.source_url,
+            Chapter.status,
+            text,
+        )
+        .where(Chapter.novel_id == novel_id)
+        .order_by(Chapter.chapter_no.asc())
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db.execute(stmt)
+
+
+def _novel_header(db: Session, novel_id: int) -> dict[str, Any] | None:
+    n = db.get(Novel, novel_id)
+    if n is None:
+        return None
+    return {
+        "id": n.id,
+        "name": n.name,
+        "source_lang": n.source_lang,
+        "target_lang": n.target_lang,
+        "created_at": n.created_at,
+        "updated_at": n.updated_at,
+    }
+
+
+def _dumps(value: Any) -> str:
+    # Same encoding as JSONResponse
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def _json_parts(db: Session, novel_id: int) -> Iterator[str]:
+    novel = _novel_header(db, novel_id)
+    if novel is None:
+        return
+    yield '{"novel":' + _dumps(jsonable_encoder(novel)) + ',"chapters":['
+    first = True
+    for row in iter_export_chapters(db, novel_id):
+        chapter = {
+            "id": row.id,
+            "chapter_no": row.chapter_no,
+            "title": row.title,
+            "source_url": row.source_url,
+            "status": row.status,
+            "text": row.text,
+        }
+        yield ("" if first else ",") + _dumps(chapter)
+        first = False
+    yield "]}"
+
+
+def _markdown_parts(db: Session, novel_id: int) -> Iterator[str]:
+    novel = _novel_header(db, novel_id)
+    if novel is None:
+        return
+    yield f"# {novel['name']}\n"
+    for row in iter_export_chapters(db, novel_id):
+        title = row.title or f"Chapter {row.chapter_no}"
+        yield f"\n## {row.chapter_no}. {title}\n\n{row.text.strip()}\n"
+
+
+def _text_parts(db: Session, novel_id: int) -> Iterator[str]:
+    novel = _novel_header(db, novel_id)
+    if novel is None:
+        return
+    yield f"{novel['name']}\n"
+    for row in iter_export_chapters(db, novel_id):
+        title = row.title or f"Chapter {row.chapter_no}"
+        yield f"\n{row.chapter_no}. {title}\n{row.text.strip()}\n"
+
+
+_FORMATS = {"json": _json_parts, "md": _markdown_parts, "txt": _text_parts}
+
+
+def _buffered(parts: Iterable[str], chunk_bytes: int) -> Iterator[bytes]:
+    buf: list[bytes] = []
+    size = 0
+    for part in parts:
+        data = part.encode("utf-8")
+        buf.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def stream_export(
+    novel_id: int,
+    fmt: str,
+    *,
+    session_factory: sessionmaker = SessionLocal,
+    chunk_bytes: int = EXPORT_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """
+    Encoded export body for `fmt` ("json", "md", "txt"), produced incrementally.
+
+    Runs in its own session: the response body is iterated after the request's
+    session has been closed. Output is byte-identical to building the whole document
+    in memory.
+    """
+    parts = _FORMATS[fmt]
+    with session_factory() as db:
+        yield from _buffered(parts(db, novel_id), chunk_bytes)
@@ -3,15 +3,15 @@ from __future__ import annotations
 import re
 from datetime import datetime, timezone
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 
-from app.models.chapter import Chapter
+from app.models.chapter import BODY, Chapter
 
 _SENTENCE_SPLIT_RE = re.compile(r"([.!?])\s+")
 
 
 def format_translated_chapter(db: Session, *, chapter_id: int) -> Chapter:
-    ch = db.get(Chapter, chapter_id)
+    ch = db.get(Chapter, chapter_id, options=[undefer_group(BODY)])
     if not ch:
         raise ValueError("Chapter not found")
 
@@ -45,6 +45,8 @@ def format_translated_chapter(db: Session, *, chapter_id: int) -> Chapter:
     formatted += "\n"
 
     ch.content = formatted
+    # Paragraphs were re-split, so the raw <-> translation alignment no longer holds
+    ch.alignment = None
 
     if hasattr(ch, "updated_at"):
         ch.updated_at = datetime.now(timezone.utc)
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+from typing import Any
+
+from app.core.metrics import MODEL_HEDGE_SAVED_SECONDS, MODEL_HEDGED_CALLS
+from app.services.rate_limit import RateLimitedClient
+
+# Hedged requests ("The Tail at Scale"): a call that is slower than most recent calls
+# is usually stuck behind something at the provider, and an identical second request
+# tends to come back long before it. The budget below keeps the extra requests (each
+# paid for) to a fixed share of calls.
+
+# Recent successful call latencies the percentile is taken over
+LATENCY_WINDOW = 200
+# Hedges that can be saved up while calls are fast (then a burst of slow calls can hedge)
+HEDGE_BURST = 5.0
+# Threads for sync hedged calls: both requests run off the caller's thread
+HEDGE_THREADS = 64
+
+
+class HedgePolicy:
+    """
+    When to hedge, shared by every model call of the process (threads and the event
+    loop alike): after `percentile` of the last LATENCY_WINDOW call latencies, once
+    `min_samples` calls were seen, and only while hedges stay within `max_rate` of
+    calls. `percentile` 0 turns hedging off.
+    """
+
+    def __init__(
+        self, *, percentile: float = 0.0, max_rate: float = 0.05, min_samples: int = 20
+    ):
+        self.percentile = min(100.0, max(0.0, percentile))
+        self.max_rate = max(0.0, max_rate)
+        self.min_samples = max(1, min_samples)
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._credit = min(HEDGE_BURST, 1.0)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.percentile > 0 and self.max_rate > 0
+
+    def begin(self) -> float | None:
+        """Starts a call: its hedge delay in seconds, or None when it cannot be hedged."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._credit = min(HEDGE_BURST, self._credit + self.max_rate)
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        rank = math.ceil(self.percentile / 100 * len(ordered)) - 1
+        return ordered[max(0, rank)]
+
+    def has_credit(self) -> bool:
+        with self._lock:
+            return self._credit >= 1.0
+
+    def take(self) -> bool:
+        """Spends one hedge from the budget; False when over `max_rate`."""
+        with self._lock:
+            if self._credit < 1.0:
+                return False
+            self._credit -= 1.0
+            return True
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+
+class _HedgedCompletions:
+    def __init__(self, owner: Any):
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner.create(**kwargs)
+
+
+class HedgedClient:
+    """
+    Wraps a client (the RateLimitedClient, so each request takes its own budget and
+    retries): a `chat.completions.create()` still running after the policy's delay gets
+    an identical second request, and whichever answers first is returned. A sync
+    request cannot be interrupted, so the loser is abandoned (its answer discarded);
+    one not started yet is cancelled. Streaming requests are passed through.
+
+    Behind a RateLimitedClient the policy learns the provider's latency only (not the
+    limiter waits and retry backoff), and no hedge is sent while calls queue for the
+    limiter: a second request would only queue behind the first. `on_abandoned` gets
+    the response of every losing request that still completed, as it was paid for; it
+    runs in the context of the caller's create() (contextvars).
+    """
+
+    def __init__(
+        self,
+        inner: Any,
+        policy: HedgePolicy,
+        *,
+        on_abandoned: Callable[[Any], None] | None = None,
+    ):
+        self.inner = inner
+        self.policy = policy
+        self.on_abandoned = on_abandoned
+        self.chat = SimpleNamespace(completions=_HedgedCompletions(self))
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._limited = isinstance(inner, RateLimitedClient)
+        if self._limited:
+            inner.on_latency = policy.observe
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(HEDGE_THREADS, thread_name_prefix="model-hedge")
+            return self._pool
+
+    def _queueing(self) -> bool:
+        return self._limited and self.inner.limiter.queueing()
+
+    def _timed(self, kwargs: dict[str, Any]) -> Any:
+        if self._limited:
+            return self.inner.chat.completions.create(**kwargs)
+        t0 = time.perf_counter()
+        resp = self.inner.chat.completions.create(**kwargs)
+        self.policy.observe(time.perf_counter() - t0)
+        return resp
+
+    def _abandoned(self, loser: Future[Any] | asyncio.Future[Any]) -> None:
+        if self.on_abandoned is not None and not loser.cancelled() and loser.exception() is None:
+            self.on_abandoned(loser.result())
+
+    def create(self, **kwargs: Any) -> Any:
+        if kwargs.get("stream"):
+            return self.inner.chat.completions.create(**kwargs)
+        delay = self.policy.begin()
+        if delay is None or not self.policy.has_credit() or self._queueing():
+            t0 = time.perf_counter()
+            resp = self._timed(kwargs)
+            slow = delay is not None and time.perf_counter() - t0 > delay
+            MODEL_HEDGED_CALLS.labels("capped" if slow else "none").inc()
+            return resp
+
+        pool = self._executor()
+        first = pool.submit(self._timed, kwargs)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            MODEL_HEDGED_CALLS.labels("none").inc()
+            return first.result()
+        if self._queueing():
+            MODEL_HEDGED_CALLS.labels("queued").inc()
+            return first.result()
+        if not self.policy.take():
+            MODEL_HEDGED_CALLS.labels("capped").inc()
+            return first.result()
+
+        second = pool.submit(self._timed, kwargs)
+        winner = _first_success([first, second])
+        loser = second if winner is first else first
+        loser.cancel()
+        ctx = contextvars.copy_context()
+        loser.add_done_callback(lambda f: ctx.run(self._abandoned, f))
+        MODEL_HEDGED_CALLS.labels("won" if winner is second else "lost").inc()
+        if winner is second:
+            answered = time.perf_counter()
+            first.add_done_callback(lambda f: _saved(f, answered))
+        return winner.result()
+
+
+def _first_success(futures: list[Future[Any]]) -> Future[Any]:
+    """The first future to finish without an error; the first one when all fail."""
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in futures:
+            if f in done and f.exception() is None:
+                return f
+    return futures[0]
+
+
+def _saved(first: Future[Any], answered: float) -> None:
+    if not first.cancelled() and first.exception() is None:
+        MODEL_HEDGE_SAVED_SECONDS.inc(max(0.0, time.perf_counter() - answered))
+
+
+class _AsyncHedgedCompletions(_HedgedCompletions):
+    async def create(self, **kwargs: Any) -> Any:
+        return await self._owner.create(**kwargs)
+
+
+class AsyncHedgedClient(HedgedClient):
+    """
+    HedgedClient for an async client. The losing request is cancelled, so only a loser
+    that had already answered reaches `on_abandoned`.
+    """
+
+    def __init__(
+        self,
+        inner: Any,
+        policy: HedgePolicy,
+        *,
+        on_abandoned: Callable[[Any], None] | None = None,
+    ):
+        super().__init__(inner, policy, on_abandoned=on_abandoned)
+        self.chat = SimpleNamespace(completions=_AsyncHedgedCompletions(self))
+
+    async def _atimed(self, kwargs: dict[str, Any]) -> Any:
+        if self._limited:
+            return await self.inner.chat.completions.create(**kwargs)
+        t0 = time.perf_counter()
+        resp = await self.inner.chat.completions.create(**kwargs)
+        self.policy.observe(time.perf_counter() - t0)
+        return resp
+
+    async def create(self, **kwargs: Any) -> Any:  # type: ignore[override]
+        if kwargs.get("stream"):
+            return await self.inner.chat.completions.create(**kwargs)
+        delay = self.policy.begin()
+        if delay is None or not self.policy.has_credit() or self._queueing():
+            t0 = time.perf_counter()
+            resp = await self._atimed(kwargs)
+            slow = delay is not None and time.perf_counter() - t0 > delay
+            MODEL_HEDGED_CALLS.labels("capped" if slow else "none").inc()
+            return resp
+
+        first = asyncio.ensure_future(self._atimed(kwargs))
+        tasks = [first]
+        winner: asyncio.Future[Any] | None = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                MODEL_HEDGED_CALLS.labels("none").inc()
+                winner = first
+                return await first
+            if self._queueing():
+                MODEL_HEDGED_CALLS.labels("queued").inc()
+                winner = first
+                return await first
+            if not self.policy.take():
+                MODEL_HEDGED_CALLS.labels("capped").inc()
+                winner = first
+                return await first
+
+            tasks.append(asyncio.ensure_future(self._atimed(kwargs)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in tasks:
+                    if task in done and task.exception() is None:
+                        MODEL_HEDGED_CALLS.labels("lost" if task is first else "won").inc()
+                        winner = task
+                        return task.result()
+            return first.result()
+        finally:
+            # The loser (or both, when the caller itself was cancelled); one that already
+            # answered in the same round was paid for
+            for task in tasks:
+                if task is not winner and task.done():
+                    self._abandoned(task)
+                task.cancel()
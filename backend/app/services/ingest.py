@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import zlib
+from collections.abc import AsyncIterator, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.chapter import Chapter
+from app.schemas import ChapterCreate
+from app.services.chapters import relink_chapter_range
+
+CONFLICT_POLICIES = ("skip", "overwrite", "fail")
+
+
+class IngestError(ValueError):
+    """Bad input line or a duplicate under the "fail" policy (maps to 400/409)."""
+
+    def __init__(self, message: str, *, conflict: bool = False):
+        super().__init__(message)
+        self.conflict = conflict
+
+
+def is_gzipped(headers: Mapping[str, str]) -> bool:
+    """Content-Encoding: gzip or Content-Type: application/gzip."""
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return headers.get("content-encoding", "").lower() == "gzip" or media_type in (
+        "application/gzip",
+        "application/x-gzip",
+    )
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], *, gzipped: bool = False
+) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+    """
+    (line_no, object) for each non-blank line of an NDJSON byte stream, decompressing
+    gzip on the fly. Only one partial line is ever buffered.
+    """
+    inflate = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16) if gzipped else None
+    pending = b""
+    line_no = 0
+
+    async for chunk in chunks:
+        if inflate is not None:
+            try:
+                chunk = inflate.decompress(chunk)
+            except zlib.error as e:
+                raise IngestError(f"Invalid gzip stream: {e}") from e
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, _parse_line(line, line_no)
+
+    if inflate is not None:
+        pending += inflate.flush()
+    if pending.strip():
+        yield line_no + 1, _parse_line(pending, line_no + 1)
+
+
+def _parse_line(line: bytes, line_no: int) -> dict[str, Any]:
+    try:
+        obj = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise IngestError(f"Line {line_no}: invalid JSON ({e})") from e
+    if not isinstance(obj, dict):
+        raise IngestError(f"Line {line_no}: expected a JSON object")
+    return obj
+
+
+@dataclass
+class ChapterIngest:
+    """
+    Accumulates chapter rows and writes them with multi-row INSERT ... ON CONFLICT
+    in batches; `finish()` relinks prev/next once over the inserted chapter_no span.
+    """
+
+    db: Session
+    novel_id: int
+    on_conflict: str = "skip"
+    batch_size: int = 500
+
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    relinked: int = 0
+    _batch: dict[int, dict[str, Any]] = field(default_factory=dict)
+    _min_no: int | None = None
+    _max_no: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.on_conflict not in CONFLICT_POLICIES:
+            raise IngestError(f"on_conflict must be one of {', '.join(CONFLICT_POLICIES)}")
+        self.batch_size = max(1, self.batch_size)
+
+    def add(self, line_no: int, obj: dict[str, Any]) -> None:
+        try:
+            payload = ChapterCreate.model_validate(obj)
+        except ValidationError as e:
+            raise IngestError(f"Line {line_no}: {e.errors()[0]['msg']}") from e
+
+        self.received += 1
+        no = payload.chapter_no
+        if no in self._batch:
+            # Duplicate inside one batch: resolve here, ON CONFLICT cannot touch a row twice
+            if self.on_conflict == "fail":
+                raise IngestError(f"Duplicate chapter_no {no} in input", conflict=True)
+            if self.on_conflict == "skip":
+                self.skipped += 1
+                return
+            self.updated += 1  # overwrite: the later line replaces the earlier one
+
+        self._batch[no] = {
+            "novel_id": self.novel_id,
+            "chapter_no": no,
+            "title": payload.title,
+            "raw": payload.raw,
+            "content": payload.content,
+            "source_url": payload.source_url,
+            "status": "translated" if payload.content else "raw_only",
+        }
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        rows = list(self._batch.values())
+        self._batch = {}
+
+        t = Chapter.__table__
+        stmt = pg_insert(Chapter).values(rows)
+        if self.on_conflict == "overwrite":
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_chapters_novel_chapter_no",
+                set_={
+                    "title": stmt.excluded.title,
+                    "raw": stmt.excluded.raw,
+                    "content": stmt.excluded.content,
+                    "source_url": stmt.excluded.source_url,
+                    "status": stmt.excluded.status,
+                    "alignment": None,
+                    "updated_at": func.now(),
+                },
+            )
+        else:
+            # skip, and fail: existing rows are detected by their missing RETURNING row
+            stmt = stmt.on_conflict_do_nothing(constraint="uq_chapters_novel_chapter_no")
+
+        # xmax = 0 only for freshly inserted rows (updated rows carry the updating xid)
+        result = self.db.execute(
+            stmt.returning(t.c.chapter_no, literal_column("(xmax = 0)").label("inserted"))
+        ).all()
+
+        inserted_nos = [r.chapter_no for r in result if r.inserted]
+        updated = len(result) - len(inserted_nos)
+        missing = len(rows) - len(result)
+        if self.on_conflict == "fail" and missing:
+            taken = sorted({r["chapter_no"] for r in rows} - {r.chapter_no for r in result})
+            raise IngestError(f"Chapter number {taken[0]} already exists", conflict=True)
+
+        self.inserted += len(inserted_nos)
+        self.updated += updated
+        self.skipped += missing
+        if inserted_nos:
+            lo, hi = min(inserted_nos), max(inserted_nos)
+            self._min_no = lo if self._min_no is None else min(self._min_no, lo)
+            self._max_no = hi if self._max_no is None else max(self._max_no, hi)
+
+    def finish(self) -> dict[str, Any]:
+        self.flush()
+        # Overwrites keep their chapter_no, so only inserts can change the list
+        if self._min_no is not None and self._max_no is not None:
+            self.relinked = relink_chapter_range(
+                self.db, novel_id=self.novel_id, start_no=self._min_no, end_no=self._max_no
+            )
+        self.db.flush()
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "relinked": self.relinked,
+        }
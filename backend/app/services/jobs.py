@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import READ_AHEAD_JOBS
+from app.db.session import SessionLocal
+from app.models.translation_job import TranslationJob
+from app.repos import chapter as chapter_repo
+from app.repos import job as job_repo
+from app.services.pipeline import translate_range
+from app.services.translation import translate_chapter
+
+logger = logging.getLogger(__name__)
+
+ProgressFn = Callable[[str, float], None]
+JobHandler = Callable[[Session, TranslationJob, ProgressFn], dict[str, Any]]
+
+
+# --- Handlers -----------------------------------------------------------------
+
+
+def _run_translate_chapter(db: Session, job: TranslationJob, progress: ProgressFn) -> dict[str, Any]:
+    if job.chapter_id is None:
+        raise ValueError("Chapter not found")
+
+    # No commit here: the worker commits the translation together with the job result.
+    stats: dict[str, Any] = {}
+    ch = translate_chapter(
+        db,
+        novel_id=job.novel_id,
+        chapter_id=job.chapter_id,
+        progress=progress,
+        force=bool((job.params or {}).get("force")),
+        stats=stats,
+        source=job.kind,
+    )
+    return {"chapter_id": ch.id, "chapter_no": ch.chapter_no, "status": ch.status, **stats}
+
+
+def _run_translate_range(db: Session, job: TranslationJob, progress: ProgressFn) -> dict[str, Any]:
+    params = dict(job.params or {})
+    start_no = int(params["start"])
+    end_no = int(params["end"])
+
+    # Resume after a crash: the checkpoint is committed together with each batch.
+    previous = dict(job.result or {})
+    if previous.get("last_chapter_no") is not None:
+        start_no = max(start_no, int(previous["last_chapter_no"]) + 1)
+
+    job_id = job.id
+
+    def checkpoint(stats: dict[str, Any]) -> None:
+        current = job_repo.get_job(db, job_id)
+        if current is None:
+            return
+        current.result = {**stats, "start": int(params["start"])}
+        current.stage = "translating"
+        current.progress = stats["translated"] / stats["total"] if stats["total"] else 1.0
+
+    stats = translate_range(
+        db,
+        novel_id=job.novel_id,
+        start_no=start_no,
+        end_no=end_no,
+        batch_size=int(params.get("batch_size") or 10),
+        retranslate=bool(params.get("retranslate")),
+        checkpoint=checkpoint,
+        # Also the heartbeat: requeue_stale_jobs goes by updated_at
+        progress=progress,
+    )
+    return {**stats, "start": int(params["start"])}
+
+
+def _run_read_ahead(db: Session, job: TranslationJob, progress: ProgressFn) -> dict[str, Any]:
+    # Speculative: the chapter may have been translated (or deleted) since it was queued
+    ch = chapter_repo.get_chapter(db, job.chapter_id) if job.chapter_id is not None else None
+    if ch is None or ch.status == "translated":
+        READ_AHEAD_JOBS.labels("skipped").inc()
+        return {"chapter_id": job.chapter_id, "skipped": True}
+    return _run_translate_chapter(db, job, progress)
+
+
+JOB_HANDLERS: dict[str, JobHandler] = {
+    "translate_chapter": _run_translate_chapter,
+    "translate_range": _run_translate_range,
+    "read_ahead": _run_read_ahead,
+}
+
+
+# --- Worker pool --------------------------------------------------------------
+
+
+class TranslationWorkerPool:
+    """
+    Fixed-size pool of daemon threads that drain the persisted `translation_jobs` queue.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several API processes
+    can run pools against the same database. `notify()` wakes idle workers right away;
+    otherwise they poll every `poll_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        session_factory: sessionmaker[Session] = SessionLocal,
+        poll_interval: float = 2.0,
+        handlers: dict[str, JobHandler] | None = None,
+    ):
+        self.concurrency = max(0, concurrency)
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.handlers = handlers if handlers is not None else JOB_HANDLERS
+
+        self._wake = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stopping.is_set()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._run, name=f"translate-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        self._stopping.set()
+        with self._wake:
+            self._wake.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        with self._wake:
+            self._wake.notify()
+
+    def run_pending(self) -> int:
+        """Drains the queue on the calling thread. Returns number of jobs processed."""
+        done = 0
+        while (job_id := self._claim()) is not None:
+            self._execute(job_id)
+            done += 1
+        return done
+
+    # -- internals --
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = self._claim()
+            except Exception:
+                logger.exception("Failed to claim translation job")
+                job_id = None
+
+            if job_id is None:
+                with self._wake:
+                    self._wake.wait(self.poll_interval)
+                continue
+
+            self._execute(job_id)
+
+    def _claim(self) -> int | None:
+        db = self.session_factory()
+        try:
+            job = job_repo.claim_next_job(db)
+            db.commit()
+            return job.id if job else None
+        finally:
+            db.close()
+
+    def _report(self, job_id: int) -> ProgressFn:
+        # Progress is written in its own short transaction so pollers see it
+        # while the translation transaction is still open.
+        def report(stage: str, fraction: float) -> None:
+            db = self.session_factory()
+            try:
+                job = job_repo.get_job(db, job_id)
+                if job:
+                    job_repo.set_progress(db, job, stage=stage, progress=fraction)
+                    db.commit()
+            except Exception:
+                db.rollback()
+                logger.warning("Failed to record progress for job %s", job_id, exc_info=True)
+            finally:
+                db.close()
+
+        return report
+
+    def _execute(self, job_id: int) -> None:
+        db = self.session_factory()
+        try:
+            job = job_repo.get_job(db, job_id)
+            if not job:
+                return
+
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                job_repo.finish_job(db, job, status="failed", error=f"Unknown job kind: {job.kind}")
+                db.commit()
+                return
+
+            try:
+                result = handler(db, job, self._report(job_id))
+            except Exception as e:
+                db.rollback()
+                logger.warning("Translation job %s failed", job_id, exc_info=True)
+                job = job_repo.get_job(db, job_id)
+                if job:
+                    job_repo.finish_job(db, job, status="failed", error=str(e))
+                    db.commit()
+                return
+
+            job = job_repo.get_job(db, job_id)
+            if job:
+                job_repo.finish_job(db, job, status="succeeded", result=result)
+                db.commit()
+        finally:
+            db.close()
+
+
+worker_pool = TranslationWorkerPool(
+    concurrency=settings.TRANSLATE_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL_S,
+)
+
+
+def enqueue_chapter_translation(
+    db: Session, *, novel_id: int, chapter_id: int, force: bool = False
+) -> TranslationJob:
+    """
+    Queues a translate job for a chapter, reusing an already queued/running one
+    (double hotkey presses should not pay for two model calls).
+    `force` makes the job bypass the translation cache.
+    """
+    existing = job_repo.get_active_job_for_chapter(
+        db, chapter_id=chapter_id, kinds=("translate_chapter", "read_ahead")
+    )
+    if existing:
+        # Asked for now: a read-ahead job is no longer speculative (nor cancellable)
+        existing.kind = "translate_chapter"
+        return existing
+    return job_repo.create_job(
+        db, novel_id=novel_id, chapter_id=chapter_id, params={"force": True} if force else None
+    )
+
+
+def enqueue_range_translation(
+    db: Session,
+    *,
+    novel_id: int,
+    start_no: int,
+    end_no: int,
+    batch_size: int = 10,
+    retranslate: bool = False,
+) -> TranslationJob:
+    """
+    Queues a bulk translate of [start_no, end_no]. Only one range job per novel may be
+    active, since concurrent ranges would race on the novel's context memory.
+    """
+    if start_no > end_no:
+        start_no, end_no = end_no, start_no
+
+    if job_repo.get_active_job_for_novel(db, novel_id=novel_id, kind="translate_range"):
+        raise ValueError("A range translation is already queued or running for this novel")
+
+    return job_repo.create_job(
+        db,
+        novel_id=novel_id,
+        kind="translate_range",
+        params={
+            "start": start_no,
+            "end": end_no,
+            "batch_size": batch_size,
+            "retranslate": retranslate,
+        },
+    )
+
+
+def start_workers() -> None:
+    db = SessionLocal()
+    try:
+        requeued = job_repo.requeue_stale_jobs(db, older_than_s=settings.JOB_STALE_AFTER_S)
+        db.commit()
+        if requeued:
+            logger.info("Requeued %s stale translation jobs", requeued)
+    finally:
+        db.close()
+    worker_pool.start()
+
+
+def stop_workers() -> None:
+    worker_pool.stop()
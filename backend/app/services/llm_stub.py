@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+import openai
+
+# Prompt caching as OpenAI does it: prefixes of at least 1024 tokens, matched in
+# 128-token increments. The stub counts 4 characters per token.
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+_CHARS_PER_TOKEN = 4
+
+
+class PromptCache:
+    """
+    Remembers the prompt prefixes it has seen (hashes at each block boundary, LRU
+    bounded) and reports how many leading tokens of a new prompt were seen before,
+    like a provider's automatic prompt cache.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._seen: OrderedDict[bytes, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup_and_store(self, messages: list[dict[str, Any]]) -> int:
+        """Cached tokens of this prompt; its own prefixes are remembered for later calls."""
+        prompt = "".join(f"{m.get('role')}\n{m.get('content') or ''}\n" for m in messages)
+        block = CACHE_BLOCK_TOKENS * _CHARS_PER_TOKEN
+        start = CACHE_MIN_TOKENS * _CHARS_PER_TOKEN
+        h = hashlib.sha1(prompt[:start].encode("utf-8"))
+        keys: list[tuple[int, bytes]] = []
+        for end in range(start, len(prompt) + 1, block):
+            if end > start:
+                h.update(prompt[end - block : end].encode("utf-8"))
+            keys.append((end, h.copy().digest()))
+
+        cached = 0
+        with self._lock:
+            for end, key in keys:
+                if key not in self._seen:
+                    break
+                cached = end
+                self._seen.move_to_end(key)
+            for _, key in keys:
+                self._seen[key] = None
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+        return cached // _CHARS_PER_TOKEN
+
+
+def stub_completion(
+    *,
+    model: str,
+    messages: list[dict[str, Any]],
+    latency_ms: float,
+    ms_per_token: float,
+    cached_tokens: int = 0,
+) -> tuple[dict[str, Any], float]:
+    """
+    The stub's answer to a chat completion request, as an OpenAI-shaped response
+    body, and how long (seconds) a real model would take to produce it.
+    """
+    payload = _user_payload(messages)
+    text = str(payload.get("text") or "")
+    target = str(payload.get("target_lang") or "en")
+
+    content = json.dumps(
+        {"translation": f"[{target}] {text}", "context_updates": {}},
+        ensure_ascii=False,
+    )
+    prompt_chars = sum(len(str(m.get("content") or "")) for m in messages)
+    body = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": (prompt_chars + len(content)) // 4,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        },
+    }
+    delay_ms = latency_ms + ms_per_token * (len(content) // 4)
+    return body, delay_ms / 1000
+
+
+# Streamed answers come in pieces of this many characters (a few tokens, like OpenAI's)
+STREAM_CHUNK_CHARS = 16
+
+
+def stub_chunks(
+    body: dict[str, Any], *, latency_ms: float, ms_per_token: float
+) -> Iterator[tuple[dict[str, Any], float]]:
+    """
+    A stub_completion() body as the chat.completion.chunk objects of a streamed answer
+    (with stream_options.include_usage: a last chunk carrying only the usage), each
+    with the seconds to wait before sending it: `latency_ms` before the first content,
+    then `ms_per_token` per token of the piece.
+    """
+    content = body["choices"][0]["message"]["content"]
+    base = {k: body[k] for k in ("id", "created", "model")}
+
+    def chunk(delta: dict[str, Any], finish_reason: str | None) -> dict[str, Any]:
+        return {
+            **base,
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            "usage": None,
+        }
+
+    for start in range(0, len(content), STREAM_CHUNK_CHARS):
+        piece = content[start : start + STREAM_CHUNK_CHARS]
+        delta = {"content": piece}
+        if start == 0:
+            delta["role"] = "assistant"
+        wait_ms = ms_per_token * len(piece) / _CHARS_PER_TOKEN
+        yield chunk(delta, None), (latency_ms * (start == 0) + wait_ms) / 1000
+    yield chunk({}, "stop"), 0.0
+    yield {**base, "object": "chat.completion.chunk", "choices": [], "usage": body["usage"]}, 0.0
+
+
+def stub_rate_limit_error(retry_after_s: float) -> openai.RateLimitError:
+    """The 429 the OpenAI SDK raises, with a Retry-After header."""
+    response = httpx.Response(
+        429,
+        headers={"retry-after-ms": str(int(retry_after_s * 1000))},
+        request=httpx.Request("POST", "http://stub/v1/chat/completions"),
+    )
+    return openai.RateLimitError("Rate limit reached (stub)", response=response, body=None)
+
+
+def _namespace(value: Any) -> Any:
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_namespace(v) for v in value]
+    return value
+
+
+class _StubCompletions:
+    def __init__(self, owner: Any):
+        self._owner = owner
+
+    def create(
+        self, *, model: str, messages: list[dict[str, Any]], stream: bool = False, **_: Any
+    ) -> Any:
+        return self._owner.complete(model=model, messages=messages, stream=stream)
+
+
+class StubOpenAI:
+    """
+    Minimal stand-in for the OpenAI client used by the translation service.
+
+    It answers `client.chat.completions.create(...)` with a well-formed translate
+    response ("[<target_lang>] <text>", no context updates) after an optional
+    latency, so job/pipeline code can be exercised without network access.
+
+    Latency is `latency_ms` plus `ms_per_token` per completion token, which mimics
+    how real response time grows with output length.
+
+    With `error_rate` > 0, that share of calls fails right away with a 429
+    (openai.RateLimitError) carrying a `retry_after_s` Retry-After, to exercise
+    the rate limiter's retries. With `tail_rate` > 0, that share of calls stalls for
+    `tail_ms` on top of the latency, like occasional slow provider responses.
+
+    Usage reports prompt_tokens_details.cached_tokens from a PromptCache, so request
+    layouts can be compared for prompt cache reuse.
+
+    With `stream=True` the answer is an iterator of chunks (see stub_chunks), paced
+    like the whole answer would be.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_ms: int = 0,
+        ms_per_token: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after_s: float = 1.0,
+        tail_rate: float = 0.0,
+        tail_ms: int = 0,
+        seed: int | None = None,
+    ):
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.error_rate = error_rate
+        self.retry_after_s = retry_after_s
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.calls = 0
+        self.errors = 0
+        self.stalls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.prompt_cache = PromptCache()
+        self.chat = SimpleNamespace(completions=_StubCompletions(self))
+
+    def _should_fail(self) -> bool:
+        fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        self.errors += int(fail)
+        return fail
+
+    def _stall_s(self) -> float:
+        stall = self.tail_rate > 0 and self._random.random() < self.tail_rate
+        self.stalls += int(stall)
+        return self.tail_ms / 1000 if stall else 0.0
+
+    def complete(
+        self, *, model: str, messages: list[dict[str, Any]], stream: bool = False
+    ) -> Any:
+        with self._lock:
+            self.calls += 1
+            fail = self._should_fail()
+            stall = self._stall_s()
+        if fail:
+            raise stub_rate_limit_error(self.retry_after_s)
+        body, delay = stub_completion(
+            model=model,
+            messages=messages,
+            latency_ms=self.latency_ms,
+            ms_per_token=self.ms_per_token,
+            cached_tokens=self.prompt_cache.lookup_and_store(messages),
+        )
+        if stream:
+            return self._stream(body)
+        if delay + stall:
+            time.sleep(delay + stall)
+        return _namespace(body)
+
+    def _stream(self, body: dict[str, Any]) -> Iterator[Any]:
+        for chunk, delay in stub_chunks(
+            body, latency_ms=self.latency_ms, ms_per_token=self.ms_per_token
+        ):
+            if delay:
+                time.sleep(delay)
+            yield _namespace(chunk)
+
+
+class _AsyncStubCompletions(_StubCompletions):
+    async def create(
+        self, *, model: str, messages: list[dict[str, Any]], stream: bool = False, **_: Any
+    ) -> Any:
+        return await self._owner.complete(model=model, messages=messages, stream=stream)
+
+
+class AsyncStubOpenAI(StubOpenAI):
+    """StubOpenAI for the async stack: same answers, waits with asyncio.sleep."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.chat = SimpleNamespace(completions=_AsyncStubCompletions(self))
+
+    async def complete(  # type: ignore[override]
+        self, *, model: str, messages: list[dict[str, Any]], stream: bool = False
+    ) -> Any:
+        self.calls += 1
+        if self._should_fail():
+            raise stub_rate_limit_error(self.retry_after_s)
+        stall = self._stall_s()
+        body, delay = stub_completion(
+            model=model,
+            messages=messages,
+            latency_ms=self.latency_ms,
+            ms_per_token=self.ms_per_token,
+            cached_tokens=self.prompt_cache.lookup_and_store(messages),
+        )
+        if stream:
+            return self._astream(body)
+        if delay + stall:
+            await asyncio.sleep(delay + stall)
+        return _namespace(body)
+
+    async def _astream(self, body: dict[str, Any]) -> AsyncIterator[Any]:
+        for chunk, delay in stub_chunks(
+            body, latency_ms=self.latency_ms, ms_per_token=self.ms_per_token
+        ):
+            if delay:
+                await asyncio.sleep(delay)
+            yield _namespace(chunk)
+
+
+def _user_payload(messages: list[dict[str, Any]]) -> dict[str, Any]:
+    """The user messages' JSON objects merged in order (a later key wins)."""
+    payload: dict[str, Any] = {}
+    for m in messages:
+        if m.get("role") != "user":
+            continue
+        try:
+            data = json.loads(str(m.get("content") or ""))
+        except json.JSONDecodeError:
+            data = {"text": m.get("content") or ""}
+        if isinstance(data, dict):
+            payload.update(data)
+    return payload
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.models.novel import Novel
 from app.models.chapter import Chapter
+from app.repos import novel as novel_repo
 
 
 def delete_novel_cascade(db: Session, *, novel_id: int) -> Novel:
@@ -20,13 +21,12 @@ def delete_novel_cascade(db: Session, *, novel_id: int) -> Novel:
 
 
 def delete_all_chapters_for_novel(db: Session, *, novel_id: int) -> int:
-    novel = db.get(Novel, novel_id)
-    if not novel:
-        raise ValueError("Novel not found")
-
     deleted = (
         db.query(Chapter).filter(Chapter.novel_id == novel_id).delete(synchronize_session=False)
     )
+    # Only an empty result needs the existence check
+    if not deleted and not novel_repo.novel_exists(db, novel_id):
+        raise ValueError("Novel not found")
     db.flush()
     return int(deleted)
 
@@ -45,10 +45,6 @@ def delete_chapters_by_no_range(
     if start_no > end_no:
         start_no, end_no = end_no, start_no
 
-    novel = db.get(Novel, novel_id)
-    if not novel:
-        raise ValueError("Novel not found")
-
     deleted = (
         db.query(Chapter)
         .filter(
@@ -58,5 +54,7 @@ def delete_chapters_by_no_range(
         )
         .delete(synchronize_session=False)
     )
+    if not deleted and not novel_repo.novel_exists(db, novel_id):
+        raise ValueError("Novel not found")
     db.flush()
     return int(deleted)
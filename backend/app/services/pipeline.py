@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import copy
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from sqlalchemy.orm import Session, undefer_group
+
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.models.chapter import BODY, Chapter
+from app.models.novel import Novel
+from app.repos import context as context_repo
+from app.services.alignment import IncrementalPlan
+from app.services.term_matcher import matcher_for_context
+from app.services.translation import (
+    _normalize_context,
+    apply_translation_result,
+    build_context_slice,
+    call_overhead_tokens,
+    merge_context_updates,
+    paid_usage,
+    prune_context_in_db,
+    resolve_token_budget,
+    translate_hunks,
+    translate_text,
+    validate_translation_result,
+)
+from app.services.translation_memory import plan_from_memory
+from app.services.usage import Attempt, mark_applied, paying_for, record_paid
+
+CheckpointFn = Callable[[dict[str, Any]], None]
+ProgressFn = Callable[[str, float], None]
+
+
+def pending_chapters_in_range(
+    db: Session,
+    *,
+    novel_id: int,
+    start_no: int,
+    end_no: int,
+    retranslate: bool = False,
+) -> list[tuple[int, int]]:
+    """
+    (id, chapter_no) of chapters with raw text in [start_no, end_no], in chapter_no order.
+    Already translated chapters are skipped unless `retranslate` is set.
+    """
+    q = db.query(Chapter.id, Chapter.chapter_no).filter(
+        Chapter.novel_id == novel_id,
+        Chapter.chapter_no >= start_no,
+        Chapter.chapter_no <= end_no,
+        Chapter.raw.isnot(None),
+        Chapter.raw != "",
+    )
+    if not retranslate:
+        q = q.filter(Chapter.status != "translated")
+    return [(int(r.id), int(r.chapter_no)) for r in q.order_by(Chapter.chapter_no.asc()).all()]
+
+
+def translate_range(
+    db: Session,
+    *,
+    novel_id: int,
+    start_no: int,
+    end_no: int,
+    batch_size: int = 10,
+    retranslate: bool = False,
+    checkpoint: CheckpointFn | None = None,
+    progress: ProgressFn | None = None,
+) -> dict[str, Any]:
+    """
+    Translates chapters [start_no, end_no] in chapter_no order.
+
+    Two stages overlap: while the model translates chapter N+1 on a helper thread,
+    this thread stores chapter N's context updates (and an in-memory merge used for
+    later slices) and commits. The slice sent
+    for N+1 is therefore built before N's updates land (one chapter of lag); merges
+    are still applied strictly in chapter order.
+
+    `retranslate` also bypasses the translation cache and translation memory, so
+    chapters get fresh output. Otherwise paragraphs remembered from earlier chapters
+    (including ones stored earlier in this run) are reused and only the rest is sent.
+
+    Each chapter's usage is recorded as soon as the model has answered (record_paid, on
+    the helper thread) and flagged applied with the batch's commit.
+
+    Commits every `batch_size` chapters. `checkpoint(stats)` runs right before each
+    commit so callers can persist progress in the same transaction. `progress(stage,
+    fraction)` is called after every chapter; background jobs report it in a
+    transaction of their own, so a long batch does not look stale. If a chapter fails,
+    everything before it is committed and the error is re-raised.
+    """
+    if start_no > end_no:
+        start_no, end_no = end_no, start_no
+    batch_size = max(1, batch_size)
+
+    novel = db.get(Novel, novel_id)
+    if not novel:
+        raise ValueError("Novel not found")
+
+    todo = pending_chapters_in_range(
+        db, novel_id=novel_id, start_no=start_no, end_no=end_no, retranslate=retranslate
+    )
+
+    ctx = _normalize_context(context_repo.load_context(db, novel))
+    stats: dict[str, Any] = {
+        "start": start_no,
+        "end": end_no,
+        "total": len(todo),
+        "translated": 0,
+        "last_chapter_no": None,
+        "prompt_tokens": 0,
+        "cached_tokens": 0,
+        "completion_tokens": 0,
+        "slice_tokens": 0,
+        "prefix_tokens": 0,
+        "chapter_tokens": 0,
+        "items_dropped": 0,
+        "cache_hits": 0,
+        "tm_paragraphs": 0,
+        "tm_tokens_saved": 0,
+    }
+    token_budget = resolve_token_budget()
+    slice_stats: dict[int, dict[str, Any]] = {}
+    # Usage rows of the chapters stored since the last commit
+    applied: list[int | None] = []
+    started = time.perf_counter()
+
+    def commit() -> None:
+        # Only now: the hourly rollup rows it updates stay locked until the commit, and
+        # the helper thread records the next chapter into them meanwhile
+        mark_applied(db, *applied)
+        applied.clear()
+        if stats["last_chapter_no"] is not None:
+            with stage_timer("prune_context"):
+                context_repo.prune_context(
+                    db, novel_id=novel_id, current_chapter_no=int(stats["last_chapter_no"])
+                )
+        _update_throughput(stats, time.perf_counter() - started)
+        if checkpoint:
+            checkpoint(dict(stats))
+        with stage_timer("commit"):
+            db.commit()
+
+    def submit(
+        pool: ThreadPoolExecutor, idx: int
+    ) -> tuple[Chapter, IncrementalPlan | None, Future[tuple[dict[str, Any], int | None]]]:
+        ch = db.get(Chapter, todo[idx][0], options=[undefer_group(BODY)])
+        if ch is None or not ch.raw:
+            raise ValueError(f"Chapter {todo[idx][1]} disappeared during translation")
+        # Deep copy: the helper thread serializes the slice while this thread keeps
+        # mutating the (shared) context entries.
+        slice_stats[idx] = {}
+        with stage_timer("build_context_slice"):
+            context_slice = copy.deepcopy(
+                build_context_slice(
+                    ctx,
+                    chapter_no=int(ch.chapter_no),
+                    raw_text=ch.raw,
+                    matcher=matcher_for_context(novel_id, ctx),
+                    token_budget=token_budget,
+                    stats=slice_stats[idx],
+                )
+            )
+        plan = None
+        if not retranslate and settings.TRANSLATION_MEMORY:
+            with stage_timer("translation_memory"):
+                plan = plan_from_memory(
+                    db,
+                    novel_id=novel_id,
+                    raw=ch.raw,
+                    call_overhead_tokens=call_overhead_tokens(context_slice),
+                    stats=slice_stats[idx],
+                )
+        attempt = Attempt(novel_id, ch.id, int(ch.chapter_no), "translate_range")
+        if plan is not None:
+            fut = pool.submit(
+                _paid,
+                attempt,
+                plan,
+                slice_stats[idx],
+                translate_hunks,
+                plan,
+                novel_id=novel_id,
+                source_lang=novel.source_lang,
+                target_lang=novel.target_lang,
+                context=context_slice,
+            )
+            return ch, plan, fut
+        fut = pool.submit(
+            _paid,
+            attempt,
+            plan,
+            slice_stats[idx],
+            translate_text,
+            novel_id=novel_id,
+            source_lang=novel.source_lang,
+            target_lang=novel.target_lang,
+            text=ch.raw,
+            context=context_slice,
+            force=retranslate,
+        )
+        return ch, plan, fut
+
+    if not todo:
+        _update_throughput(stats, 0.0)
+        return stats
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="translate-range") as pool:
+        pending = submit(pool, 0)
+        for i in range(len(todo)):
+            ch, plan, fut = pending
+            try:
+                # Only the part of the model call not overlapped with the previous chapter
+                with stage_timer("model_wait"):
+                    result, usage_id = fut.result()
+                validate_translation_result(result)
+            except Exception:
+                commit()
+                raise
+
+            # Chapter i is paid for: a failure preparing i + 1 is raised once it is stored
+            next_error: Exception | None = None
+            if i + 1 < len(todo):
+                try:
+                    pending = submit(pool, i + 1)
+                except Exception as e:
+                    next_error = e
+
+            usage = result.pop("usage", None) or {}
+            if result.get("cache") == "hit":
+                stats["cache_hits"] += 1
+            updates = apply_translation_result(
+                db, novel_id=novel_id, chapter=ch, result=result, prune=False
+            )
+            applied.append(usage_id)
+            chapter_slice = slice_stats.pop(i, {})
+            # Keep the in-memory copy in step with what was stored for the next slices
+            with stage_timer("merge_context_updates"):
+                ctx = prune_context_in_db(
+                    merge_context_updates(
+                        existing=ctx, updates=updates, chapter_no=int(ch.chapter_no)
+                    ),
+                    current_chapter_no=int(ch.chapter_no),
+                )
+
+            stats["translated"] += 1
+            stats["last_chapter_no"] = int(ch.chapter_no)
+            stats["prompt_tokens"] += int(usage.get("prompt_tokens", 0))
+            stats["cached_tokens"] += int(usage.get("cached_tokens", 0))
+            stats["completion_tokens"] += int(usage.get("completion_tokens", 0))
+            for key in (
+                "slice_tokens",
+                "prefix_tokens",
+                "chapter_tokens",
+                "items_dropped",
+                "tm_paragraphs",
+                "tm_tokens_saved",
+            ):
+                stats[key] += int(chapter_slice.get(key, 0))
+
+            if progress:
+                progress("translating", stats["translated"] / stats["total"])
+            if next_error is not None:
+                commit()
+                raise next_error
+            if stats["translated"] % batch_size == 0 or i + 1 == len(todo):
+                commit()
+
+    return stats
+
+
+def _paid(
+    attempt: Attempt,
+    plan: IncrementalPlan | None,
+    slice_stats: dict[str, Any],
+    fn: Callable[..., dict[str, Any]],
+    *args: Any,
+    **kwargs: Any,
+) -> tuple[dict[str, Any], int | None]:
+    """
+    fn's result and its usage row, recorded as soon as the model has answered; the
+    latency is timed on the helper thread, so without queueing.
+    """
+    t0 = time.perf_counter()
+    with paying_for(attempt):
+        result = fn(*args, **kwargs)
+    usage = paid_usage(plan, result, latency_s=time.perf_counter() - t0, slice_stats=slice_stats)
+    return result, record_paid(attempt, **usage)
+
+
+def _update_throughput(stats: dict[str, Any], elapsed_s: float) -> None:
+    minutes = elapsed_s / 60 if elapsed_s > 0 else 0.0
+    tokens = int(stats["prompt_tokens"]) + int(stats["completion_tokens"])
+    stats["elapsed_s"] = round(elapsed_s, 3)
+    stats["chapters_per_min"] = round(stats["translated"] / minutes, 2) if minutes else 0.0
+    stats["tokens_per_min"] = round(tokens / minutes, 1) if minutes else 0.0
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+from typing import Any
+
+import openai
+
+from app.core.metrics import MODEL_CALL_SECONDS, MODEL_RATE_LIMIT_WAIT_SECONDS
+from app.services.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Buckets hold this many seconds of budget, so an idle process cannot fire a whole
+# minute's worth of requests at once (providers enforce limits over shorter windows).
+BURST_S = 10.0
+
+# Status codes worth retrying; the same set the OpenAI SDK retries on its own.
+RETRY_STATUS = {408, 409, 429}
+
+# Per-message framing tokens the chat format adds on top of the content.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously. `reserve()` takes the amount right away,
+    letting the level go negative, and returns how long the caller must wait until the
+    debt is repaid; later callers queue behind earlier ones (FIFO by reservation time).
+    """
+
+    def __init__(self, per_minute: float, *, burst_s: float = BURST_S):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_s)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float, now: float) -> None:
+        """Charge (positive) or refund (negative) the difference to an earlier estimate."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets shared by every model call in
+    the process (threads and the event loop alike). A budget of 0 is unlimited.
+
+    A 429 from the provider means the budgets are off (other clients, another
+    process): `pause()` holds back every caller until its Retry-After has passed.
+    """
+
+    def __init__(self, *, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.peak_queued = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_s_total = 0.0
+        self.wait_s_max = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def reserve(self, tokens: int) -> float:
+        """Takes one request and `tokens` from the budgets; returns the wait in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.wait_s_total += wait
+                self.wait_s_max = max(self.wait_s_max, wait)
+                self.queued += 1
+                self.peak_queued = max(self.peak_queued, self.queued)
+            return wait
+
+    def _dequeue(self) -> None:
+        with self._lock:
+            self.queued -= 1
+
+    def acquire(self, tokens: int) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            MODEL_RATE_LIMIT_WAIT_SECONDS.observe(wait)
+            try:
+                time.sleep(wait)
+            finally:
+                self._dequeue()
+        return wait
+
+    async def aacquire(self, tokens: int) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            MODEL_RATE_LIMIT_WAIT_SECONDS.observe(wait)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._dequeue()
+        return wait
+
+    def settle(self, estimated: int, actual: int | None) -> None:
+        """Corrects the token bucket once the response reports real usage."""
+        if self._tokens is None or actual is None or actual == estimated:
+            return
+        with self._lock:
+            self._tokens.adjust(actual - estimated, time.monotonic())
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def queueing(self) -> bool:
+        """Whether calls are waiting for budget (or a 429 pause) right now."""
+        with self._lock:
+            return self.queued > 0 or self._paused_until > time.monotonic()
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "queue_depth": self.queued,
+                "peak_queue_depth": self.peak_queued,
+                "paused_s": round(max(0.0, self._paused_until - now), 3),
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "wait_s_total": round(self.wait_s_total, 3),
+                "wait_s_max": round(self.wait_s_max, 3),
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failures": self.failures,
+            }
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Jittered exponential backoff capped at `max_s`. A Retry-After from the provider takes
+    precedence and is waited in full; one longer than `max_s` is not worth waiting for,
+    and `delay()` returns None (give up).
+    """
+
+    max_retries: int = 5
+    base_s: float = 0.5
+    max_s: float = 30.0
+
+    def delay(self, attempt: int, retry_after: float | None) -> float | None:
+        if retry_after is not None:
+            if retry_after > self.max_s:
+                return None
+            # Small spread so callers told the same instant do not all return together
+            return retry_after + random.uniform(0, self.base_s)
+        return random.uniform(0, min(self.max_s, self.base_s * 2**attempt))
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in RETRY_STATUS or exc.status_code >= 500
+    return False
+
+
+def retry_after_s(exc: BaseException) -> float | None:
+    """Seconds from a Retry-After / retry-after-ms header on an API error, if any."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_request_tokens(kwargs: dict[str, Any]) -> int:
+    """
+    Token cost of a chat completion request as providers count it against TPM: the
+    prompt plus the completion allowance (max_tokens), when one is set.
+    """
+    prompt = sum(
+        count_tokens(str(m.get("content") or "")) + MESSAGE_OVERHEAD_TOKENS
+        for m in kwargs.get("messages") or []
+    )
+    completion = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or 0
+    return prompt + int(completion)
+
+
+def _total_tokens(resp: Any) -> int | None:
+    usage = getattr(resp, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return int(total) if total is not None else None
+
+
+class _LimitedCompletions:
+    def __init__(self, owner: RateLimitedClient):
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner.create(**kwargs)
+
+
+class RateLimitedClient:
+    """
+    Wraps an OpenAI-style client: every `chat.completions.create()` first takes its
+    share of the limiter's budgets, and transient errors (429, 408/409, 5xx, timeouts,
+    connection errors) are retried per `policy`. Other errors propagate unchanged.
+
+    `on_latency`, when set, gets the duration of each successful provider request: the
+    call without its budget waits and retry backoff.
+    """
+
+    def __init__(self, inner: Any, limiter: RateLimiter, policy: RetryPolicy | None = None):
+        self.inner = inner
+        self.limiter = limiter
+        self.policy = policy or RetryPolicy()
+        self.chat = SimpleNamespace(completions=_LimitedCompletions(self))
+        self.on_latency: Callable[[float], None] | None = None
+
+    def _succeeded(self, seconds: float) -> None:
+        MODEL_CALL_SECONDS.labels("ok").observe(seconds)
+        if self.on_latency is not None:
+            self.on_latency(seconds)
+
+    def create(self, **kwargs: Any) -> Any:
+        tokens = estimate_request_tokens(kwargs)
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            t0 = time.perf_counter()
+            try:
+                resp = self.inner.chat.completions.create(**kwargs)
+            except Exception as e:
+                MODEL_CALL_SECONDS.labels("error").observe(time.perf_counter() - t0)
+                delay = _on_error(self.limiter, self.policy, e, attempt, tokens)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._succeeded(time.perf_counter() - t0)
+            self.limiter.settle(tokens, _total_tokens(resp))
+            return resp
+
+
+class _AsyncLimitedCompletions(_LimitedCompletions):
+    async def create(self, **kwargs: Any) -> Any:
+        return await self._owner.create(**kwargs)
+
+
+class AsyncRateLimitedClient(RateLimitedClient):
+    """RateLimitedClient for an async client; shares the limiter with the sync one."""
+
+    def __init__(self, inner: Any, limiter: RateLimiter, policy: RetryPolicy | None = None):
+        super().__init__(inner, limiter, policy)
+        self.chat = SimpleNamespace(completions=_AsyncLimitedCompletions(self))
+
+    async def create(self, **kwargs: Any) -> Any:  # type: ignore[override]
+        tokens = estimate_request_tokens(kwargs)
+        attempt = 0
+        while True:
+            await self.limiter.aacquire(tokens)
+            t0 = time.perf_counter()
+            try:
+                resp = await self.inner.chat.completions.create(**kwargs)
+            except Exception as e:
+                MODEL_CALL_SECONDS.labels("error").observe(time.perf_counter() - t0)
+                delay = _on_error(self.limiter, self.policy, e, attempt, tokens)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._succeeded(time.perf_counter() - t0)
+            self.limiter.settle(tokens, _total_tokens(resp))
+            return resp
+
+
+def _on_error(
+    limiter: RateLimiter, policy: RetryPolicy, exc: Exception, attempt: int, tokens: int
+) -> float:
+    """Backoff before the next attempt, or re-raises `exc` when it should not be retried."""
+    # A failed attempt consumed no tokens at the provider
+    limiter.settle(tokens, 0)
+    if not is_transient(exc) or attempt >= policy.max_retries:
+        limiter.incr("failures")
+        raise exc
+    retry_after = retry_after_s(exc)
+    delay = policy.delay(attempt, retry_after)
+    if isinstance(exc, openai.RateLimitError):
+        limiter.incr("rate_limited")
+        # Also when this call gives up: the others still wait out the Retry-After
+        limiter.pause(delay if delay is not None else retry_after or 0.0)
+    if delay is None:
+        limiter.incr("failures")
+        raise exc
+    limiter.incr("retries")
+    logger.info(
+        "model call failed (%s), retry %d/%d in %.2fs",
+        type(exc).__name__,
+        attempt + 1,
+        policy.max_retries,
+        delay,
+    )
+    return delay
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import READ_AHEAD_JOBS, READ_AHEAD_OPENS
+from app.models.chapter import Chapter
+from app.models.reading_progress import ReadingProgress
+from app.repos import chapter as chapter_repo
+from app.repos import job as job_repo
+from app.repos import novel as novel_repo
+from app.repos import reader as reader_repo
+
+# Read-ahead: when the reader moves to a chapter, the next few untranslated chapters are
+# queued as "read_ahead" jobs, so "next chapter" usually opens an already translated one
+# instead of waiting on the model. Queued read-ahead jobs the reader moved away from are
+# cancelled; running ones finish (the model call is already paid for).
+
+
+@dataclass
+class ReadAhead:
+    queued: list[int] = field(default_factory=list)  # chapter ids
+    cancelled: int = 0
+
+
+def record_progress(
+    db: Session,
+    *,
+    novel_id: int,
+    current_chapter_id: int | None,
+    position: float,
+) -> tuple[ReadingProgress, ReadAhead | None]:
+    """
+    Upserts the novel's reading progress. When it moves to another chapter, read-ahead
+    is scheduled from there (None otherwise, e.g. for scroll position updates).
+    """
+    chapter = None
+    if current_chapter_id is not None:
+        chapter = chapter_repo.get_chapter(db, current_chapter_id)
+        if chapter is None or chapter.novel_id != novel_id:
+            raise ValueError("Chapter not found for this novel")
+    elif not novel_repo.novel_exists(db, novel_id):
+        raise ValueError("Novel not found")
+
+    row, previous = reader_repo.upsert_progress(
+        db, novel_id=novel_id, current_chapter_id=current_chapter_id, position=position
+    )
+    if chapter is None or chapter.id == previous:
+        return row, None
+    return row, schedule_read_ahead(db, chapter=chapter, previous_chapter_id=previous)
+
+
+def schedule_read_ahead(
+    db: Session, *, chapter: Chapter, previous_chapter_id: int | None
+) -> ReadAhead:
+    """
+    Counts whether the chapter the reader moved to was translated already, then
+    queues read-ahead for the next READ_AHEAD_CHAPTERS untranslated chapters with raw
+    text (at most READ_AHEAD_MAX_ACTIVE queued or running per novel) and cancels the
+    novel's queued read-ahead outside that window. Nothing is queued while a range job
+    runs for the novel; it translates in order anyway.
+    """
+    jobs = job_repo.list_active_jobs_for_novel(db, chapter.novel_id)
+    pending = {j.chapter_id for j in jobs if j.chapter_id is not None}
+
+    followed = previous_chapter_id is not None and chapter.prev_chapter_id == previous_chapter_id
+    move = "next" if followed else "jump"
+    if chapter.status == "translated":
+        state = "ready"
+    else:
+        state = "pending" if chapter.id in pending else "missing"
+    READ_AHEAD_OPENS.labels(move, state).inc()
+
+    targets: list[int] = []
+    if settings.READ_AHEAD_CHAPTERS > 0:
+        ahead = chapter_repo.chapters_ahead(db, chapter.id, limit=settings.READ_AHEAD_SCAN)
+        targets = [r.id for r in ahead if r.status != "translated" and r.has_raw]
+        targets = targets[: settings.READ_AHEAD_CHAPTERS]
+
+    out = ReadAhead()
+    read_ahead = [j for j in jobs if j.kind == "read_ahead"]
+    # The chapter being read keeps its job: the reader is waiting for it now
+    keep = {*targets, chapter.id}
+    stale = [j.id for j in read_ahead if j.status == "queued" and j.chapter_id not in keep]
+    out.cancelled = job_repo.cancel_queued_jobs(db, stale)
+    READ_AHEAD_JOBS.labels("cancelled").inc(out.cancelled)
+
+    if any(j.kind == "translate_range" for j in jobs):
+        return out
+    active = len(read_ahead) - out.cancelled
+    for chapter_id in targets:
+        if active >= settings.READ_AHEAD_MAX_ACTIVE:
+            break
+        if chapter_id in pending:
+            continue
+        job_repo.create_job(
+            db, novel_id=chapter.novel_id, chapter_id=chapter_id, kind="read_ahead"
+        )
+        out.queued.append(chapter_id)
+        active += 1
+    READ_AHEAD_JOBS.labels("queued").inc(len(out.queued))
+    return out
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+# Helpers for forwarding a translation while the model is still writing it: the model
+# answers with a JSON object ({"translation": ..., "context_updates": ...}), streamed
+# in arbitrary pieces.
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+_SCAN, _AWAIT_VALUE, _VALUE, _DONE = range(4)
+
+
+def _hex(digits: str) -> int | None:
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def _unescape(buf: str, i: int) -> tuple[str, int]:
+    """
+    Decodes the escape sequence at buf[i] (a backslash): (text, characters used), or
+    ("", 0) when the sequence is not complete yet.
+    """
+    if i + 1 >= len(buf):
+        return "", 0
+    e = buf[i + 1]
+    if e != "u":
+        return _ESCAPES.get(e, e), 2
+    if i + 6 > len(buf):
+        return "", 0
+    code = _hex(buf[i + 2 : i + 6])
+    if code is None:
+        return buf[i + 2 : i + 6], 6
+    if 0xD800 <= code < 0xDC00:
+        # High surrogate: the low half follows as a second \uXXXX
+        follows = buf[i + 6 : i + 8]
+        if follows and not "\\u".startswith(follows):
+            return "\ufffd", 6
+        if i + 12 > len(buf):
+            return "", 0
+        low = _hex(buf[i + 8 : i + 12])
+        if low is not None and 0xDC00 <= low < 0xE000:
+            return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), 12
+        return "\ufffd", 6
+    return chr(code), 6
+
+
+class JsonStringField:
+    """
+    Decodes one string field of a streamed JSON object as it arrives: feed() takes the
+    next piece of the document and returns the field's newly decoded text. Only the
+    top-level `key` counts, so an equal key inside a nested object is ignored; a
+    non-string value yields nothing.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._buf = ""
+        self._state = _SCAN
+        self._depth = 0
+        self._in_string = False
+        self._token: list[str] = []
+        self._last_string: str | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, piece: str) -> str:
+        buf = self._buf + piece
+        out: list[str] = []
+        i, n = 0, len(buf)
+        while i < n and self._state != _DONE:
+            c = buf[i]
+            if self._state == _VALUE:
+                if c == '"':
+                    self._state = _DONE
+                    i += 1
+                elif c == "\\":
+                    text, used = _unescape(buf, i)
+                    if not used:
+                        break
+                    out.append(text)
+                    i += used
+                else:
+                    j = i
+                    while j < n and buf[j] not in '"\\':
+                        j += 1
+                    out.append(buf[i:j])
+                    i = j
+                continue
+
+            if self._state == _AWAIT_VALUE:
+                if not c.isspace():
+                    self._state = _VALUE if c == '"' else _DONE
+                i += 1
+                continue
+
+            if self._in_string:
+                if c == "\\":
+                    if i + 1 >= n:
+                        break
+                    self._token.append(buf[i : i + 2])
+                    i += 2
+                    continue
+                if c == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._token) if self._depth == 1 else None
+                else:
+                    self._token.append(c)
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._token = []
+            elif c == ":":
+                if self._depth == 1 and self._last_string == self.key:
+                    self._state = _AWAIT_VALUE
+                self._last_string = None
+            elif c in "{[":
+                self._depth += 1
+                self._last_string = None
+            elif c in "}]":
+                self._depth -= 1
+                self._last_string = None
+            elif c == ",":
+                self._last_string = None
+            i += 1
+
+        self._buf = buf[i:] if self._state != _DONE else ""
+        return "".join(out)
+
+
+class OrderedText:
+    """
+    Forwards text produced by parts that run concurrently (a chapter's segments) in
+    part order: the first unfinished part's text goes out as it arrives, later parts'
+    text is held until every part before them is finished.
+    """
+
+    def __init__(self, parts: int, emit: Callable[[str], None]):
+        self._emit = emit
+        self._held: list[list[str]] = [[] for _ in range(parts)]
+        self._finished = [False] * parts
+        self._head = 0
+
+    def add(self, part: int, text: str) -> None:
+        if not text:
+            return
+        if part == self._head:
+            self._emit(text)
+        else:
+            self._held[part].append(text)
+
+    def finish(self, part: int, tail: str = "") -> None:
+        """Marks `part` done; `tail` (e.g. its separator) follows the part's text."""
+        self.add(part, tail)
+        self._finished[part] = True
+        while self._head < len(self._finished) and self._finished[self._head]:
+            self._head += 1
+            if self._head < len(self._held):
+                for text in self._held[self._head]:
+                    self._emit(text)
+                self._held[self._head].clear()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+from typing import Any
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of terms.
+
+    `count(text)` walks the text once and returns how many times each term occurs
+    (overlapping matches included), regardless of how many terms there are.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms: list[str] = sorted({t for t in terms if t})
+
+        # Trie as parallel arrays: goto transitions, failure links, output term ids.
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+
+        for term_id, term in enumerate(self.terms):
+            node = 0
+            for ch in term:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(term_id)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue: deque[int] = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                # Inherit matches that end at the failure state (suffix terms)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def count(self, text: str) -> dict[str, int]:
+        hits: dict[int, int] = {}
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text or "":
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for term_id in out[node]:
+                hits[term_id] = hits.get(term_id, 0) + 1
+        return {self.terms[i]: n for i, n in hits.items()}
+
+
+def context_terms(ctx: dict[str, Any]) -> frozenset[str]:
+    terms: set[str] = set()
+    for e in ctx.get("locks") or []:
+        if isinstance(e, dict) and isinstance(e.get("src"), str):
+            terms.add(e["src"])
+    for e in (ctx.get("canon") or {}).get("entities") or []:
+        if isinstance(e, dict) and isinstance(e.get("src"), str):
+            terms.add(e["src"])
+    return frozenset(terms)
+
+
+_CACHE_MAX_NOVELS = 32
+_cache: OrderedDict[int, tuple[frozenset[str], TermMatcher]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def matcher_for_context(novel_id: int, ctx: dict[str, Any]) -> TermMatcher:
+    """
+    Returns the novel's cached matcher, rebuilding it only when the set of context terms
+    changed (count/last_seen updates leave it valid).
+    """
+    terms = context_terms(ctx)
+    with _cache_lock:
+        cached = _cache.get(novel_id)
+        if cached and cached[0] == terms:
+            _cache.move_to_end(novel_id)
+            return cached[1]
+
+    matcher = TermMatcher(terms)
+    with _cache_lock:
+        _cache[novel_id] = (terms, matcher)
+        _cache.move_to_end(novel_id)
+        while len(_cache) > _CACHE_MAX_NOVELS:
+            _cache.popitem(last=False)
+    return matcher
+
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+from functools import lru_cache
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Encoding used by the gpt-4o / gpt-4.1 model family.
+ENCODING_NAME = "o200k_base"
+
+_encoder: Any = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder() -> Any:
+    """
+    tiktoken encoder, loaded once. tiktoken is optional and downloads its BPE file on
+    first use; when it is missing or cannot load, estimates fall back to a heuristic.
+    """
+    global _encoder, _encoder_loaded
+    if _encoder_loaded:
+        return _encoder
+    with _encoder_lock:
+        if not _encoder_loaded:
+            try:
+                import tiktoken
+
+                _encoder = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:  # ImportError, network errors, ...
+                logger.info("tiktoken unavailable (%s); using heuristic token counts", e)
+                _encoder = None
+            _encoder_loaded = True
+    return _encoder
+
+
+def _is_cjk(ch: str) -> bool:
+    o = ord(ch)
+    return (
+        0xAC00 <= o <= 0xD7A3  # Hangul syllables
+        or 0x1100 <= o <= 0x11FF  # Hangul jamo
+        or 0x3130 <= o <= 0x318F  # Hangul compatibility jamo
+        or 0x3040 <= o <= 0x30FF  # Hiragana / Katakana
+        or 0x4E00 <= o <= 0x9FFF  # CJK unified ideographs
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough count without a tokenizer: ~1 token per CJK char, ~4 chars per token otherwise."""
+    cjk = sum(1 for ch in text if _is_cjk(ch))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def count_tokens(text: str | None) -> int:
+    if not text:
+        return 0
+    enc = _get_encoder()
+    if enc is None:
+        return estimate_tokens(text)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=65536)
+def _cached_count(serialized: str) -> int:
+    return count_tokens(serialized)
+
+
+def json_tokens(value: Any) -> int:
+    """
+    Tokens of `value` as serialized into the prompt payload. Cached by the serialized
+    form, so unchanged context entries are only tokenized once per process.
+    """
+    return _cached_count(json.dumps(value, ensure_ascii=False))
@@ -1,17 +1,118 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import copy
+import heapq
 import json
-from datetime import datetime, timezone
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from types import SimpleNamespace
 from typing import Any, cast
 
-from openai import OpenAI
-from sqlalchemy.orm import Session
+from openai import AsyncOpenAI, OpenAI
+from sqlalchemy.orm import Session, undefer_group
 
 from app.core.config import settings
-from app.models.chapter import Chapter
+from app.core.metrics import observe_usage, stage_timer
+from app.models.chapter import BODY, Chapter
 from app.models.novel import Novel
+from app.repos import context as context_repo
+from app.services.alignment import (
+    Hunk,
+    IncrementalPlan,
+    build_alignment,
+    plan_incremental,
+    splice,
+)
+from app.services.chunking import Segment, split_segments, stitch_segments
+from app.services.hedging import AsyncHedgedClient, HedgedClient, HedgePolicy
+from app.services.llm_stub import AsyncStubOpenAI, StubOpenAI
+from app.services.rate_limit import (
+    AsyncRateLimitedClient,
+    RateLimitedClient,
+    RateLimiter,
+    RetryPolicy,
+)
+from app.services.streaming import JsonStringField, OrderedText
+from app.services.term_matcher import TermMatcher, context_terms, matcher_for_context
+from app.services.tokens import count_tokens, json_tokens
+from app.services.translation_cache import acached_translate, cached_translate
+from app.services.translation_memory import plan_from_memory, remember
+from app.services.usage import (
+    Attempt,
+    arecord_paid,
+    current_attempt,
+    mark_applied,
+    paying_for,
+    record_paid,
+    record_paid_nowait,
+)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+_stub_options: dict[str, Any] = {
+    "latency_ms": settings.STUB_LATENCY_MS,
+    "ms_per_token": settings.STUB_MS_PER_TOKEN,
+    "error_rate": settings.STUB_ERROR_RATE,
+    "tail_rate": settings.STUB_TAIL_RATE,
+    "tail_ms": settings.STUB_TAIL_MS,
+}
+# The SDK's own retries are off: RateLimitedClient retries, and counts the attempts
+# against the shared RPM/TPM budgets.
+limiter = RateLimiter(rpm=settings.OPENAI_RPM, tpm=settings.OPENAI_TPM)
+retry_policy = RetryPolicy(
+    max_retries=settings.OPENAI_MAX_RETRIES,
+    base_s=settings.OPENAI_RETRY_BASE_S,
+    max_s=settings.OPENAI_RETRY_MAX_S,
+)
+# Hedges go around the limiter: a second request takes its own RPM/TPM budget
+hedge_policy = HedgePolicy(
+    percentile=settings.OPENAI_HEDGE_PERCENTILE,
+    max_rate=settings.OPENAI_HEDGE_MAX_RATE,
+    min_samples=settings.OPENAI_HEDGE_MIN_SAMPLES,
+)
+
+
+def _hedge_abandoned(resp: Any) -> None:
+    # A losing hedge request that completed was billed like the winner: recorded as a
+    # call of its own (never applied) for the attempt it was made for
+    usage = _usage_dict(resp)
+    observe_usage(usage)
+    attempt = current_attempt()
+    if attempt is not None:
+        record_paid_nowait(attempt, usage=usage, model=getattr(resp, "model", None))
+
+
+client: Any = HedgedClient(
+    RateLimitedClient(
+        StubOpenAI(**_stub_options)
+        if settings.OPENAI_STUB
+        else OpenAI(
+            api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL, max_retries=0
+        ),
+        limiter,
+        retry_policy,
+    ),
+    hedge_policy,
+    on_abandoned=_hedge_abandoned,
+)
+# Same, for the async request path (settings.ASYNC_MODE)
+async_client: Any = AsyncHedgedClient(
+    AsyncRateLimitedClient(
+        AsyncStubOpenAI(**_stub_options)
+        if settings.OPENAI_STUB
+        else AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL, max_retries=0
+        ),
+        limiter,
+        retry_policy,
+    ),
+    hedge_policy,
+    on_abandoned=_hedge_abandoned,
+)
 
 # Context is NOT a glossary.
 # It is "consistency memory": canon entities, locked renderings, and style rules.
@@ -65,6 +166,24 @@ def _deep_merge(dst: dict[str, Any], patch: dict[str, Any]) -> dict[str, Any]:
     return dst
 
 
+def _lock_index(locks: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    index: dict[str, dict[str, Any]] = {}
+    for entry in locks:
+        src = entry.get("src")
+        if isinstance(src, str):
+            index.setdefault(src, entry)
+    return index
+
+
+def _entity_index(entities: list[dict[str, Any]]) -> dict[tuple[str, str], dict[str, Any]]:
+    index: dict[tuple[str, str], dict[str, Any]] = {}
+    for e in entities:
+        etype, src = e.get("type"), e.get("src")
+        if isinstance(etype, str) and isinstance(src, str):
+            index.setdefault((etype, src), e)
+    return index
+
+
 def _upsert_lock(
     ctx: dict[str, Any],
     *,
@@ -72,35 +191,43 @@ def _upsert_lock(
     dst: str,
     reason: str,
     chapter_no: int,
+    index: dict[str, dict[str, Any]] | None = None,
 ) -> None:
+    """
+    `index` maps src -> lock entry (see _lock_index). Pass it when upserting many
+    terms so each lookup is O(1); it is kept in sync with appended entries.
+    """
     locks: list[dict[str, Any]] = cast(list[dict[str, Any]], ctx.setdefault("locks", []))
-    for entry in locks:
-        if entry.get("src") == src:
-            if entry.get("dst") == dst:
-                entry["count"] = int(entry.get("count", 1)) + 1
-                entry["last_seen_chapter"] = chapter_no
-            else:
-                conflicts = entry.setdefault("conflicts", [])
-                conflicts.append(
-                    {
-                        "dst": dst,
-                        "reason": reason,
-                        "chapter_no": chapter_no,
-                        "at": datetime.now(timezone.utc).isoformat(),
-                    }
-                )
-                entry["last_seen_chapter"] = chapter_no
-            return
-
-    locks.append(
-        {
-            "src": src,
-            "dst": dst,
-            "reason": reason,
-            "count": 1,
-            "last_seen_chapter": chapter_no,
-        }
-    )
+    if index is None:
+        index = _lock_index(locks)
+
+    entry = index.get(src)
+    if entry is not None:
+        if entry.get("dst") == dst:
+            entry["count"] = int(entry.get("count", 1)) + 1
+            entry["last_seen_chapter"] = chapter_no
+        else:
+            conflicts = entry.setdefault("conflicts", [])
+            conflicts.append(
+                {
+                    "dst": dst,
+                    "reason": reason,
+                    "chapter_no": chapter_no,
+                    "at": datetime.now(UTC).isoformat(),
+                }
+            )
+            entry["last_seen_chapter"] = chapter_no
+        return
+
+    entry = {
+        "src": src,
+        "dst": dst,
+        "reason": reason,
+        "count": 1,
+        "last_seen_chapter": chapter_no,
+    }
+    locks.append(entry)
+    index[src] = entry
 
 
 def _upsert_entity(
@@ -110,36 +237,74 @@ def _upsert_entity(
     src: str,
     dst: str,
     chapter_no: int,
+    index: dict[tuple[str, str], dict[str, Any]] | None = None,
 ) -> None:
+    """`index` maps (type, src) -> entity entry (see _entity_index)."""
     canon = cast(dict[str, Any], ctx.setdefault("canon", {}))
     entities: list[dict[str, Any]] = cast(list[dict[str, Any]], canon.setdefault("entities", []))
+    if index is None:
+        index = _entity_index(entities)
 
-    for e in entities:
-        if e.get("type") == etype and e.get("src") == src:
-            if e.get("dst") == dst:
-                e["count"] = int(e.get("count", 1)) + 1
-                e["last_seen_chapter"] = chapter_no
-            else:
-                conflicts = e.setdefault("conflicts", [])
-                conflicts.append(
-                    {
-                        "dst": dst,
-                        "chapter_no": chapter_no,
-                        "at": datetime.now(timezone.utc).isoformat(),
-                    }
-                )
-                e["last_seen_chapter"] = chapter_no
-            return
-
-    entities.append(
-        {
-            "type": etype,
-            "src": src,
-            "dst": dst,
-            "count": 1,
-            "last_seen_chapter": chapter_no,
-        }
-    )
+    e = index.get((etype, src))
+    if e is not None:
+        if e.get("dst") == dst:
+            e["count"] = int(e.get("count", 1)) + 1
+            e["last_seen_chapter"] = chapter_no
+        else:
+            conflicts = e.setdefault("conflicts", [])
+            conflicts.append(
+                {
+                    "dst": dst,
+                    "chapter_no": chapter_no,
+                    "at": datetime.now(UTC).isoformat(),
+                }
+            )
+            e["last_seen_chapter"] = chapter_no
+        return
+
+    e = {
+        "type": etype,
+        "src": src,
+        "dst": dst,
+        "count": 1,
+        "last_seen_chapter": chapter_no,
+    }
+    entities.append(e)
+    index[(etype, src)] = e
+
+
+def iter_lock_updates(updates: dict[str, Any] | None) -> list[tuple[str, str, str]]:
+    """Valid (src, dst, reason) triples from a model's context_updates.locks_add."""
+    out: list[tuple[str, str, str]] = []
+    locks_add = (updates or {}).get("locks_add") or []
+    if not isinstance(locks_add, list):
+        return out
+    for item in locks_add:
+        if not isinstance(item, dict):
+            continue
+        src = item.get("src")
+        dst = item.get("dst")
+        reason = item.get("reason") or "recurring term"
+        if isinstance(src, str) and isinstance(dst, str) and src.strip() and dst.strip():
+            out.append((src.strip(), dst.strip(), str(reason)))
+    return out
+
+
+def iter_entity_updates(updates: dict[str, Any] | None) -> list[tuple[str, str, str]]:
+    """Valid (type, src, dst) triples from a model's context_updates.entities_add."""
+    out: list[tuple[str, str, str]] = []
+    entities_add = (updates or {}).get("entities_add") or []
+    if not isinstance(entities_add, list):
+        return out
+    for item in entities_add:
+        if not isinstance(item, dict):
+            continue
+        etype = item.get("type") or "other"
+        src = item.get("src")
+        dst = item.get("dst")
+        if isinstance(src, str) and isinstance(dst, str) and src.strip() and dst.strip():
+            out.append((str(etype), src.strip(), dst.strip()))
+    return out
 
 
 def merge_context_updates(
@@ -151,49 +316,64 @@ def merge_context_updates(
     ctx = _normalize_context(existing)
     updates = dict(updates or {})
 
-    locks_add = updates.get("locks_add") or []
-    if isinstance(locks_add, list):
-        for item in locks_add:
-            if not isinstance(item, dict):
-                continue
-            src = item.get("src")
-            dst = item.get("dst")
-            reason = item.get("reason") or "recurring term"
-            if isinstance(src, str) and isinstance(dst, str) and src.strip() and dst.strip():
-                _upsert_lock(
-                    ctx,
-                    src=src.strip(),
-                    dst=dst.strip(),
-                    reason=str(reason),
-                    chapter_no=chapter_no,
-                )
-
-    entities_add = updates.get("entities_add") or []
-    if isinstance(entities_add, list):
-        for item in entities_add:
-            if not isinstance(item, dict):
-                continue
-            etype = item.get("type") or "other"
-            src = item.get("src")
-            dst = item.get("dst")
-            if isinstance(src, str) and isinstance(dst, str) and src.strip() and dst.strip():
-                _upsert_entity(
-                    ctx,
-                    etype=str(etype),
-                    src=src.strip(),
-                    dst=dst.strip(),
-                    chapter_no=chapter_no,
-                )
+    # Index once per merge so k updates against n entries cost O(n + k), not O(n * k)
+    lock_updates = iter_lock_updates(updates)
+    if lock_updates:
+        lock_index = _lock_index(cast(list[dict[str, Any]], ctx["locks"]))
+        for src, dst, reason in lock_updates:
+            _upsert_lock(
+                ctx, src=src, dst=dst, reason=reason, chapter_no=chapter_no, index=lock_index
+            )
+
+    entity_updates = iter_entity_updates(updates)
+    if entity_updates:
+        entity_index = _entity_index(cast(list[dict[str, Any]], ctx["canon"]["entities"]))
+        for etype, src, dst in entity_updates:
+            _upsert_entity(
+                ctx, etype=etype, src=src, dst=dst, chapter_no=chapter_no, index=entity_index
+            )
 
     style_patch = updates.get("style_patch")
     if isinstance(style_patch, dict):
         style = cast(dict[str, Any], ctx.setdefault("style", {}))
         _deep_merge(style, cast(dict[str, Any], style_patch))
 
-    ctx["updated_at"] = datetime.now(timezone.utc).isoformat()
+    ctx["updated_at"] = datetime.now(UTC).isoformat()
     return ctx
 
 
+def merge_segment_updates(updates: list[dict[str, Any] | None]) -> dict[str, Any]:
+    """
+    Combines the context_updates of a chapter's segments into one, in segment order:
+    repeated identical proposals are kept once (so splitting a chapter does not inflate
+    counts), differing renderings of a src are all kept for the normal conflict handling,
+    and style patches are deep-merged with later segments winning.
+    """
+    locks: list[dict[str, Any]] = []
+    entities: list[dict[str, Any]] = []
+    style: dict[str, Any] = {}
+    seen_locks: set[tuple[str, str]] = set()
+    seen_entities: set[tuple[str, str, str]] = set()
+
+    for u in updates:
+        for src, dst, reason in iter_lock_updates(u):
+            if (src, dst) not in seen_locks:
+                seen_locks.add((src, dst))
+                locks.append({"src": src, "dst": dst, "reason": reason})
+        for etype, src, dst in iter_entity_updates(u):
+            if (etype, src, dst) not in seen_entities:
+                seen_entities.add((etype, src, dst))
+                entities.append({"type": etype, "src": src, "dst": dst})
+        style_patch = (u or {}).get("style_patch")
+        if isinstance(style_patch, dict):
+            _deep_merge(style, style_patch)
+
+    merged: dict[str, Any] = {"locks_add": locks, "entities_add": entities}
+    if style:
+        merged["style_patch"] = style
+    return merged
+
+
 def build_context_slice(
     ctx: dict[str, Any],
     *,
@@ -203,24 +383,49 @@ def build_context_slice(
     min_count: int = 3,
     max_locks: int = 200,
     max_entities: int = 300,
+    matcher: TermMatcher | None = None,
+    token_budget: int | None = None,
+    prefix_min_count: int | None = None,
+    prefix_max_tokens: int | None = None,
+    stats: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     """
     Build a bounded "slice" of context to send to the model to reduce token cost.
     Prioritizes:
-      - matches present in raw_text
+      - matches present in raw_text (more occurrences first)
       - recent items (last_seen within window)
       - frequent items (count)
+
+    `matcher` should come from matcher_for_context() so the automaton is reused across
+    chapters; without it one is built for this call.
+
+    With `token_budget`, entries (locks and entities together) are taken greedily by
+    score while their serialized size fits the budget; max_locks / max_entities still
+    cap each list.
+
+    Entries seen in at least `prefix_min_count` chapters (default
+    settings.CONTEXT_PREFIX_MIN_COUNT, 0 = off) also go to the front of the lists, in
+    canonical order, as a prefix that is the same for every chapter of the novel (see
+    _context_prefix); slice["prefix"] holds how many locks/entities it has. The prefix
+    counts against max_locks / max_entities and `token_budget` like any other entry
+    (and takes at most half of the budget); the scored entries fill what it leaves.
+
+    If `stats` is given it is filled with slice_tokens, context_tokens (all candidate
+    entries, what the slice would cost without caps or budget), prefix_tokens,
+    chapter_tokens, candidates, items_dropped and token_budget.
     """
     ctx = _normalize_context(ctx)
-    raw = raw_text or ""
+    if matcher is None:
+        matcher = TermMatcher(context_terms(ctx))
+    hits = matcher.count(raw_text or "")
 
-    def score(entry: dict[str, Any]) -> tuple[int, int, int]:
-        src = str(entry.get("src", ""))
-        is_match = 1 if (src and src in raw) else 0
+    def score(entry: dict[str, Any]) -> tuple[int, int, int, int]:
+        occurrences = hits.get(str(entry.get("src", "")), 0)
+        is_match = 1 if occurrences else 0
         last_seen = int(entry.get("last_seen_chapter") or 0)
         recency = max(0, recent_window - (chapter_no - last_seen))
         count = int(entry.get("count") or 0)
-        return (is_match, recency, count)
+        return (is_match, occurrences, recency, count)
 
     locks = [e for e in (ctx.get("locks") or []) if isinstance(e, dict)]
     locks = [
@@ -230,7 +435,6 @@ def build_context_slice(
         or (chapter_no - int(e.get("last_seen_chapter") or 0)) <= recent_window
     ]
     locks.sort(key=score, reverse=True)
-    locks = locks[:max_locks]
 
     entities = [e for e in (ctx.get("canon", {}).get("entities") or []) if isinstance(e, dict)]
     entities = [
@@ -240,14 +444,178 @@ def build_context_slice(
         or (chapter_no - int(e.get("last_seen_chapter") or 0)) <= recent_window
     ]
     entities.sort(key=score, reverse=True)
-    entities = entities[:max_entities]
 
-    return {
+    candidates = len(locks) + len(entities)
+    base = {
         "version": ctx.get("version", 1),
         "style": ctx.get("style", {}),
-        "locks": locks,
-        "canon": {"entities": entities},
+        "locks": [],
+        "canon": {"entities": []},
     }
+    base_tokens = json_tokens(base)
+    if stats is not None:
+        stats["context_tokens"] = base_tokens + sum(
+            _entry_cost(e) for e in (*locks, *entities)
+        )
+
+    budget = None if token_budget is None else token_budget - base_tokens
+    if prefix_max_tokens is None:
+        prefix_max_tokens = settings.CONTEXT_PREFIX_MAX_TOKENS
+    prefix_locks, prefix_entities = _context_prefix(
+        locks,
+        entities,
+        min_count=(
+            settings.CONTEXT_PREFIX_MIN_COUNT if prefix_min_count is None else prefix_min_count
+        ),
+        max_tokens=prefix_max_tokens if budget is None else min(prefix_max_tokens, budget // 2),
+        max_locks=max_locks,
+        max_entities=max_entities,
+    )
+    prefix_tokens = sum(_entry_cost(e) for e in (*prefix_locks, *prefix_entities))
+    if prefix_locks or prefix_entities:
+        shared = {id(e) for e in (*prefix_locks, *prefix_entities)}
+        locks = [e for e in locks if id(e) not in shared]
+        entities = [e for e in entities if id(e) not in shared]
+        base["prefix"] = {"locks": len(prefix_locks), "entities": len(prefix_entities)}
+
+    # The prefix is part of the slice: the scored entries get what it leaves of the caps
+    # and the budget
+    max_locks -= len(prefix_locks)
+    max_entities -= len(prefix_entities)
+    if budget is None:
+        locks = locks[:max_locks]
+        entities = entities[:max_entities]
+    else:
+        locks, entities = _fill_token_budget(
+            locks,
+            entities,
+            key=score,
+            budget=budget - prefix_tokens,
+            max_locks=max_locks,
+            max_entities=max_entities,
+        )
+    locks = prefix_locks + locks
+    entities = prefix_entities + entities
+
+    if stats is not None:
+        stats.update(
+            slice_tokens=base_tokens + sum(_entry_cost(e) for e in (*locks, *entities)),
+            prefix_tokens=prefix_tokens,
+            chapter_tokens=count_tokens(raw_text),
+            candidates=candidates,
+            items_dropped=candidates - len(locks) - len(entities),
+            token_budget=token_budget,
+        )
+
+    base["locks"] = locks
+    base["canon"] = {"entities": entities}
+    return base
+
+
+def _context_prefix(
+    locks: list[dict[str, Any]],
+    entities: list[dict[str, Any]],
+    *,
+    min_count: int,
+    max_tokens: int,
+    max_locks: int,
+    max_entities: int,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    The chapter-independent part of a slice: entries with count >= `min_count`, most
+    frequent first while they fit `max_tokens` and the per-list caps.
+
+    Order is what keeps the prefix cacheable: entries are grouped into count tiers that
+    double from `min_count` (5-9, 10-19, 20-39, ...), highest tier first, by src within
+    a tier. An entry joining or moving up only changes the prefix from its tier on,
+    and the churn is in the low tiers at the end; the frequent head stays identical.
+    """
+    if min_count <= 0:
+        return [], []
+
+    def tier(entry: dict[str, Any]) -> int:
+        return (int(entry.get("count") or 0) // min_count).bit_length()
+
+    tagged = [
+        (kind, e)
+        for kind, entries in ((0, locks), (1, entities))
+        for e in entries
+        if int(e.get("count") or 0) >= min_count
+    ]
+    tagged.sort(key=lambda t: (-int(t[1].get("count") or 0), t[0], _canonical_key(t[1])))
+    picked: tuple[list[dict[str, Any]], list[dict[str, Any]]] = ([], [])
+    caps = (max_locks, max_entities)
+    remaining = max_tokens
+    for kind, entry in tagged:
+        if len(picked[kind]) >= caps[kind]:
+            continue
+        cost = _entry_cost(entry)
+        if cost > remaining:
+            continue
+        picked[kind].append(entry)
+        remaining -= cost
+
+    def order(entry: dict[str, Any]) -> tuple[int, tuple[str, str, str]]:
+        return (-tier(entry), _canonical_key(entry))
+
+    return sorted(picked[0], key=order), sorted(picked[1], key=order)
+
+
+def _canonical_key(entry: dict[str, Any]) -> tuple[str, str, str]:
+    return (str(entry.get("src", "")), str(entry.get("type") or ""), str(entry.get("dst", "")))
+
+
+# The fields of a lock/entity the model needs; bookkeeping (count, last_seen_chapter,
+# conflicts) changes every chapter and would break the shared prompt prefix.
+RENDERING_FIELDS = ("type", "src", "dst", "reason")
+
+
+def _rendered(entry: dict[str, Any]) -> dict[str, Any]:
+    return {k: entry[k] for k in RENDERING_FIELDS if entry.get(k) is not None}
+
+
+def resolve_token_budget(token_budget: int | None = None) -> int | None:
+    """Explicit budget, else settings.CONTEXT_TOKEN_BUDGET; None when budgeting is off."""
+    if token_budget is None:
+        token_budget = settings.CONTEXT_TOKEN_BUDGET
+    return token_budget if token_budget > 0 else None
+
+
+def _entry_cost(entry: dict[str, Any]) -> int:
+    return json_tokens(_rendered(entry)) + 1  # + list separator
+
+
+def _fill_token_budget(
+    locks: list[dict[str, Any]],
+    entities: list[dict[str, Any]],
+    *,
+    key: Callable[[dict[str, Any]], tuple[int, ...]],
+    budget: int,
+    max_locks: int,
+    max_entities: int,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Greedy fill by score over both (score-sorted) lists. An entry that does not fit is
+    skipped, so smaller lower-ranked entries can still use the remaining budget.
+    """
+    tagged = heapq.merge(
+        ((key(e), 0, e) for e in locks),
+        ((key(e), 1, e) for e in entities),
+        key=lambda t: t[0],
+        reverse=True,
+    )
+    picked: tuple[list[dict[str, Any]], list[dict[str, Any]]] = ([], [])
+    caps = (max_locks, max_entities)
+    remaining = budget
+    for _, kind, entry in tagged:
+        if len(picked[kind]) >= caps[kind]:
+            continue
+        cost = _entry_cost(entry)
+        if cost > remaining:
+            continue
+        picked[kind].append(entry)
+        remaining -= cost
+    return picked
 
 
 def prune_context_in_db(
@@ -291,103 +659,994 @@ def prune_context_in_db(
 # --- OpenAI call + chapter translate ------------------------------------------
 
 
-def translate_text_with_context(
+# Static instructions sent with the shared part of every request
+CONSTRAINTS = [
+    "Follow the locks and canon entities of context_memory and chapter_memory exactly when "
+    "they match.",
+    "Propose updates only for recurring names/items/skills/factions/places/titles/jargon.",
+    "Do not add common words.",
+]
+
+
+def _request_messages(
     *,
     novel_id: int,
     source_lang: str,
     target_lang: str,
     text: str,
     context: dict[str, Any],
-) -> dict[str, Any]:
-    payload = {
+    surrounding: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Laid out for provider prompt caching, which reuses the longest previously seen
+    prompt prefix. The system prompt and a first user message with what is the same
+    for every chapter of the novel (languages, style, the context prefix, constraints)
+    serialize byte-identically across chapters; the chapter's own terms, any
+    surrounding text and the text itself follow in a second message.
+    """
+    context = context or {}
+    prefix = context.get("prefix") or {}
+    n_locks = int(prefix.get("locks") or 0)
+    n_entities = int(prefix.get("entities") or 0)
+    locks = [_rendered(e) for e in context.get("locks") or []]
+    entities = [_rendered(e) for e in (context.get("canon") or {}).get("entities") or []]
+
+    shared = {
         "novel_id": novel_id,
         "source_lang": source_lang,
         "target_lang": target_lang,
-        "text": text,
-        "context_memory": context or {},
-        "constraints": [
-            "Follow context_memory.locks and context_memory.canon.entities exactly when they match.",
-            "Propose updates only for recurring names/items/skills/factions/places/titles/jargon.",
-            "Do not add common words.",
-        ],
+        "context_memory": {
+            "version": context.get("version", 1),
+            "style": context.get("style") or {},
+            "locks": locks[:n_locks],
+            "canon": {"entities": entities[:n_entities]},
+        },
+        "constraints": CONSTRAINTS,
     }
+    chapter: dict[str, Any] = {
+        "chapter_memory": {"locks": locks[n_locks:], "canon": {"entities": entities[n_entities:]}},
+    }
+    if surrounding:
+        chapter["surrounding"] = surrounding
+        chapter["constraints"] = [
+            "Translate only `text`. `surrounding` is neighbouring text (with its existing "
+            "translation) for reference; keep the translation consistent with it."
+        ]
+    chapter["text"] = text
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(shared, ensure_ascii=False)},
+        {"role": "user", "content": json.dumps(chapter, ensure_ascii=False)},
+    ]
 
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        temperature=0.2,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
-        ],
-        response_format={"type": "json_object"},
+
+def chat_request(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    surrounding: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """The chat completion request body of one translate call (also written by batch export)."""
+    return {
+        "model": settings.OPENAI_MODEL,
+        "temperature": 0.2,
+        "messages": _request_messages(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+            surrounding=surrounding,
+        ),
+        "response_format": {"type": "json_object"},
+    }
+
+
+def call_overhead_tokens(context: dict[str, Any]) -> int:
+    """Prompt tokens every model call with this context repeats besides its text."""
+    messages = _request_messages(
+        novel_id=0, source_lang="", target_lang="", text="", context=context
     )
+    return sum(count_tokens(m["content"]) for m in messages)
+
 
+def _parse_response(resp: Any) -> dict[str, Any]:
     data = json.loads(resp.choices[0].message.content)
     if not isinstance(data, dict):
         raise ValueError("Model returned non-object JSON")
+    data["usage"] = _usage_dict(resp)
+    observe_usage(data["usage"])
     return cast(dict[str, Any], data)
 
 
-def translate_chapter(
+def translate_text_with_context(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    surrounding: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    One model call. `surrounding` ({"before": [...], "after": [...]} of {"raw",
+    "translation"} pairs) is reference text around `text` when only part of a chapter
+    is being translated.
+    """
+    resp = client.chat.completions.create(
+        **chat_request(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+            surrounding=surrounding,
+        )
+    )
+    return _parse_response(resp)
+
+
+async def atranslate_text_with_context(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    surrounding: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """translate_text_with_context() on the async client."""
+    resp = await async_client.chat.completions.create(
+        **chat_request(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+            surrounding=surrounding,
+        )
+    )
+    return _parse_response(resp)
+
+
+async def astream_text_with_context(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    on_text: Callable[[str], None],
+) -> dict[str, Any]:
+    """
+    atranslate_text_with_context() in the model's streaming mode: `on_text` receives
+    the translation piece by piece as the model writes it, and the parsed result
+    (context_updates, usage) is returned once the stream ends.
+    """
+    stream = await async_client.chat.completions.create(
+        **chat_request(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+        ),
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    field = JsonStringField("translation")
+    content: list[str] = []
+    usage = None
+    async for chunk in stream:
+        # Only the last chunk has usage (include_usage), with no choices
+        usage = getattr(chunk, "usage", None) or usage
+        for choice in chunk.choices:
+            piece = getattr(choice.delta, "content", None)
+            if piece:
+                content.append(piece)
+                translated = field.feed(piece)
+                if translated:
+                    on_text(translated)
+    message = SimpleNamespace(content="".join(content))
+    return _parse_response(SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage))
+
+
+def _combine_results(
+    results: list[dict[str, Any]],
+) -> tuple[list[str], dict[str, Any], dict[str, int]]:
+    """Per-part translations, merged context_updates and summed usage."""
+    translations: list[str] = []
+    updates: list[dict[str, Any] | None] = []
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    for r in results:
+        translation, context_updates = validate_translation_result(r)
+        translations.append(translation)
+        updates.append(context_updates)
+        for k in usage:
+            usage[k] += int((r.get("usage") or {}).get(k, 0))
+    return translations, merge_segment_updates(updates), usage
+
+
+def _map_in_context(
+    pool: ThreadPoolExecutor, fn: Callable[[Any], dict[str, Any]], items: list[Any]
+) -> list[dict[str, Any]]:
+    """pool.map(), with each call in a copy of the caller's context (see paying_for)."""
+    futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [f.result() for f in futures]
+
+
+async def _gather_limited(calls: list[Callable[[], Awaitable[Any]]], limit: int) -> list[Any]:
+    """Runs the calls concurrently, at most `limit` at a time, results in order."""
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def run(call: Callable[[], Awaitable[Any]]) -> Any:
+        async with sem:
+            return await call()
+
+    return list(await asyncio.gather(*(run(c) for c in calls)))
+
+
+def translate_text_segmented(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    segment_tokens: int | None = None,
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """
+    Same result shape as translate_text_with_context, but a text longer than
+    `segment_tokens` (default settings.TRANSLATE_SEGMENT_TOKENS, 0 = off) is split at
+    paragraph boundaries and the segments are translated concurrently with the same
+    context slice. Translations are stitched back in order and the segments'
+    context_updates merged with merge_segment_updates(). Any failed segment fails
+    the whole text.
+    """
+    if segment_tokens is None:
+        segment_tokens = settings.TRANSLATE_SEGMENT_TOKENS
+    segments = split_segments(text, segment_tokens) if segment_tokens > 0 else []
+    if len(segments) <= 1:
+        return translate_text_with_context(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+        )
+
+    def translate_segment(segment: Segment) -> dict[str, Any]:
+        if not segment.text.strip():
+            return {"translation": segment.text, "context_updates": None}
+        return translate_text_with_context(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=segment.text,
+            context=context,
+        )
+
+    workers = min(max_workers or settings.TRANSLATE_SEGMENT_WORKERS, len(segments))
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="segment") as pool:
+        results = _map_in_context(pool, translate_segment, segments)
+    return _segmented_result(segments, results)
+
+
+async def atranslate_text_segmented(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    segment_tokens: int | None = None,
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """translate_text_segmented() on the async client (segments run as tasks)."""
+    if segment_tokens is None:
+        segment_tokens = settings.TRANSLATE_SEGMENT_TOKENS
+    segments = split_segments(text, segment_tokens) if segment_tokens > 0 else []
+    if len(segments) <= 1:
+        return await atranslate_text_with_context(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+        )
+
+    async def translate_segment(segment: Segment) -> dict[str, Any]:
+        if not segment.text.strip():
+            return {"translation": segment.text, "context_updates": None}
+        return await atranslate_text_with_context(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=segment.text,
+            context=context,
+        )
+
+    results = await _gather_limited(
+        [lambda seg=seg: translate_segment(seg) for seg in segments],
+        max_workers or settings.TRANSLATE_SEGMENT_WORKERS,
+    )
+    return _segmented_result(segments, results)
+
+
+async def astream_text_segmented(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    on_text: Callable[[str], None],
+    segment_tokens: int | None = None,
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """
+    atranslate_text_segmented() with streamed model calls. Segments still run
+    concurrently; `on_text` gets the text in chapter order (see OrderedText), so the
+    first segment is forwarded live and each later one once those before it are done.
+    """
+    if segment_tokens is None:
+        segment_tokens = settings.TRANSLATE_SEGMENT_TOKENS
+    segments = split_segments(text, segment_tokens) if segment_tokens > 0 else []
+    if len(segments) <= 1:
+        return await astream_text_with_context(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+            on_text=on_text,
+        )
+
+    ordered = OrderedText(len(segments), on_text)
+
+    async def translate_segment(i: int, segment: Segment) -> dict[str, Any]:
+        if not segment.text.strip():
+            result: dict[str, Any] = {"translation": segment.text, "context_updates": None}
+        else:
+            result = await astream_text_with_context(
+                novel_id=novel_id,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                text=segment.text,
+                context=context,
+                on_text=lambda piece: ordered.add(i, piece),
+            )
+        ordered.finish(i, segment.separator)
+        return result
+
+    results = await _gather_limited(
+        [lambda i=i, seg=seg: translate_segment(i, seg) for i, seg in enumerate(segments)],
+        max_workers or settings.TRANSLATE_SEGMENT_WORKERS,
+    )
+    return _segmented_result(segments, results)
+
+
+def _segmented_result(segments: list[Segment], results: list[dict[str, Any]]) -> dict[str, Any]:
+    translations, context_updates, usage = _combine_results(results)
+    return {
+        "translation": stitch_segments(segments, translations),
+        "context_updates": context_updates,
+        "usage": usage,
+        "segments": len(segments),
+        # (raw, translation) per segment, for the paragraph alignment
+        "units": [[seg.text, t] for seg, t in zip(segments, translations)],
+    }
+
+
+def plan_chapter_update(chapter: Chapter) -> IncrementalPlan | None:
+    """
+    Incremental plan for a translated chapter whose raw text was edited, or None when
+    the whole chapter should be translated (no alignment, nothing changed, or more
+    than INCREMENTAL_MAX_CHANGED_RATIO of the paragraphs changed).
+    """
+    if not chapter.content or not chapter.alignment or not chapter.raw:
+        return None
+    plan = plan_incremental(
+        chapter.alignment,
+        chapter.raw,
+        context_paragraphs=settings.INCREMENTAL_CONTEXT_PARAGRAPHS,
+    )
+    if plan is None or not plan.hunks:
+        return None
+    if plan.changed_paragraphs > settings.INCREMENTAL_MAX_CHANGED_RATIO * len(plan.paragraphs):
+        return None
+    return plan
+
+
+def translate_hunks(
+    plan: IncrementalPlan,
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    context: dict[str, Any],
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """
+    Translates only the plan's changed hunks (concurrently, each with its neighbouring
+    paragraphs for reference) and splices them between the kept translations.
+    Same result shape as translate_text_with_context, plus the new "alignment".
+    """
+
+    def translate_hunk(hunk: Hunk) -> dict[str, Any]:
+        if not hunk.text.strip():
+            return {"translation": "", "context_updates": None}
+        return translate_text_with_context(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=hunk.text,
+            context=context,
+            surrounding=_surrounding(hunk),
+        )
+
+    workers = min(max_workers or settings.TRANSLATE_SEGMENT_WORKERS, len(plan.hunks))
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="hunk") as pool:
+        results = _map_in_context(pool, translate_hunk, plan.hunks)
+    return _hunks_result(plan, results)
+
+
+async def atranslate_hunks(
+    plan: IncrementalPlan,
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    context: dict[str, Any],
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """translate_hunks() on the async client."""
+
+    async def translate_hunk(hunk: Hunk) -> dict[str, Any]:
+        if not hunk.text.strip():
+            return {"translation": "", "context_updates": None}
+        return await atranslate_text_with_context(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=hunk.text,
+            context=context,
+            surrounding=_surrounding(hunk),
+        )
+
+    results = await _gather_limited(
+        [lambda hunk=hunk: translate_hunk(hunk) for hunk in plan.hunks],
+        max_workers or settings.TRANSLATE_SEGMENT_WORKERS,
+    )
+    return _hunks_result(plan, results)
+
+
+def _surrounding(hunk: Hunk) -> dict[str, Any] | None:
+    # Without neighbours the request is a plain one (no surrounding block or constraint)
+    if not hunk.before and not hunk.after:
+        return None
+    return {"before": hunk.before, "after": hunk.after}
+
+
+def _hunks_result(plan: IncrementalPlan, results: list[dict[str, Any]]) -> dict[str, Any]:
+    translations, context_updates, usage = _combine_results(results)
+    content, alignment = splice(plan, translations)
+    return {
+        "translation": content,
+        "context_updates": context_updates,
+        "usage": usage,
+        "alignment": alignment,
+    }
+
+
+def translate_text(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    force: bool = False,
+) -> dict[str, Any]:
+    """
+    Entry point for chapter translation: translate_text_segmented() behind the
+    translation cache (see app.services.translation_cache). `force` skips the lookup
+    and refreshes the cached result.
+    """
+    return cached_translate(
+        lambda: translate_text_segmented(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+        ),
+        source_lang=source_lang,
+        target_lang=target_lang,
+        text=text,
+        context=context,
+        force=force,
+    )
+
+
+async def atranslate_text(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    force: bool = False,
+) -> dict[str, Any]:
+    """translate_text() on the async client and the async cache path."""
+    return await acached_translate(
+        lambda: atranslate_text_segmented(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+        ),
+        source_lang=source_lang,
+        target_lang=target_lang,
+        text=text,
+        context=context,
+        force=force,
+    )
+
+
+async def astream_text(
+    *,
+    novel_id: int,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any],
+    on_text: Callable[[str], None],
+    force: bool = False,
+) -> dict[str, Any]:
+    """atranslate_text() with streamed model calls; a cached result is forwarded whole."""
+    streamed = False
+
+    def forward(piece: str) -> None:
+        nonlocal streamed
+        streamed = True
+        on_text(piece)
+
+    result = await acached_translate(
+        lambda: astream_text_segmented(
+            novel_id=novel_id,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            text=text,
+            context=context,
+            on_text=forward,
+        ),
+        source_lang=source_lang,
+        target_lang=target_lang,
+        text=text,
+        context=context,
+        force=force,
+    )
+    if not streamed and isinstance(result.get("translation"), str):
+        on_text(result["translation"])
+    return result
+
+
+def _usage_dict(resp: Any) -> dict[str, int]:
+    """Token usage; cached_tokens is the part of prompt_tokens served from prompt cache."""
+    usage = getattr(resp, "usage", None)
+    # Not a typed field in every SDK version: then it is the raw dict
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    else:
+        cached = getattr(details, "cached_tokens", None)
+    return {
+        "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+        "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+        "cached_tokens": int(cached or 0),
+    }
+
+
+def validate_translation_result(result: dict[str, Any]) -> tuple[str, dict[str, Any] | None]:
+    translation = result.get("translation")
+    context_updates = result.get("context_updates")
+
+    if not isinstance(translation, str):
+        raise ValueError("Model returned invalid schema: translation must be string")
+    if context_updates is not None and not isinstance(context_updates, dict):
+        raise ValueError("Model returned invalid schema: context_updates must be object")
+    return translation, cast(dict[str, Any] | None, context_updates)
+
+
+def store_context_updates(
+    db: Session,
+    *,
+    novel_id: int,
+    updates: dict[str, Any] | None,
+    chapter_no: int,
+) -> None:
+    """
+    Persists a chapter's context_updates incrementally: only the proposed locks/entities
+    are upserted, and the novel row is locked only when there is a style patch.
+    """
+    context_repo.upsert_locks(
+        db, novel_id=novel_id, items=iter_lock_updates(updates), chapter_no=chapter_no
+    )
+    context_repo.upsert_entities(
+        db, novel_id=novel_id, items=iter_entity_updates(updates), chapter_no=chapter_no
+    )
+
+    style_patch = (updates or {}).get("style_patch")
+    if isinstance(style_patch, dict) and style_patch:
+        novel = context_repo.lock_document(db, novel_id)
+        doc = copy.deepcopy(novel.context_json or {})
+        doc.setdefault("version", 1)
+        _deep_merge(cast(dict[str, Any], doc.setdefault("style", {})), style_patch)
+        doc["updated_at"] = datetime.now(UTC).isoformat()
+        novel.context_json = doc
+        db.flush()
+
+
+def apply_translation_result(
+    db: Session,
+    *,
+    novel_id: int,
+    chapter: Chapter,
+    result: dict[str, Any],
+    prune: bool = True,
+) -> dict[str, Any] | None:
+    """
+    Validates a model result, writes the translation onto the chapter and stores its
+    context updates (optionally pruning stored context). Returns the context_updates
+    so callers that keep an in-memory context can merge them too.
+    """
+    translation, context_updates = validate_translation_result(result)
+
+    chapter.content = translation
+    with stage_timer("alignment"):
+        chapter.alignment = result.get("alignment") or build_alignment(
+            chapter.raw or "", translation, result.get("units")
+        )
+    chapter.status = "translated"
+    chapter.translated_at = datetime.now(UTC)
+
+    if settings.TRANSLATION_MEMORY:
+        with stage_timer("translation_memory"):
+            remember(
+                db,
+                novel_id=novel_id,
+                chapter_no=int(chapter.chapter_no),
+                raw=chapter.raw or "",
+                alignment=chapter.alignment,
+            )
+
+    with stage_timer("store_context_updates"):
+        store_context_updates(
+            db, novel_id=novel_id, updates=context_updates, chapter_no=int(chapter.chapter_no)
+        )
+    if prune:
+        with stage_timer("prune_context"):
+            context_repo.prune_context(
+                db, novel_id=novel_id, current_chapter_no=int(chapter.chapter_no)
+            )
+    with stage_timer("flush"):
+        db.flush()
+    return context_updates
+
+
+@dataclass
+class ChapterTranslation:
+    """
+    What the model phase of a chapter translation needs, detached from the session so
+    no DB connection is held while the model works (see translate_chapter).
+    """
+
+    novel_id: int
+    chapter_id: int
+    chapter_no: int
+    source_lang: str
+    target_lang: str
+    raw: str
+    context: dict[str, Any]
+    plan: IncrementalPlan | None = None
+    # The plan keeps translation memory hits (rather than an edited chapter's paragraphs)
+    from_memory: bool = False
+    force: bool = False
+    # build_context_slice / plan_from_memory stats, and how long the model phase took
+    slice_stats: dict[str, Any] = field(default_factory=dict)
+    model_s: float | None = None
+    # Labels the recorded usage; usage_id is the row recorded once the model answered
+    source: str = "api"
+    usage_id: int | None = None
+
+    @property
+    def attempt(self) -> Attempt:
+        return Attempt(self.novel_id, self.chapter_id, self.chapter_no, self.source)
+
+
+def prepare_chapter_translation(
     db: Session,
     *,
     novel_id: int,
     chapter_id: int,
-) -> Chapter:
+    token_budget: int | None = None,
+    force: bool = False,
+    stats: dict[str, Any] | None = None,
+    source: str = "api",
+) -> ChapterTranslation:
     """
-    Translates Chapter.raw -> Chapter.content using Novel.context_json "consistency memory",
-    merges returned context_updates into Novel.context_json, and prunes it.
+    Validates the chapter and builds its context slice (and incremental plan).
+    `source` labels the attempt's recorded usage (see app.services.usage).
     """
+    if stats is None:
+        stats = {}
     novel = db.get(Novel, novel_id)
     if not novel:
         raise ValueError("Novel not found")
 
-    chapter = db.get(Chapter, chapter_id)
+    chapter = db.get(Chapter, chapter_id, options=[undefer_group(BODY)])
     if not chapter or chapter.novel_id != novel_id:
         raise ValueError("Chapter not found for this novel")
 
     if not chapter.raw or not chapter.raw.strip():
         raise ValueError("Chapter has no raw text to translate")
 
-    existing_ctx = _normalize_context(novel.context_json or {})
+    # An edited chapter only re-translates its changed paragraphs (force = full retranslate)
+    plan = None if force else plan_chapter_update(chapter)
+
+    with stage_timer("load_context"):
+        existing_ctx = _normalize_context(context_repo.load_context(db, novel))
 
     # Send only a bounded slice to reduce token cost
-    context_slice = build_context_slice(
-        existing_ctx,
-        chapter_no=int(chapter.chapter_no),
-        raw_text=chapter.raw,
-    )
+    with stage_timer("build_context_slice"):
+        context_slice = build_context_slice(
+            existing_ctx,
+            chapter_no=int(chapter.chapter_no),
+            raw_text="\n\n".join(h.text for h in plan.hunks) if plan else chapter.raw,
+            matcher=matcher_for_context(novel.id, existing_ctx),
+            token_budget=resolve_token_budget(token_budget),
+            stats=stats,
+        )
 
-    result = translate_text_with_context(
+    from_memory = False
+    if plan is None and not force and settings.TRANSLATION_MEMORY:
+        with stage_timer("translation_memory"):
+            plan = plan_from_memory(
+                db,
+                novel_id=novel.id,
+                raw=chapter.raw,
+                call_overhead_tokens=call_overhead_tokens(context_slice),
+                stats=stats,
+            )
+        from_memory = plan is not None
+    return ChapterTranslation(
         novel_id=novel.id,
+        chapter_id=chapter.id,
+        chapter_no=int(chapter.chapter_no),
         source_lang=novel.source_lang,
         target_lang=novel.target_lang,
-        text=chapter.raw,
+        raw=chapter.raw,
         context=context_slice,
+        plan=plan,
+        from_memory=from_memory,
+        force=force,
+        slice_stats=dict(stats),
+        source=source,
     )
 
-    translation = result.get("translation")
-    context_updates = result.get("context_updates")
 
-    if not isinstance(translation, str):
-        raise ValueError("Model returned invalid schema: translation must be string")
-    if context_updates is not None and not isinstance(context_updates, dict):
-        raise ValueError("Model returned invalid schema: context_updates must be object")
+@contextmanager
+def _model_phase(job: ChapterTranslation) -> Iterator[None]:
+    # Model calls made in the phase (hedges included) are paid for by the job's attempt
+    t0 = time.perf_counter()
+    try:
+        with stage_timer("model"), paying_for(job.attempt):
+            yield
+    finally:
+        job.model_s = time.perf_counter() - t0
 
-    chapter.content = translation
-    chapter.status = "translated"
-    chapter.translated_at = datetime.now(timezone.utc)
 
-    merged = merge_context_updates(
-        existing=existing_ctx,
-        updates=cast(dict[str, Any] | None, context_updates),
-        chapter_no=int(chapter.chapter_no),
-    )
+def paid_usage(
+    plan: IncrementalPlan | None,
+    result: dict[str, Any],
+    *,
+    latency_s: float | None,
+    slice_stats: dict[str, Any],
+) -> dict[str, Any]:
+    """record_paid() arguments for a chapter's model result."""
+    return {
+        "usage": result.get("usage"),
+        "cache_hit": result.get("cache") == "hit",
+        "calls": model_calls(plan, result),
+        "latency_s": latency_s,
+        "slice_stats": slice_stats,
+    }
+
+
+def _job_usage(job: ChapterTranslation, result: dict[str, Any]) -> dict[str, Any]:
+    return paid_usage(job.plan, result, latency_s=job.model_s, slice_stats=job.slice_stats)
 
-    novel.context_json = prune_context_in_db(
-        merged,
-        current_chapter_no=int(chapter.chapter_no),
-    )
 
-    db.flush()
+def run_chapter_translation(job: ChapterTranslation) -> dict[str, Any]:
+    """
+    The model phase: its usage is recorded (record_paid) as soon as the model has
+    answered, and job.usage_id set for finish_chapter_translation.
+    """
+    # "model" includes the cache lookup and any rate-limit waits and retries
+    with _model_phase(job):
+        if job.plan is not None:
+            result = translate_hunks(
+                job.plan,
+                novel_id=job.novel_id,
+                source_lang=job.source_lang,
+                target_lang=job.target_lang,
+                context=job.context,
+            )
+        else:
+            result = translate_text(
+                novel_id=job.novel_id,
+                source_lang=job.source_lang,
+                target_lang=job.target_lang,
+                text=job.raw,
+                context=job.context,
+                force=job.force,
+            )
+    job.usage_id = record_paid(job.attempt, **_job_usage(job, result))
+    return result
+
+
+async def arun_chapter_translation(job: ChapterTranslation) -> dict[str, Any]:
+    with _model_phase(job):
+        if job.plan is not None:
+            result = await atranslate_hunks(
+                job.plan,
+                novel_id=job.novel_id,
+                source_lang=job.source_lang,
+                target_lang=job.target_lang,
+                context=job.context,
+            )
+        else:
+            result = await atranslate_text(
+                novel_id=job.novel_id,
+                source_lang=job.source_lang,
+                target_lang=job.target_lang,
+                text=job.raw,
+                context=job.context,
+                force=job.force,
+            )
+    job.usage_id = await arecord_paid(job.attempt, **_job_usage(job, result))
+    return result
+
+
+async def astream_chapter_translation(
+    job: ChapterTranslation, on_text: Callable[[str], None]
+) -> dict[str, Any]:
+    """
+    arun_chapter_translation() that forwards the translation to `on_text` while the
+    model writes it. Incremental and translation memory plans splice their hunks
+    between kept paragraphs, so their content is forwarded in one piece at the end.
+    """
+    if job.plan is not None:
+        result = await arun_chapter_translation(job)
+        if isinstance(result.get("translation"), str):
+            on_text(result["translation"])
+        return result
+    with _model_phase(job):
+        result = await astream_text(
+            novel_id=job.novel_id,
+            source_lang=job.source_lang,
+            target_lang=job.target_lang,
+            text=job.raw,
+            context=job.context,
+            on_text=on_text,
+            force=job.force,
+        )
+    job.usage_id = await arecord_paid(job.attempt, **_job_usage(job, result))
+    return result
+
+
+def record_cut_stream(job: ChapterTranslation, written: str) -> None:
+    """
+    Records what a streamed translation cut off by the client (astream_chapter_translation
+    cancelled) was billed for so far: the prompt and the text the model had written, as
+    counted locally, never applied. Nothing is recorded before the model writes.
+    """
+    if job.usage_id is not None or not written:
+        return
+    usage = {
+        "prompt_tokens": call_overhead_tokens(job.context) + count_tokens(job.raw),
+        "completion_tokens": count_tokens(written),
+    }
+    record_paid_nowait(job.attempt, usage=usage, slice_stats=job.slice_stats)
+
+
+def finish_chapter_translation(
+    db: Session,
+    job: ChapterTranslation,
+    result: dict[str, Any],
+    *,
+    stats: dict[str, Any] | None = None,
+) -> Chapter:
+    """
+    Writes the model result onto the chapter, stores its context updates and flags the
+    attempt's recorded usage as applied (see app.services.usage).
+    """
+    chapter = db.get(Chapter, job.chapter_id, options=[undefer_group(BODY)])
+    if not chapter or chapter.novel_id != job.novel_id:
+        raise ValueError("Chapter not found for this novel")
+    if chapter.raw != job.raw:
+        raise ValueError("Chapter raw text changed during translation; translate it again")
+
+    if stats is not None:
+        stats.update(result.get("usage") or {})
+        stats["segments"] = int(result.get("segments") or 1)
+        stats["cache"] = result.get("cache")
+        stats["paragraphs_retranslated"] = (
+            job.plan.changed_paragraphs if job.plan and not job.from_memory else None
+        )
+
+    apply_translation_result(db, novel_id=job.novel_id, chapter=chapter, result=result)
+    mark_applied(db, job.usage_id)
     return chapter
+
+
+def model_calls(plan: IncrementalPlan | None, result: dict[str, Any]) -> int:
+    """Model requests a chapter result took: one per sent hunk or segment."""
+    if plan is not None:
+        return sum(1 for hunk in plan.hunks if hunk.text.strip())
+    return int(result.get("segments") or 1)
+
+
+def translate_chapter(
+    db: Session,
+    *,
+    novel_id: int,
+    chapter_id: int,
+    progress: Callable[[str, float], None] | None = None,
+    token_budget: int | None = None,
+    force: bool = False,
+    stats: dict[str, Any] | None = None,
+    source: str = "api",
+) -> Chapter:
+    """
+    Translates Chapter.raw -> Chapter.content using the novel's "consistency memory",
+    stores the returned context_updates incrementally, and prunes stored context.
+
+    `progress(stage, fraction)` is called between stages (used by background jobs).
+    If the chapter was translated before and only some raw paragraphs changed, just
+    those paragraphs are sent (see plan_chapter_update) and spliced into the content.
+    Otherwise paragraphs found in the novel's translation memory are filled in and
+    only the rest is sent (see app.services.translation_memory).
+
+    `token_budget` defaults to settings.CONTEXT_TOKEN_BUDGET; `force` bypasses the
+    translation cache, the incremental path and translation memory. `stats` receives
+    the slice stats (see build_context_slice), the model's token usage and the cache
+    outcome; `source` labels the recorded usage (the job kind for background jobs).
+
+    The three phases (prepare / run / finish_chapter_translation) are also used
+    separately by the async translate route, which holds no session during the run.
+    """
+    report = progress or (lambda stage, fraction: None)
+
+    report("building_context", 0.1)
+    job = prepare_chapter_translation(
+        db,
+        novel_id=novel_id,
+        chapter_id=chapter_id,
+        token_budget=token_budget,
+        force=force,
+        stats=stats,
+        source=source,
+    )
+
+    report("calling_model", 0.2)
+    result = run_chapter_translation(job)
+
+    report("merging_context", 0.9)
+    return finish_chapter_translation(db, job, result, stats=stats)
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.repos import translation_cache as cache_repo
+
+logger = logging.getLogger(__name__)
+
+# Max time a duplicate request waits for an identical in-flight translation
+_INFLIGHT_WAIT_S = 600.0
+
+
+def context_fingerprint(context: dict[str, Any] | None) -> list[Any]:
+    """
+    The parts of a context slice that can change the translation: style and the
+    locked/canon renderings. Bookkeeping (count, last_seen_chapter, conflicts) changes
+    on every chapter and is left out so it does not invalidate cached results.
+    """
+    ctx = context or {}
+    locks = sorted(
+        (str(e.get("src")), str(e.get("dst")), str(e.get("reason") or ""))
+        for e in ctx.get("locks") or []
+        if isinstance(e, dict)
+    )
+    entities = sorted(
+        (str(e.get("type") or "other"), str(e.get("src")), str(e.get("dst")))
+        for e in (ctx.get("canon") or {}).get("entities") or []
+        if isinstance(e, dict)
+    )
+    return [ctx.get("style") or {}, locks, entities]
+
+
+def cache_key(
+    *, model: str, source_lang: str, target_lang: str, text: str, context: dict[str, Any] | None
+) -> str:
+    material = json.dumps(
+        [model, source_lang, target_lang, text, context_fingerprint(context)],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class CacheCounters:
+    """Process-local hit/miss counters (reset on restart)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stored = 0
+        self.evicted = 0
+        self.errors = 0
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "stored": self.stored,
+                "evicted": self.evicted,
+                "errors": self.errors,
+            }
+
+
+counters = CacheCounters()
+
+_inflight: dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return settings.TRANSLATION_CACHE_MAX_MB > 0
+
+
+def _lookup(key: str) -> dict[str, Any] | None:
+    try:
+        with SessionLocal() as db:
+            hit = cache_repo.get_entry(db, key)
+            db.commit()
+            return hit
+    except Exception:
+        counters.incr("errors")
+        logger.warning("translation cache lookup failed", exc_info=True)
+        return None
+
+
+def _put(
+    db: Session, key: str, *, source_lang: str, target_lang: str, result: dict[str, Any]
+) -> int:
+    response = {
+        "translation": result.get("translation"),
+        "context_updates": result.get("context_updates"),
+    }
+    size = len(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+    cache_repo.put_entry(
+        db,
+        key=key,
+        model=settings.OPENAI_MODEL,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        response=response,
+        size_bytes=size,
+    )
+    return cache_repo.evict_to_size(db, max_bytes=settings.TRANSLATION_CACHE_MAX_MB * 1024 * 1024)
+
+
+def _store(key: str, *, source_lang: str, target_lang: str, result: dict[str, Any]) -> None:
+    try:
+        # Own session: the entry must survive a rollback of the caller's transaction
+        # (that is exactly the retry case the cache is for).
+        with SessionLocal() as db:
+            evicted = _put(db, key, source_lang=source_lang, target_lang=target_lang, result=result)
+            db.commit()
+        counters.incr("stored")
+        if evicted:
+            counters.incr("evicted", evicted)
+    except Exception:
+        counters.incr("errors")
+        logger.warning("translation cache store failed", exc_info=True)
+
+
+async def _alookup(key: str) -> dict[str, Any] | None:
+    try:
+        async with AsyncSessionLocal() as db:
+            hit = await db.run_sync(cache_repo.get_entry, key)
+            await db.commit()
+            return hit
+    except Exception:
+        counters.incr("errors")
+        logger.warning("translation cache lookup failed", exc_info=True)
+        return None
+
+
+async def _astore(key: str, *, source_lang: str, target_lang: str, result: dict[str, Any]) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            evicted = await db.run_sync(
+                _put, key, source_lang=source_lang, target_lang=target_lang, result=result
+            )
+            await db.commit()
+        counters.incr("stored")
+        if evicted:
+            counters.incr("evicted", evicted)
+    except Exception:
+        counters.incr("errors")
+        logger.warning("translation cache store failed", exc_info=True)
+
+
+def cached_translate(
+    translate: Callable[[], dict[str, Any]],
+    *,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any] | None,
+    force: bool = False,
+) -> dict[str, Any]:
+    """
+    Runs `translate()` behind the content-addressed cache. The returned dict gets a
+    "cache" key: "hit", "miss", "bypass" (force=True) or "off". Hits report zero usage.
+
+    Identical concurrent requests in this process are collapsed: the second waits for
+    the first to finish and then reads its result from the cache.
+    """
+    if not cache_enabled():
+        return {**translate(), "cache": "off"}
+
+    key = cache_key(
+        model=settings.OPENAI_MODEL,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        text=text,
+        context=context,
+    )
+
+    if force:
+        counters.incr("bypassed")
+        result = translate()
+        if isinstance(result.get("translation"), str):
+            _store(key, source_lang=source_lang, target_lang=target_lang, result=result)
+        return {**result, "cache": "bypass"}
+
+    with _inflight_lock:
+        event = _inflight.get(key)
+        owner = event is None
+        if owner:
+            event = _inflight[key] = threading.Event()
+    if not owner:
+        event.wait(_INFLIGHT_WAIT_S)
+
+    try:
+        hit = _lookup(key)
+        if hit is not None:
+            counters.incr("hits")
+            return {**hit, "usage": {"prompt_tokens": 0, "completion_tokens": 0}, "cache": "hit"}
+
+        counters.incr("misses")
+        result = translate()
+        if isinstance(result.get("translation"), str):
+            _store(key, source_lang=source_lang, target_lang=target_lang, result=result)
+        return {**result, "cache": "miss"}
+    finally:
+        if owner:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+            event.set()
+
+
+_ainflight: dict[str, asyncio.Event] = {}
+
+
+async def acached_translate(
+    translate: Callable[[], Awaitable[dict[str, Any]]],
+    *,
+    source_lang: str,
+    target_lang: str,
+    text: str,
+    context: dict[str, Any] | None,
+    force: bool = False,
+) -> dict[str, Any]:
+    """cached_translate() for the async stack: same keys, entries and counters."""
+    if not cache_enabled():
+        return {**await translate(), "cache": "off"}
+
+    key = cache_key(
+        model=settings.OPENAI_MODEL,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        text=text,
+        context=context,
+    )
+
+    if force:
+        counters.incr("bypassed")
+        result = await translate()
+        if isinstance(result.get("translation"), str):
+            await _astore(key, source_lang=source_lang, target_lang=target_lang, result=result)
+        return {**result, "cache": "bypass"}
+
+    # Single event loop: no lock needed around the in-flight table
+    event = _ainflight.get(key)
+    owner = event is None
+    if owner:
+        event = _ainflight[key] = asyncio.Event()
+    else:
+        try:
+            await asyncio.wait_for(event.wait(), _INFLIGHT_WAIT_S)
+        except TimeoutError:
+            pass
+
+    try:
+        hit = await _alookup(key)
+        if hit is not None:
+            counters.incr("hits")
+            return {**hit, "usage": {"prompt_tokens": 0, "completion_tokens": 0}, "cache": "hit"}
+
+        counters.incr("misses")
+        result = await translate()
+        if isinstance(result.get("translation"), str):
+            await _astore(key, source_lang=source_lang, target_lang=target_lang, result=result)
+        return {**result, "cache": "miss"}
+    finally:
+        if owner:
+            _ainflight.pop(key, None)
+            event.set()
+
+
+def cache_stats() -> dict[str, Any]:
+    entries, size = 0, 0
+    try:
+        with SessionLocal() as db:
+            entries, size = cache_repo.cache_totals(db)
+    except Exception:
+        logger.warning("translation cache stats failed", exc_info=True)
+    return {
+        "enabled": cache_enabled(),
+        "max_bytes": settings.TRANSLATION_CACHE_MAX_MB * 1024 * 1024,
+        "entries": entries,
+        "bytes": size,
+        **counters.snapshot(),
+    }
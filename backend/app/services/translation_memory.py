@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import TRANSLATION_MEMORY_PARAGRAPHS, TRANSLATION_MEMORY_TOKENS_SAVED
+from app.repos import translation_memory as tm_repo
+from app.services.alignment import IncrementalPlan, paragraph_hash, plan_from_kept
+from app.services.chunking import split_paragraphs
+from app.services.tokens import count_tokens
+
+# Translation memory (TM): translated paragraphs of a novel, keyed by normalized source.
+# Web novels repeat a lot verbatim (system windows, skill descriptions, stat blocks,
+# chapter header/footer boilerplate); those paragraphs are filled in from the TM and
+# only the rest of the chapter goes to the model, as hunks of an IncrementalPlan.
+
+_WHITESPACE = re.compile(r"\s+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize(text: str) -> str:
+    """NFKC (full-width forms, compatibility characters) with whitespace collapsed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def tm_key(normalized: str) -> str:
+    """Digit runs are masked so paragraphs differing only in numbers share a key."""
+    masked = _DIGITS.sub("#", normalized)
+    return hashlib.sha1(masked.encode("utf-8")).hexdigest()[:32]
+
+
+def reuse(stored_source: str, target: str, source: str) -> str | None:
+    """
+    The stored translation adapted to `source` (both normalized, same key), or None.
+    With different numbers, the target's numbers must be exactly the stored source's,
+    in order; they are then replaced one for one. Anything else is not reused.
+    """
+    if stored_source == source:
+        return target
+    if _DIGITS.sub("#", stored_source) != _DIGITS.sub("#", source):
+        return None
+    if _DIGITS.findall(target) != _DIGITS.findall(stored_source):
+        return None
+    new = iter(_DIGITS.findall(source))
+    return _DIGITS.sub(lambda m: next(new), target)
+
+
+def _eligible(normalized: str) -> bool:
+    return len(normalized) >= settings.TM_MIN_CHARS
+
+
+def aligned_paragraphs(raw: str, alignment: dict[str, Any] | None) -> list[tuple[str, str]]:
+    """
+    (raw paragraph, translation) pairs from a chapter's paragraph-level alignment
+    units; coarser units (several paragraphs, one translation) are skipped, as are the
+    untranslated units of empty edge paragraphs (see build_alignment).
+    """
+    units = (alignment or {}).get("units") or []
+    paragraphs = split_paragraphs(raw)
+    if sum(len(u.get("h") or []) for u in units) != len(paragraphs):
+        return []
+    pairs: list[tuple[str, str]] = []
+    i = 0
+    for u in units:
+        hashes = u.get("h") or []
+        if len(hashes) == 1 and paragraph_hash(paragraphs[i].text) == hashes[0]:
+            translation = str(u.get("t") or "")
+            if translation.strip():
+                pairs.append((paragraphs[i].text, translation))
+        i += len(hashes)
+    return pairs
+
+
+def remember(
+    db: Session,
+    *,
+    novel_id: int,
+    chapter_no: int,
+    raw: str,
+    alignment: dict[str, Any] | None,
+) -> int:
+    """Stores a translated chapter's paragraphs in the TM (one statement). Returns how many."""
+    entries: dict[str, tuple[str, str]] = {}
+    for paragraph, translation in aligned_paragraphs(raw, alignment):
+        source = normalize(paragraph)
+        if _eligible(source):
+            entries[tm_key(source)] = (source, translation.strip())
+    tm_repo.upsert(db, novel_id=novel_id, chapter_no=chapter_no, entries=entries)
+    return len(entries)
+
+
+def _runs(indexes: list[int]) -> list[list[int]]:
+    """Sorted indexes grouped into runs of consecutive ones."""
+    runs: list[list[int]] = []
+    for i in indexes:
+        if runs and runs[-1][-1] == i - 1:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+
+def plan_from_memory(
+    db: Session,
+    *,
+    novel_id: int,
+    raw: str,
+    call_overhead_tokens: int,
+    stats: dict[str, Any] | None = None,
+) -> IncrementalPlan | None:
+    """
+    Looks up every paragraph of `raw` in the novel's TM (one query) and returns a plan
+    that keeps the hits and translates the rest as hunks, or None when nothing matched
+    or reuse would not pay off.
+
+    Each hunk is its own model call carrying the context slice and system prompt
+    (`call_overhead_tokens`), so hits in the middle of a chapter
+    are dropped unless they save more than that, and a plan whose remaining savings
+    do not cover its extra calls is not used.
+
+    `stats` gets tm_paragraphs (reused), tm_hit_ratio (of non-empty paragraphs) and
+    tm_tokens_saved (estimated prompt + completion tokens, net of the extra calls).
+    """
+    paragraphs = split_paragraphs(raw)
+    sources = [normalize(p.text) for p in paragraphs]
+    candidates = {i: tm_key(s) for i, s in enumerate(sources) if _eligible(s)}
+    stored = tm_repo.lookup(db, novel_id=novel_id, keys=candidates.values())
+
+    kept: dict[int, tuple[int, dict[str, Any]]] = {}
+    value: dict[int, int] = {}
+    for i, key in candidates.items():
+        if key not in stored:
+            continue
+        translation = reuse(*stored[key], sources[i])
+        if translation is None:
+            continue
+        kept[i] = (i + 1, {"h": [paragraph_hash(paragraphs[i].text)], "t": translation})
+        value[i] = count_tokens(paragraphs[i].text) + count_tokens(translation)
+
+    # A run of hits with paragraphs to translate on both sides splits a call in two;
+    # it is only kept when it saves more than the extra call costs
+    missed = [i for i, p in enumerate(paragraphs) if p.text.strip() and i not in kept]
+    for run in _runs(sorted(kept)):
+        interior = missed and missed[0] < run[0] and missed[-1] > run[-1]
+        if interior and sum(value[i] for i in run) <= call_overhead_tokens:
+            for i in run:
+                del kept[i]
+    saved = sum(value[i] for i in kept)
+
+    plan = None
+    if kept:
+        # Hits are self-contained (boilerplate, system windows), and sending them as
+        # neighbours would cost about what they save
+        plan = plan_from_kept(paragraphs, kept, context_paragraphs=0)
+        calls = sum(1 for h in plan.hunks if h.text.strip())
+        saved -= max(0, calls - 1) * call_overhead_tokens
+        if saved <= 0:
+            plan = None
+
+    if plan is None:
+        kept, saved = {}, 0
+    total = sum(1 for p in paragraphs if p.text.strip())
+    TRANSLATION_MEMORY_PARAGRAPHS.labels("hit").inc(len(kept))
+    TRANSLATION_MEMORY_PARAGRAPHS.labels("miss").inc(total - len(kept))
+    TRANSLATION_MEMORY_TOKENS_SAVED.inc(saved)
+    if stats is not None:
+        stats.update(
+            tm_paragraphs=len(kept),
+            tm_hit_ratio=round(len(kept) / total, 3) if total else 0.0,
+            tm_tokens_saved=saved,
+        )
+    return plan
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.repos import usage as usage_repo
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (input, cached input, output). Matched by the longest prefix
+# of the model name, so dated snapshots ("gpt-4.1-mini-2025-04-14") are priced too;
+# other models are reported with cost None.
+PRICES_PER_MTOK: dict[str, tuple[float, float, float]] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+# The Batch API bills half of the synchronous price
+BATCH_DISCOUNT = 0.5
+
+
+def model_prices(model: str) -> tuple[float, float, float] | None:
+    matches = [p for p in PRICES_PER_MTOK if model == p or model.startswith(p + "-")]
+    return PRICES_PER_MTOK[max(matches, key=len)] if matches else None
+
+
+def cost_usd(
+    *, model: str, source: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int
+) -> float | None:
+    prices = model_prices(model)
+    if prices is None:
+        return None
+    price_in, price_cached, price_out = prices
+    cost = (
+        (prompt_tokens - cached_tokens) * price_in
+        + cached_tokens * price_cached
+        + completion_tokens * price_out
+    ) / 1_000_000
+    if source == "batch":
+        cost *= BATCH_DISCOUNT
+    return cost
+
+
+def record_attempt(
+    db: Session,
+    *,
+    novel_id: int,
+    chapter_id: int | None,
+    chapter_no: int,
+    source: str,
+    usage: dict[str, Any] | None,
+    cache_hit: bool = False,
+    calls: int = 1,
+    latency_s: float | None = None,
+    slice_stats: dict[str, Any] | None = None,
+    model: str | None = None,
+    applied: bool = True,
+) -> int | None:
+    """
+    Records one chapter translation attempt in translation_usage and its rollups, in
+    the caller's transaction; returns the row id (None when accounting is off).
+    `slice_stats` are build_context_slice's.
+    """
+    if not settings.USAGE_ACCOUNTING:
+        return None
+    usage = usage or {}
+    slice_stats = slice_stats or {}
+
+    def stat(key: str) -> int | None:
+        value = slice_stats.get(key)
+        return None if value is None else int(value)
+
+    return usage_repo.record_usage(
+        db,
+        values={
+            "novel_id": novel_id,
+            "chapter_id": chapter_id,
+            "chapter_no": chapter_no,
+            "source": source,
+            "model": (model or settings.OPENAI_MODEL)[:64],
+            "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+            "completion_tokens": int(usage.get("completion_tokens") or 0),
+            "cached_tokens": int(usage.get("cached_tokens") or 0),
+            "calls": 0 if cache_hit else calls,
+            "cache_hit": cache_hit,
+            "applied": applied,
+            "latency_ms": None if latency_s is None else round(latency_s * 1000),
+            "slice_tokens": stat("slice_tokens"),
+            "context_tokens": stat("context_tokens"),
+            "chapter_tokens": stat("chapter_tokens"),
+        },
+    )
+
+
+@dataclass(frozen=True)
+class Attempt:
+    """The chapter translation attempt model calls are paid for, as recorded."""
+
+    novel_id: int
+    chapter_id: int | None
+    chapter_no: int
+    source: str
+
+
+_attempt: ContextVar[Attempt | None] = ContextVar("usage_attempt", default=None)
+
+
+@contextmanager
+def paying_for(attempt: Attempt) -> Iterator[None]:
+    """Model calls made inside the block (this context) are paid for by `attempt`."""
+    token = _attempt.set(attempt)
+    try:
+        yield
+    finally:
+        _attempt.reset(token)
+
+
+def current_attempt() -> Attempt | None:
+    return _attempt.get()
+
+
+def record_paid(attempt: Attempt, **kwargs: Any) -> int | None:
+    """
+    record_attempt() of what a model call cost, as soon as it has answered: in a
+    transaction of its own, committed right away and flagged not applied, so the usage
+    is kept whatever becomes of the result (mark_applied() once it is stored). Errors
+    are logged, not raised: accounting does not fail a translation.
+    """
+    if not settings.USAGE_ACCOUNTING:
+        return None
+    try:
+        with SessionLocal() as db:
+            usage_id = _record(db, attempt, kwargs)
+            db.commit()
+        return usage_id
+    except Exception:
+        logger.exception("Could not record the usage of %s", attempt)
+        return None
+
+
+async def arecord_paid(attempt: Attempt, **kwargs: Any) -> int | None:
+    """record_paid() on the async engine."""
+    if not settings.USAGE_ACCOUNTING:
+        return None
+    try:
+        async with AsyncSessionLocal() as db:
+            usage_id = await db.run_sync(lambda s: _record(s, attempt, kwargs))
+            await db.commit()
+        return usage_id
+    except Exception:
+        logger.exception("Could not record the usage of %s", attempt)
+        return None
+
+
+def record_paid_nowait(attempt: Attempt, **kwargs: Any) -> None:
+    """
+    record_paid() for callbacks and cleanup code that cannot wait: on the event loop's
+    default executor when a loop is running, else right away.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        record_paid(attempt, **kwargs)
+        return
+    loop.run_in_executor(None, partial(record_paid, attempt, **kwargs))
+
+
+def _record(db: Session, attempt: Attempt, kwargs: dict[str, Any]) -> int | None:
+    return record_attempt(
+        db,
+        novel_id=attempt.novel_id,
+        chapter_id=attempt.chapter_id,
+        chapter_no=attempt.chapter_no,
+        source=attempt.source,
+        applied=False,
+        **kwargs,
+    )
+
+
+def mark_applied(db: Session, *usage_ids: int | None) -> None:
+    """Flags record_paid() attempts as stored, in the caller's transaction."""
+    ids = [i for i in usage_ids if i is not None]
+    if ids:
+        usage_repo.mark_applied(db, usage_ids=ids)
+
+
+def _summary(row: dict[str, Any], *, cost: float | None) -> dict[str, Any]:
+    """Rollup sums as reported: ints, average latency, slice savings and cost."""
+    out: dict[str, Any] = {k: int(row[k] or 0) for k in usage_repo.HOURLY_SUMS}
+    timed = out.pop("timed")
+    latency_ms = out.pop("latency_ms")
+    sliced = out.pop("sliced")
+    out["avg_latency_ms"] = round(latency_ms / timed) if timed else None
+    # Context tokens the slice left out, over the attempts that reported a slice
+    out["slice_saved_tokens"] = out["context_tokens"] - out["slice_tokens"] if sliced else None
+    out["cost_usd"] = None if cost is None else round(cost, 6)
+    return out
+
+
+def _row_cost(row: dict[str, Any]) -> float | None:
+    return cost_usd(
+        model=row["model"],
+        source=row["source"],
+        prompt_tokens=int(row["prompt_tokens"] or 0),
+        completion_tokens=int(row["completion_tokens"] or 0),
+        cached_tokens=int(row["cached_tokens"] or 0),
+    )
+
+
+def _combined(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """One summary over (model, source) rows; cost sums the priced ones."""
+    sums = {k: sum(int(r[k] or 0) for r in rows) for k in usage_repo.HOURLY_SUMS}
+    costs = [c for c in map(_row_cost, rows) if c is not None]
+    out = _summary(sums, cost=sum(costs) if costs else None)
+    out["unpriced_models"] = sorted({r["model"] for r in rows if model_prices(r["model"]) is None})
+    return out
+
+
+def _by_model(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [
+        {"model": r["model"], "source": r["source"], **_summary(r, cost=_row_cost(r))}
+        for r in rows
+    ]
+
+
+def _buckets(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    grouped: dict[datetime, list[dict[str, Any]]] = {}
+    for r in rows:
+        grouped.setdefault(r["start"], []).append(r)
+    return [{"start": start, **_combined(group)} for start, group in grouped.items()]
+
+
+def novel_usage(
+    db: Session,
+    *,
+    novel_id: int,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    bucket: str = "day",
+) -> dict[str, Any]:
+    """
+    The novel's usage in [since, until) from the hourly rollup (so the window is taken
+    in whole hours): totals, per model and source, per `bucket`, and per chapter size
+    band (all attempts, from chapter_usage).
+    """
+    rows = usage_repo.usage_by_model(db, novel_id=novel_id, since=since, until=until)
+    buckets = usage_repo.usage_buckets(
+        db, bucket=bucket, novel_id=novel_id, since=since, until=until
+    )
+    bands = usage_repo.usage_by_size(db, novel_id=novel_id)
+    return {
+        "novel_id": novel_id,
+        "since": since,
+        "until": until,
+        "totals": _combined(rows),
+        "by_model": _by_model(rows),
+        "buckets": _buckets(buckets),
+        "by_chapter_size": [
+            {k: (v if k == "band" else int(v or 0)) for k, v in band.items()} for band in bands
+        ],
+    }
+
+
+def all_usage(
+    db: Session,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    bucket: str = "day",
+    top: int = 10,
+) -> dict[str, Any]:
+    """novel_usage() over all novels, plus the `top` novels by tokens."""
+    rows = usage_repo.usage_by_model(db, since=since, until=until)
+    buckets = usage_repo.usage_buckets(db, bucket=bucket, since=since, until=until)
+    per_novel: dict[int, list[dict[str, Any]]] = {}
+    for r in usage_repo.top_novels(db, since=since, until=until, limit=top):
+        per_novel.setdefault(int(r["novel_id"]), []).append(r)
+    top_novels = [{"novel_id": nid, **_combined(group)} for nid, group in per_novel.items()]
+    top_novels.sort(key=lambda n: -(n["prompt_tokens"] + n["completion_tokens"]))
+    return {
+        "since": since,
+        "until": until,
+        "totals": _combined(rows),
+        "by_model": _by_model(rows),
+        "buckets": _buckets(buckets),
+        "top_novels": top_novels,
+    }
+
+
+def chapter_usage(db: Session, *, novel_id: int, limit: int = 50) -> list[dict[str, Any]]:
+    """The novel's most expensive chapters by tokens, over all their attempts."""
+    return [
+        {
+            "chapter_id": c.chapter_id,
+            "chapter_no": c.chapter_no,
+            "attempts": c.attempts,
+            "prompt_tokens": c.prompt_tokens,
+            "completion_tokens": c.completion_tokens,
+            "cached_tokens": c.cached_tokens,
+            "chapter_tokens": c.chapter_tokens,
+            "last_at": c.last_at,
+        }
+        for c in usage_repo.chapter_usage(db, novel_id=novel_id, limit=limit)
+    ]
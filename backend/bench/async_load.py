@@ -0,0 +1,170 @@
+"""
+Load test: the translate route in sync mode vs. ASYNC_MODE, against a local stub model
+server over real HTTP (bench.stub_model_server).
+
+Needs a real database (DATABASE_URL). Starts the stub server and one single-process
+uvicorn per mode, then fires --requests translations, --concurrency at a time:
+
+    cd backend && python -m bench.async_load [--requests 400] [--concurrency 200]
+        [--latency-ms 500]
+
+Sync handlers hold a threadpool thread and a pooled DB connection for the whole
+model call; the async handler holds neither while it waits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import httpx
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+
+STUB_PORT = 18081
+API_PORT = 18090
+
+
+def _seed(chapters: int) -> list[int]:
+    with SessionLocal() as db:
+        novel = Novel(name=f"async-load-{time.time():.0f}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        ids = db.scalars(
+            insert(Chapter).returning(Chapter.id),
+            [
+                {
+                    "novel_id": novel.id,
+                    "chapter_no": no,
+                    "raw": f"{no}화. 그는 검을 들어 올리며 천천히 숨을 골랐다.",
+                    "status": "raw_only",
+                }
+                for no in range(1, chapters + 1)
+            ],
+        ).all()
+        db.commit()
+        return list(ids)
+
+
+@contextmanager
+def _server(args: list[str], env: dict[str, str], ready_url: str) -> Iterator[None]:
+    with tempfile.TemporaryFile() as log:
+        proc = subprocess.Popen(
+            [sys.executable, *args], env=env, stdout=subprocess.DEVNULL, stderr=log
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    httpx.get(ready_url, timeout=1)
+                    break
+                except httpx.HTTPError:
+                    if proc.poll() is not None or time.monotonic() > deadline:
+                        log.seek(0)
+                        raise RuntimeError(log.read().decode(errors="replace"))
+                    time.sleep(0.2)
+            yield
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+
+async def _fire(chapter_ids: list[int], requests: int, concurrency: int) -> dict[str, float]:
+    latencies: list[float] = []
+    errors: dict[int, int] = {}
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{API_PORT}", timeout=300, limits=limits
+    ) as client:
+
+        async def one(i: int) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post(
+                        f"/chapters/{chapter_ids[i % len(chapter_ids)]}/translate",
+                        params={"force": "true"},
+                    )
+                    status = r.status_code
+                except httpx.HTTPError:
+                    status = 0
+                if status == 200:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors[status] = errors.get(status, 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "ok": len(latencies),
+        "errors": sum(errors.values()),
+        "wall_s": wall,
+        "rps": len(latencies) / wall,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=500)
+    args = parser.parse_args()
+
+    chapter_ids = _seed(min(args.requests, 1000))
+    env = {
+        **os.environ,
+        "OPENAI_STUB": "0",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{STUB_PORT}/v1",
+        "TRANSLATE_WORKERS": "0",
+        "TRANSLATION_CACHE_MAX_MB": "0",
+    }
+    stub_args = ["-m", "bench.stub_model_server", "--port", str(STUB_PORT)]
+    stub_args += ["--latency-ms", str(args.latency_ms)]
+    print(
+        f"{args.requests} translations, {args.concurrency} concurrent, "
+        f"model latency {args.latency_ms} ms"
+    )
+    with _server(stub_args, env, f"http://127.0.0.1:{STUB_PORT}/stats"):
+        for mode in ("0", "1"):
+            httpx.post(f"http://127.0.0.1:{STUB_PORT}/stats/reset")
+            api_args = ["-m", "uvicorn", "app.main:app", "--port", str(API_PORT)]
+            api_args += ["--log-level", "warning"]
+            with _server(
+                api_args,
+                {**env, "ASYNC_MODE": mode},
+                f"http://127.0.0.1:{API_PORT}/openapi.json",
+            ):
+                r = asyncio.run(_fire(chapter_ids, args.requests, args.concurrency))
+            peak = httpx.get(f"http://127.0.0.1:{STUB_PORT}/stats").json()["peak_in_flight"]
+            print(
+                f"{'async' if mode == '1' else 'sync':<6}: {r['rps']:7.1f} req/s  "
+                f"p50 {r['p50_ms']:7.0f} ms  p95 {r['p95_ms']:7.0f} ms  "
+                f"ok {r['ok']:5.0f}  errors {r['errors']:4.0f}  "
+                f"peak model calls in flight {peak}"
+            )
+
+
+if __name__ == "__main__":
+    main()
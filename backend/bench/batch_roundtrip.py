@@ -0,0 +1,149 @@
+"""
+Offline batch round trip: exports a novel's pending chapters as a batch requests file,
+answers every request locally with the stub model (shuffled, with a few failed lines,
+like a real batch output file), then imports the results, interrupting the first import
+after two commits and running it again.
+
+Needs a real database (DATABASE_URL):
+
+    cd backend && TRANSLATE_WORKERS=0 python -m bench.batch_roundtrip \
+        [--chapters 200] [--batch-size 50] [--failed 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+from app.services.batch import BatchImport
+from app.services.chapters import rebuild_links_from_chapter_no
+from app.services.llm_stub import stub_completion
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _InterruptedImport(BatchImport):
+    """Dies after `commits` commits, like a process killed mid-import."""
+
+    commits = 2
+
+    def _commit(self, last_no: int | None) -> None:
+        super()._commit(last_no)
+        self.commits -= 1
+        if self.commits == 0:
+            raise _Interrupted
+
+
+def _seed(chapters: int) -> int:
+    with SessionLocal() as db:
+        novel = Novel(name=f"batch-{time.time():.0f}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        db.execute(
+            insert(Chapter),
+            [
+                {
+                    "novel_id": novel.id,
+                    "chapter_no": no,
+                    "title": f"Chapter {no}",
+                    "raw": f"제{no}화.\n\n그는 검을 들어 올리며 천천히 숨을 골랐다. ({no})",
+                }
+                for no in range(1, chapters + 1)
+            ],
+        )
+        rebuild_links_from_chapter_no(db, novel.id)
+        db.commit()
+        return novel.id
+
+
+def _results(requests: list[dict], failed: int, rng: random.Random) -> list[str]:
+    lines = []
+    for i, req in enumerate(requests):
+        if i < failed:
+            error = {"code": "server_error", "message": "The server had an error"}
+            lines.append({"custom_id": req["custom_id"], "response": None, "error": error})
+            continue
+        body, _ = stub_completion(
+            model=req["body"]["model"],
+            messages=req["body"]["messages"],
+            latency_ms=0,
+            ms_per_token=0,
+        )
+        response = {"status_code": 200, "body": body}
+        lines.append({"custom_id": req["custom_id"], "response": response, "error": None})
+    rng.shuffle(lines)
+    return [json.dumps(line, ensure_ascii=False) for line in lines]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chapters", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--failed", type=int, default=3, help="Requests answered with an error")
+    args = parser.parse_args()
+
+    novel_id = _seed(args.chapters)
+    client = TestClient(app)
+    try:
+        t0 = time.perf_counter()
+        r = client.get(f"/novels/{novel_id}/batch/requests.jsonl")
+        r.raise_for_status()
+        requests = [json.loads(line) for line in r.text.splitlines()]
+        print(
+            f"export   {len(requests)} requests, {len(r.content) / 1024:,.0f} KiB "
+            f"in {time.perf_counter() - t0:.2f} s"
+        )
+
+        results = _results(requests, args.failed, random.Random(7))
+
+        t0 = time.perf_counter()
+        with (
+            SessionLocal() as db,
+            _InterruptedImport(db=db, novel_id=novel_id, batch_size=args.batch_size) as batch,
+        ):
+            for line_no, line in enumerate(results, 1):
+                batch.add(line_no, json.loads(line))
+            try:
+                batch.finish()
+            except _Interrupted:
+                pass
+        print(
+            f"import   interrupted after {batch.applied} chapters "
+            f"in {time.perf_counter() - t0:.2f} s"
+        )
+
+        t0 = time.perf_counter()
+        r = client.post(
+            f"/novels/{novel_id}/batch/results",
+            params={"batch_size": args.batch_size},
+            content="\n".join(results).encode("utf-8"),
+        )
+        r.raise_for_status()
+        stats = r.json()
+        print(
+            f"resume   applied {stats['applied']}, unchanged {stats['unchanged']}, "
+            f"failed {stats['failed']}, stale {stats['stale']} "
+            f"in {time.perf_counter() - t0:.2f} s"
+        )
+
+        r = client.get(f"/novels/{novel_id}/batch/requests.jsonl")
+        print(f"left     {len(r.text.splitlines())} requests for the next batch")
+    finally:
+        with SessionLocal() as db:
+            db.delete(db.get(Novel, novel_id))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: keyset (cursor) vs. OFFSET pagination of a novel's chapters, per page depth.
+
+Needs a real database (DATABASE_URL) and a large novel (see `python -m bench.relink
+--seed 50000`):
+
+    cd backend && python -m bench.chapter_pages --novel-id <id> [--limit 100] [--full]
+
+Times the page query alone (median of --repeat runs) at page 1, 50 and 500.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models.chapter import Chapter
+from app.repos import chapter as chapter_repo
+
+
+def _median_ms(fn: Callable[[], list], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--novel-id", type=int, required=True)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--full", action="store_true", help="Load chapter text (/chapters/full)")
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        total = chapter_repo.count_chapters(db, args.novel_id)
+        print(f"novel {args.novel_id}: {total} chapters, page size {args.limit}")
+        for page in (1, 50, 500):
+            offset = (page - 1) * args.limit
+            if offset >= total:
+                break
+            # The cursor of page N is the last chapter_no of page N-1
+            after_no = None
+            if offset:
+                after_no = db.scalar(
+                    select(Chapter.chapter_no)
+                    .where(Chapter.novel_id == args.novel_id)
+                    .order_by(Chapter.chapter_no)
+                    .offset(offset - 1)
+                    .limit(1)
+                )
+
+            def by_offset() -> list:
+                db.expunge_all()
+                return chapter_repo.list_chapters(
+                    db, args.novel_id, limit=args.limit, offset=offset, with_body=args.full
+                )
+
+            def by_keyset() -> list:
+                db.expunge_all()
+                return chapter_repo.list_chapters_after(
+                    db, args.novel_id, after_no=after_no, limit=args.limit, with_body=args.full
+                )
+
+            assert [c.id for c in by_offset()] == [c.id for c in by_keyset()]
+            print(
+                f"page {page:4d}: offset {_median_ms(by_offset, args.repeat):8.2f} ms   "
+                f"keyset {_median_ms(by_keyset, args.repeat):8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark: streaming export vs. the previous build-everything-in-memory export.
+
+Needs a real database (DATABASE_URL). Seed a throwaway novel once, then compare:
+
+    cd backend && python -m bench.export_stream --seed 3000 --kb 12
+    cd backend && python -m bench.export_stream --novel-id <id> [--format json|md|txt]
+
+Each variant runs in a fresh subprocess so peak RSS is measured in isolation.
+Time-to-first-byte (TTFB) is when the first body chunk is available to send.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+from app.services.export import stream_export
+
+
+def _legacy_body(db: Session, novel_id: int, fmt: str) -> bytes:
+    """The pre-streaming implementation: every ORM row (raw + content) in memory."""
+    n = db.get(Novel, novel_id)
+    assert n is not None
+    chapters = (
+        db.query(Chapter)
+        .filter(Chapter.novel_id == novel_id)
+        .order_by(Chapter.chapter_no.asc())
+        .all()
+    )
+    if fmt == "json":
+        payload = {
+            "novel": {
+                "id": n.id,
+                "name": n.name,
+                "source_lang": n.source_lang,
+                "target_lang": n.target_lang,
+                "created_at": n.created_at,
+                "updated_at": n.updated_at,
+            },
+            "chapters": [
+                {
+                    "id": ch.id,
+                    "chapter_no": ch.chapter_no,
+                    "title": ch.title,
+                    "source_url": ch.source_url,
+                    "status": ch.status,
+                    "text": (ch.content or ch.raw or ""),
+                }
+                for ch in chapters
+            ],
+        }
+        # (The old route passed datetimes to JSONResponse unencoded and failed with a 500;
+        # encode them here so the comparison is like for like.)
+        return bytes(JSONResponse(content=jsonable_encoder(payload)).body)
+
+    if fmt == "md":
+        parts = [f"# {n.name}\n"]
+        for ch in chapters:
+            title = ch.title or f"Chapter {ch.chapter_no}"
+            parts.append(f"## {ch.chapter_no}. {title}\n\n{(ch.content or ch.raw or '').strip()}\n")
+        return "\n".join(parts).encode("utf-8")
+
+    parts = [n.name, ""]
+    for ch in chapters:
+        title = ch.title or f"Chapter {ch.chapter_no}"
+        parts.extend([f"{ch.chapter_no}. {title}", (ch.content or ch.raw or "").strip(), ""])
+    return "\n".join(parts).encode("utf-8")
+
+
+def _child(novel_id: int, fmt: str, variant: str) -> None:
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    digest = hashlib.sha256()
+    size = 0
+    t0 = time.perf_counter()
+    ttfb = None
+    if variant == "legacy":
+        with SessionLocal() as db:
+            body = _legacy_body(db, novel_id, fmt)
+        ttfb = time.perf_counter() - t0
+        digest.update(body)
+        size = len(body)
+    else:
+        for chunk in stream_export(novel_id, fmt):
+            if ttfb is None:
+                ttfb = time.perf_counter() - t0
+            digest.update(chunk)
+            size += len(chunk)
+    total = time.perf_counter() - t0
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        json.dumps(
+            {
+                "ttfb_ms": round((ttfb or total) * 1000, 1),
+                "total_ms": round(total * 1000, 1),
+                "rss_growth_mb": round((peak_rss - base_rss) / 1024, 1),
+                "bytes": size,
+                "sha256": digest.hexdigest(),
+            }
+        )
+    )
+
+
+def _seed(chapters: int, kb: int) -> int:
+    body = ("가나다라마바사 아자차카타파하. " * 64)[: kb * 1024 // 3]
+    with SessionLocal() as db:
+        novel = Novel(name=f"export-bench-{chapters}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        for start in range(1, chapters + 1, 500):
+            db.execute(
+                insert(Chapter),
+                [
+                    {
+                        "novel_id": novel.id,
+                        "chapter_no": no,
+                        "title": f"Chapter {no}",
+                        "raw": body,
+                        "content": body.upper(),
+                        "status": "translated",
+                    }
+                    for no in range(start, min(chapters, start + 499) + 1)
+                ],
+            )
+        db.commit()
+        return novel.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="Create a novel with this many chapters")
+    parser.add_argument("--kb", type=int, default=12, help="Approx. size of raw/content per chapter")
+    parser.add_argument("--novel-id", type=int)
+    parser.add_argument("--format", default="json", choices=["json", "md", "txt"])
+    parser.add_argument("--child", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        print(f"seeded novel_id={_seed(args.seed, args.kb)}")
+        return
+    if args.novel_id is None:
+        parser.error("--novel-id (or --seed) is required")
+    if args.child:
+        _child(args.novel_id, args.format, args.child)
+        return
+
+    results = {}
+    for variant in ("legacy", "streaming"):
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "bench.export_stream",
+                "--novel-id",
+                str(args.novel_id),
+                "--format",
+                args.format,
+                "--child",
+                variant,
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        results[variant] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"export.{args.format} of novel {args.novel_id} ({results['legacy']['bytes']} bytes)")
+    for variant, r in results.items():
+        print(
+            f"{variant:<10}: ttfb {r['ttfb_ms']:8.1f} ms  total {r['total_ms']:8.1f} ms  "
+            f"peak RSS +{r['rss_growth_mb']:7.1f} MB"
+        )
+    same = results["legacy"]["sha256"] == results["streaming"]["sha256"]
+    print(f"identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+SQL statement budgets per route: runs each request once through TestClient against a
+throwaway novel and fails (exit 1) when a route issues more statements than its budget
+or repeats one statement more than MAX_REPEATS times (an N+1 loop).
+
+Needs a real database (DATABASE_URL); uses the stub model:
+
+    cd backend && OPENAI_STUB=1 TRANSLATE_WORKERS=0 python -m bench.query_budget [-v]
+
+Budgets are the current counts; lower them when a route gets cheaper, and treat an
+increase as a regression unless it is deliberate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.db.query_stats import QueryStats, count_queries
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+from app.services.chapters import rebuild_links_from_chapter_no
+
+CHAPTERS = 20
+MAX_REPEATS = 3
+
+
+def _seed() -> tuple[int, list[int]]:
+    with SessionLocal() as db:
+        novel = Novel(name=f"query-budget-{time.time():.0f}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        ids = db.scalars(
+            insert(Chapter).returning(Chapter.id),
+            [
+                {
+                    "novel_id": novel.id,
+                    "chapter_no": no,
+                    "title": f"Chapter {no}",
+                    "raw": f"{no}화. 그는 검을 들어 올렸다.\n\n그리고 숨을 골랐다.",
+                    "content": f"Chapter {no}. He raised the sword. Then he breathed.",
+                    "status": "translated",
+                }
+                for no in range(1, CHAPTERS + 1)
+            ],
+        ).all()
+        rebuild_links_from_chapter_no(db, novel.id)
+        db.commit()
+        return novel.id, list(ids)
+
+
+def _cases(nid: int, ids: list[int]) -> list[tuple[str, int, Callable[[TestClient], Any]]]:
+    """(label, budget, request) in an order where each request's target still exists."""
+    entities = [{"type": "person", "src": f"이{i}", "dst": f"Lee{i}"} for i in range(10)]
+    context = {
+        "locks": [{"src": f"검{i}", "dst": f"sword{i}"} for i in range(10)],
+        "canon": {"entities": entities},
+    }
+    chapters = f"/novels/{nid}/chapters"
+    return [
+        ("GET /novels", 1, lambda c: c.get("/novels")),
+        ("GET /novels/{id}", 1, lambda c: c.get(f"/novels/{nid}")),
+        ("PUT /novels/{id}/context", 6, lambda c: c.put(
+            f"/novels/{nid}/context", json={"context_json": context}
+        )),
+        ("GET /novels/{id}/context", 4, lambda c: c.get(f"/novels/{nid}/context")),
+        ("GET /novels/{id}/chapters", 1, lambda c: c.get(chapters)),
+        ("GET .../chapters?limit=5 (page 2)", 2, lambda c: c.get(
+            chapters, params={"limit": 5, "offset": 5}
+        )),
+        ("GET /novels/{id}/chapters/full", 1, lambda c: c.get(f"{chapters}/full")),
+        ("GET /novels/{id}/chapters/{no}", 1, lambda c: c.get(f"{chapters}/3")),
+        ("GET /novels/{missing}/chapters", 2, lambda c: c.get("/novels/0/chapters")),
+        ("POST /novels/{id}/chapters", 5, lambda c: c.post(
+            chapters, json={"chapter_no": CHAPTERS + 5, "raw": "새 장"}
+        )),
+        ("PATCH /chapters/{id}", 3, lambda c: c.patch(f"/chapters/{ids[1]}", json={"title": "T"})),
+        ("POST /chapters/{id}/translate", 14, lambda c: c.post(
+            f"/chapters/{ids[2]}/translate", params={"force": True}
+        )),
+        ("GET /novels/{id}/usage", 3, lambda c: c.get(f"/novels/{nid}/usage")),
+        ("GET /novels/{id}/usage/chapters", 1, lambda c: c.get(f"/novels/{nid}/usage/chapters")),
+        ("GET /usage?bucket=hour", 3, lambda c: c.get("/usage", params={"bucket": "hour"})),
+        ("GET /novels/{id}/translation-memory", 1, lambda c: c.get(
+            f"/novels/{nid}/translation-memory"
+        )),
+        ("PUT /novels/{id}/progress", 7, lambda c: c.put(
+            f"/novels/{nid}/progress", json={"current_chapter_id": ids[0]}
+        )),
+        ("PUT .../progress (same chapter)", 4, lambda c: c.put(
+            f"/novels/{nid}/progress", json={"current_chapter_id": ids[0], "position": 0.5}
+        )),
+        ("GET /novels/{id}/progress", 1, lambda c: c.get(f"/novels/{nid}/progress")),
+        ("POST /chapters/{id}/format", 3, lambda c: c.post(f"/chapters/{ids[2]}/format")),
+        ("POST .../chapters/rebuild-links", 2, lambda c: c.post(f"{chapters}/rebuild-links")),
+        ("DELETE /chapters/{id}", 3, lambda c: c.delete(f"/chapters/{ids[4]}")),
+        ("DELETE /novels/{id}/chapters/{cid}", 3, lambda c: c.delete(f"{chapters}/{ids[6]}")),
+        ("DELETE .../chapters/by-no/{no}", 4, lambda c: c.delete(f"{chapters}/by-no/9")),
+        ("DELETE .../chapters/by-no-range", 2, lambda c: c.delete(
+            f"{chapters}/by-no-range", params={"start": 11, "end": 13}
+        )),
+        ("GET /novels/{id}/batch/requests.jsonl", 6, lambda c: c.get(
+            f"/novels/{nid}/batch/requests.jsonl"
+        )),
+        ("GET /novels/{id}/export.json", 3, lambda c: c.get(f"/novels/{nid}/export.json")),
+        ("DELETE /novels/{id}/translation-memory", 1, lambda c: c.delete(
+            f"/novels/{nid}/translation-memory"
+        )),
+        ("DELETE /novels/{id}", 3, lambda c: c.delete(f"/novels/{nid}")),
+    ]
+
+
+def _print(label: str, budget: int, stats: QueryStats, status: int, verbose: bool) -> None:
+    flag = "OVER" if stats.statements > budget else "ok"
+    ms = stats.total_s * 1000
+    print(f"{label:<38} {status:3d}  {stats.statements:3d} / {budget:<3d} {ms:7.1f} ms  {flag}")
+    if verbose or flag == "OVER":
+        for sql, n in stats.by_sql.most_common():
+            print(f"      {n}x {sql[:150]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every statement")
+    args = parser.parse_args()
+
+    nid, ids = _seed()
+    failures = 0
+    with TestClient(app) as client:
+        for label, budget, request in _cases(nid, ids):
+            with count_queries(all_threads=True) as stats:
+                r = request(client)
+            if r.status_code >= 500:
+                print(f"{label}: HTTP {r.status_code} {r.text[:200]}")
+                failures += 1
+            _print(label, budget, stats, r.status_code, args.verbose)
+            repeated = stats.repeated(MAX_REPEATS + 1)
+            if stats.statements > budget or repeated:
+                failures += 1
+                for sql, n in repeated:
+                    print(f"      N+1? {n}x {sql[:150]}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
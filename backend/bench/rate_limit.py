@@ -0,0 +1,139 @@
+"""
+Benchmark: model calls through the RPM/TPM rate limiter with retries vs. the bare client,
+against the in-process stub with injected 429s and latency. No database needed:
+
+    cd backend && python -m bench.rate_limit [--calls 300] [--threads 32] [--rpm 600]
+        [--tpm 300000] [--error-rate 0.2] [--latency-ms 200]
+
+Reports completed/failed calls, the achieved request and token rates (tokens as reported
+by the responses' usage, which the limiter settles against; both must stay within the
+budgets plus the initial burst), retries, and queueing in the limiter.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from app.services.llm_stub import AsyncStubOpenAI, StubOpenAI
+from app.services.rate_limit import (
+    AsyncRateLimitedClient,
+    RateLimitedClient,
+    RateLimiter,
+    RetryPolicy,
+    estimate_request_tokens,
+)
+
+
+def _request(i: int, paragraphs: int) -> dict[str, Any]:
+    # Latin text: the stub reports usage at ~4 chars per token, like the estimate
+    line = "He raised the sword and slowly caught his breath."
+    text = "\n\n".join(f"{i}-{p}. {line}" for p in range(paragraphs))
+    payload = {"source_lang": "ko", "target_lang": "en", "text": text, "context_memory": {}}
+    return {
+        "model": "stub",
+        "messages": [
+            {"role": "system", "content": "Translate."},
+            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+        ],
+    }
+
+
+def _report(label: str, ok: int, failed: int, tokens: int, wall: float, limiter: Any) -> None:
+    line = (
+        f"{label:<16}: ok {ok:4d}  failed {failed:4d}  {wall:6.1f} s  "
+        f"{ok / wall * 60:7.0f} req/min  {tokens / wall * 60:9.0f} tok/min"
+    )
+    if limiter is not None:
+        s = limiter.snapshot()
+        line += (
+            f"  retries {s['retries']:4d}  peak queue {s['peak_queue_depth']:3d}  "
+            f"mean wait {s['wait_s_total'] / max(1, s['waited']):5.2f} s"
+        )
+    print(line)
+
+
+def _tally(tokens: list[int | None]) -> tuple[int, int, int]:
+    done = [t for t in tokens if t is not None]
+    return len(done), len(tokens) - len(done), sum(done)
+
+
+def _run_threads(
+    client: Any, requests: list[dict[str, Any]], threads: int
+) -> tuple[int, int, int]:
+    def call(kwargs: dict[str, Any]) -> int | None:
+        try:
+            return client.chat.completions.create(**kwargs).usage.total_tokens
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return _tally(list(pool.map(call, requests)))
+
+
+async def _run_async(
+    client: Any, requests: list[dict[str, Any]], threads: int
+) -> tuple[int, int, int]:
+    sem = asyncio.Semaphore(threads)
+
+    async def call(kwargs: dict[str, Any]) -> int | None:
+        async with sem:
+            try:
+                return (await client.chat.completions.create(**kwargs)).usage.total_tokens
+            except Exception:
+                return None
+
+    return _tally(list(await asyncio.gather(*(call(r) for r in requests))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=300_000)
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs per request")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Share of calls that 429")
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    requests = [_request(i, args.paragraphs) for i in range(args.calls)]
+    est = sum(estimate_request_tokens(r) for r in requests)
+    print(
+        f"{args.calls} calls (~{est // args.calls} tokens estimated each), "
+        f"{args.threads} concurrent, "
+        f"budget {args.rpm} req/min {args.tpm} tok/min, {args.error_rate:.0%} injected 429s"
+    )
+    stub = {
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "retry_after_s": args.retry_after,
+        "seed": 7,
+    }
+    policy = RetryPolicy(max_retries=8, base_s=0.2, max_s=10.0)
+
+    t0 = time.perf_counter()
+    ok, failed, tokens = _run_threads(StubOpenAI(**stub), requests, args.threads)
+    _report("bare client", ok, failed, tokens, time.perf_counter() - t0, None)
+
+    limiter = RateLimiter(rpm=args.rpm, tpm=args.tpm)
+    t0 = time.perf_counter()
+    ok, failed, tokens = _run_threads(
+        RateLimitedClient(StubOpenAI(**stub), limiter, policy), requests, args.threads
+    )
+    _report("limited (sync)", ok, failed, tokens, time.perf_counter() - t0, limiter)
+
+    limiter = RateLimiter(rpm=args.rpm, tpm=args.tpm)
+    client = AsyncRateLimitedClient(AsyncStubOpenAI(**stub), limiter, policy)
+    t0 = time.perf_counter()
+    ok, failed, tokens = asyncio.run(_run_async(client, requests, args.threads))
+    _report("limited (async)", ok, failed, tokens, time.perf_counter() - t0, limiter)
+
+
+if __name__ == "__main__":
+    main()
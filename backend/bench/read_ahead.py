@@ -0,0 +1,114 @@
+"""
+Read-ahead for a reader clicking "next chapter": opens chapters one after another,
+reporting each move through record_progress and waiting (translate job + polling) when the
+opened chapter is not translated yet. Runs without and with read-ahead.
+
+Needs a real database (DATABASE_URL) and the stub model with latency, so that reading a
+chapter takes about as long as translating one:
+
+    cd backend && OPENAI_STUB=1 STUB_LATENCY_MS=800 TRANSLATE_WORKERS=0 \
+        python -m bench.read_ahead [--chapters 12] [--read-s 1.0] [--workers 2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+from app.repos import chapter as chapter_repo
+from app.services.chapters import rebuild_links_from_chapter_no
+from app.services.jobs import TranslationWorkerPool, enqueue_chapter_translation
+from app.services.read_ahead import record_progress
+
+_POLL_S = 0.02
+
+
+def _seed(label: str, chapters: int) -> tuple[int, list[int]]:
+    with SessionLocal() as db:
+        novel = Novel(name=f"ra-{label}-{time.time():.0f}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        db.execute(
+            insert(Chapter),
+            [
+                {
+                    "novel_id": novel.id,
+                    "chapter_no": no,
+                    "title": f"Chapter {no}",
+                    "raw": f"제{no}화.\n\n그는 검을 들어 올리며 천천히 숨을 골랐다. ({no})",
+                }
+                for no in range(1, chapters + 1)
+            ],
+        )
+        rebuild_links_from_chapter_no(db, novel.id)
+        db.commit()
+        ids = [c.id for c in chapter_repo.list_chapters(db, novel.id, limit=chapters)]
+        return novel.id, ids
+
+
+def _status(db: Session, chapter_id: int) -> str | None:
+    ch = chapter_repo.get_chapter(db, chapter_id)
+    return ch.status if ch is not None else None
+
+
+def _open(novel_id: int, chapter_id: int, pool: TranslationWorkerPool) -> float:
+    """Moves the reader to the chapter; returns seconds waited for its translation."""
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        record_progress(db, novel_id=novel_id, current_chapter_id=chapter_id, position=0.0)
+        if _status(db, chapter_id) != "translated":
+            enqueue_chapter_translation(db, novel_id=novel_id, chapter_id=chapter_id)
+        db.commit()
+    pool.notify()
+    while True:
+        with SessionLocal() as db:
+            if _status(db, chapter_id) == "translated":
+                return time.perf_counter() - t0
+        time.sleep(_POLL_S)
+
+
+def run(label: str, *, ahead: int, chapters: int, read_s: float, workers: int) -> None:
+    settings.READ_AHEAD_CHAPTERS = ahead
+    novel_id, ids = _seed(label, chapters)
+    pool = TranslationWorkerPool(concurrency=workers, poll_interval=0.1)
+    pool.start()
+    try:
+        waits = []
+        for chapter_id in ids:
+            waits.append(_open(novel_id, chapter_id, pool))
+            time.sleep(read_s)
+    finally:
+        pool.stop()
+        with SessionLocal() as db:
+            db.delete(db.get(Novel, novel_id))
+            db.commit()
+
+    ready = sum(1 for w in waits if w < 0.1)
+    print(
+        f"{label:<14} waited {sum(waits):6.2f} s total, {max(waits):5.2f} s max  "
+        f"({ready}/{len(waits)} chapters opened translated)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chapters", type=int, default=12)
+    parser.add_argument("--read-s", type=float, default=1.0, help="Time spent per chapter")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    settings.TRANSLATION_CACHE_MAX_MB = 0
+    kw = {"chapters": args.chapters, "read_s": args.read_s, "workers": args.workers}
+    run("no read-ahead", ahead=0, **kw)
+    run("read-ahead", ahead=3, **kw)
+
+
+if __name__ == "__main__":
+    main()
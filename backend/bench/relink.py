@@ -0,0 +1,165 @@
+"""
+Benchmark: set-based prev/next relinking vs. the previous ORM loop.
+
+Needs a real database (DATABASE_URL). Seed a throwaway novel once, then compare:
+
+    cd backend && python -m bench.relink --seed 50000 --kb 4
+    cd backend && python -m bench.relink --novel-id <id> [--range 1000]
+
+Each variant first breaks the links (all of them, or only the relinked range) and
+runs in a transaction that is rolled back, so the novel is left untouched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+from app.repos import chapter as chapter_repo
+from app.services.chapters import rebuild_links_from_chapter_no
+
+
+def _legacy_rebuild(db: Session, novel_id: int) -> int:
+    """The pre-set-based implementation: full ORM rows, capped at 10,000 chapters."""
+    chapters = chapter_repo.list_chapters(db, novel_id=novel_id, limit=10_000, offset=0)
+    for ch in chapters:
+        ch.prev_chapter_id = None
+        ch.next_chapter_id = None
+    for i, ch in enumerate(chapters):
+        ch.prev_chapter_id = chapters[i - 1].id if i > 0 else None
+        ch.next_chapter_id = chapters[i + 1].id if i < len(chapters) - 1 else None
+    db.flush()
+    return len(chapters)
+
+
+def _clear_links(db: Session, novel_id: int) -> None:
+    db.execute(
+        update(Chapter)
+        .where(Chapter.novel_id == novel_id)
+        .values(prev_chapter_id=None, next_chapter_id=None)
+    )
+
+
+def _bad_links(db: Session, novel_id: int) -> int:
+    """Chapters whose pointers disagree with chapter_no order."""
+    w = (
+        select(
+            Chapter.prev_chapter_id,
+            Chapter.next_chapter_id,
+            func.lag(Chapter.id).over(order_by=Chapter.chapter_no).label("prev_id"),
+            func.lead(Chapter.id).over(order_by=Chapter.chapter_no).label("next_id"),
+        )
+        .where(Chapter.novel_id == novel_id)
+        .subquery()
+    )
+    return (
+        db.scalar(
+            select(func.count()).where(
+                w.c.prev_chapter_id.is_distinct_from(w.c.prev_id)
+                | w.c.next_chapter_id.is_distinct_from(w.c.next_id)
+            )
+        )
+        or 0
+    )
+
+
+def _run(
+    novel_id: int,
+    label: str,
+    fn: Callable[[Session], int],
+    setup: Callable[[Session], object] | None = None,
+) -> None:
+    with SessionLocal() as db:
+        (setup or (lambda db: _clear_links(db, novel_id)))(db)
+        db.flush()
+        db.expunge_all()
+        t0 = time.perf_counter()
+        touched = fn(db)
+        elapsed = time.perf_counter() - t0
+        bad = _bad_links(db, novel_id)
+        db.rollback()
+    print(f"{label:<30}: {elapsed * 1000:9.1f} ms  rows {touched:6d}  still wrong {bad:6d}")
+
+
+def _seed(chapters: int, kb: int) -> int:
+    body = ("가나다라마바사 아자차카타파하. " * 64)[: kb * 1024 // 3]
+    with SessionLocal() as db:
+        novel = Novel(name=f"relink-bench-{chapters}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        for start in range(1, chapters + 1, 1000):
+            db.execute(
+                insert(Chapter),
+                [
+                    {
+                        "novel_id": novel.id,
+                        "chapter_no": no,
+                        "title": f"Chapter {no}",
+                        "raw": body,
+                        "content": body.upper(),
+                        "status": "translated",
+                    }
+                    for no in range(start, min(chapters, start + 999) + 1)
+                ],
+            )
+        rebuild_links_from_chapter_no(db, novel.id)
+        db.commit()
+        return novel.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="Create a novel with this many chapters")
+    parser.add_argument("--kb", type=int, default=4, help="Approx. size of raw/content per chapter")
+    parser.add_argument("--novel-id", type=int)
+    parser.add_argument("--range", type=int, default=1000, help="Width of the ranged relink")
+    args = parser.parse_args()
+
+    if args.seed:
+        print(f"seeded novel_id={_seed(args.seed, args.kb)}")
+        return
+    if args.novel_id is None:
+        parser.error("--novel-id (or --seed) is required")
+
+    nid = args.novel_id
+    with SessionLocal() as db:
+        total = chapter_repo.count_chapters(db, nid)
+    print(f"novel {nid}: {total} chapters")
+
+    lo = total // 2
+    hi = lo + args.range - 1
+
+    def break_range(db: Session) -> None:
+        # Only the range is broken; everything outside it is already correct
+        rebuild_links_from_chapter_no(db, nid)
+        db.execute(
+            update(Chapter)
+            .where(Chapter.novel_id == nid, Chapter.chapter_no.between(lo, hi))
+            .values(prev_chapter_id=None, next_chapter_id=None)
+        )
+
+    _run(nid, "legacy ORM loop (10k cap)", lambda db: _legacy_rebuild(db, nid))
+    _run(nid, "set-based, whole novel", lambda db: rebuild_links_from_chapter_no(db, nid))
+    _run(
+        nid,
+        "set-based, already linked",
+        lambda db: rebuild_links_from_chapter_no(db, nid),
+        setup=lambda db: rebuild_links_from_chapter_no(db, nid),
+    )
+    _run(
+        nid,
+        f"set-based, {args.range}-chapter range",
+        lambda db: rebuild_links_from_chapter_no(db, nid, start_no=lo, end_no=hi),
+        setup=break_range,
+    )
+
+
+if __name__ == "__main__":
+    main()
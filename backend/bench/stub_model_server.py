@@ -0,0 +1,90 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, for load tests over real HTTP.
+
+    cd backend && python -m bench.stub_model_server [--port 18081] [--latency-ms 500]
+
+Point the API at it with OPENAI_BASE_URL=http://127.0.0.1:18081/v1 (OPENAI_STUB=0).
+Answers like app.services.llm_stub, streamed as server-sent events for "stream": true;
+GET /stats reports calls and peak concurrency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.services.llm_stub import PromptCache, stub_chunks, stub_completion
+
+
+def create_app(*, latency_ms: float, ms_per_token: float) -> FastAPI:
+    app = FastAPI()
+    state = {"calls": 0, "in_flight": 0, "peak_in_flight": 0}
+    prompt_cache = PromptCache()
+
+    def start() -> None:
+        state["calls"] += 1
+        state["in_flight"] += 1
+        state["peak_in_flight"] = max(state["peak_in_flight"], state["in_flight"])
+
+    async def stream(response: dict[str, Any]) -> AsyncIterator[str]:
+        try:
+            for chunk, delay in stub_chunks(
+                response, latency_ms=latency_ms, ms_per_token=ms_per_token
+            ):
+                await asyncio.sleep(delay)
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            state["in_flight"] -= 1
+
+    @app.post("/v1/chat/completions", response_model=None)
+    async def completions(request: Request) -> dict[str, Any] | StreamingResponse:
+        body = await request.json()
+        messages = body.get("messages") or []
+        start()
+        response, delay = stub_completion(
+            model=body.get("model") or "stub",
+            messages=messages,
+            latency_ms=latency_ms,
+            ms_per_token=ms_per_token,
+            cached_tokens=prompt_cache.lookup_and_store(messages),
+        )
+        if body.get("stream"):
+            return StreamingResponse(stream(response), media_type="text/event-stream")
+        try:
+            await asyncio.sleep(delay)
+            return response
+        finally:
+            state["in_flight"] -= 1
+
+    @app.get("/stats")
+    async def stats() -> dict[str, int]:
+        return dict(state)
+
+    @app.post("/stats/reset")
+    async def reset() -> dict[str, int]:
+        state.update(calls=0, peak_in_flight=0)
+        return dict(state)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--ms-per-token", type=float, default=0.0)
+    args = parser.parse_args()
+    app = create_app(latency_ms=args.latency_ms, ms_per_token=args.ms_per_token)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
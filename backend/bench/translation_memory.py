@@ -0,0 +1,139 @@
+"""
+Translation memory on a novel with recurring boilerplate: translates the same chapters
+twice through translate_range and the stub model, without and with the memory.
+
+Needs a real database (DATABASE_URL); the translation cache is switched off so that
+only the memory can save model calls:
+
+    cd backend && OPENAI_STUB=1 TRANSLATE_WORKERS=0 python -m bench.translation_memory \
+        [--chapters 40] [--story 30]
+
+Each chapter has a numbered title line, a status window whose numbers change, three
+skill descriptions (from a fixed set) midway through `--story` paragraphs of unique
+prose, and the author's footer. It exits with 1 unless a chapter whose raw text ends
+with a newline (as scraped chapters usually do) stores one entry per eligible paragraph.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+from app.repos import translation_memory as tm_repo
+from app.services.chapters import rebuild_links_from_chapter_no
+from app.services.chunking import split_paragraphs
+from app.services.pipeline import translate_range
+from app.services.translation_memory import normalize, tm_key
+
+_SKILLS = [
+    f"[스킬: {name}] 등급 {grade}. 마나를 소모하여 {effect}."
+    for name, grade, effect in [
+        ("질풍검", "A", "검에 바람을 두르고 세 번 연속으로 벤다"),
+        ("철벽", "B", "10초 동안 받는 피해를 절반으로 줄인다"),
+        ("은신", "C", "그림자 속으로 모습을 감춘다"),
+        ("화염구", "B", "불덩이를 날려 적을 불태운다"),
+        ("치유", "A", "아군 한 명의 상처를 회복시킨다"),
+        ("간파", "S", "상대의 다음 움직임을 읽어낸다"),
+        ("도약", "D", "먼 거리를 단숨에 뛰어넘는다"),
+        ("위압", "A", "주변의 약한 적들을 얼어붙게 만든다"),
+    ]
+]
+_FOOTER = "작가의 말: 오늘도 읽어주셔서 감사합니다. 추천과 댓글은 큰 힘이 됩니다!"
+_WORDS = "그는 검을 들어 올리며 천천히 숨을 골랐다 바람이 멎고 숲은 고요해졌다 멀리서".split()
+
+
+def _chapter_raw(chapter_no: int, story: int, rng: random.Random) -> str:
+    paragraphs = [f"제{chapter_no}화. 회귀한 검성의 두 번째 삶"]
+    paragraphs.append(
+        "[상태창: 강서진]\n"
+        f"직업: 검성 | 레벨: {10 + chapter_no // 3}\n"
+        f"힘: {20 + chapter_no} | 민첩: {15 + chapter_no // 2} | 체력: {30 + chapter_no}\n"
+        f"마나: {100 + 5 * chapter_no} / {100 + 5 * chapter_no} | 칭호: 회귀자"
+    )
+    for i in range(story):
+        if i == story // 2:
+            paragraphs.extend(rng.sample(_SKILLS, 3))
+        words = rng.choices(_WORDS, k=rng.randint(12, 30))
+        paragraphs.append(f"{' '.join(words)} ({chapter_no}-{i}).")
+    paragraphs.append(_FOOTER)
+    return "\n\n".join(paragraphs)
+
+
+def _seed(label: str, chapters: int, story: int, *, trailing: str = "") -> int:
+    rng = random.Random(7)
+    with SessionLocal() as db:
+        novel = Novel(name=f"tm-{label}-{time.time():.0f}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        db.execute(
+            insert(Chapter),
+            [
+                {
+                    "novel_id": novel.id,
+                    "chapter_no": no,
+                    "title": f"Chapter {no}",
+                    "raw": _chapter_raw(no, story, rng) + trailing,
+                }
+                for no in range(1, chapters + 1)
+            ],
+        )
+        rebuild_links_from_chapter_no(db, novel.id)
+        db.commit()
+        return novel.id
+
+
+def run(label: str, *, memory: bool, chapters: int, story: int) -> None:
+    settings.TRANSLATION_MEMORY = memory
+    novel_id = _seed(label, chapters, story)
+    with SessionLocal() as db:
+        stats = translate_range(db, novel_id=novel_id, start_no=1, end_no=chapters)
+        totals = tm_repo.memory_totals(db, novel_id)
+        db.delete(db.get(Novel, novel_id))
+        db.commit()
+
+    tokens = stats["prompt_tokens"] + stats["completion_tokens"]
+    print(
+        f"{label:<16} {tokens:>9,d} tok (prompt {stats['prompt_tokens']:>8,d})  "
+        f"{stats['elapsed_s']:6.2f} s  reused {stats['tm_paragraphs']:>4d} paragraphs, "
+        f"~{stats['tm_tokens_saved']:,d} tok saved  ({totals['entries']} entries stored)"
+    )
+
+
+def check_trailing_newline(story: int) -> bool:
+    """One chapter ending with a newline: every eligible paragraph is remembered."""
+    settings.TRANSLATION_MEMORY = True
+    raw = _chapter_raw(1, story, random.Random(7)) + "\n"
+    sources = (normalize(p.text) for p in split_paragraphs(raw))
+    expected = len({tm_key(s) for s in sources if len(s) >= settings.TM_MIN_CHARS})
+    novel_id = _seed("trailing", 1, story, trailing="\n")
+    with SessionLocal() as db:
+        translate_range(db, novel_id=novel_id, start_no=1, end_no=1)
+        stored = tm_repo.memory_totals(db, novel_id)["entries"]
+        db.delete(db.get(Novel, novel_id))
+        db.commit()
+    print(f"trailing newline: {stored} entries stored of {expected} eligible paragraphs")
+    return stored == expected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chapters", type=int, default=40)
+    parser.add_argument("--story", type=int, default=30, help="Unique paragraphs per chapter")
+    args = parser.parse_args()
+
+    settings.TRANSLATION_CACHE_MAX_MB = 0
+    run("no memory", memory=False, chapters=args.chapters, story=args.story)
+    run("memory", memory=True, chapters=args.chapters, story=args.story)
+    if not check_trailing_newline(args.story):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
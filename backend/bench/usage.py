@@ -0,0 +1,202 @@
+"""
+Usage accounting check: translates a novel's chapters through the translate route, a
+translate_range run and a batch round trip, then compares GET /novels/{id}/usage with
+sums over the raw translation_usage rows. With `--synthetic N`, N more attempts spread
+over 30 days are bulk-loaded (raw rows and the rollups they add up to) to time the
+rollup-backed endpoint against the same aggregate over the raw rows.
+
+Needs a real database (DATABASE_URL) and the stub model:
+
+    cd backend && OPENAI_STUB=1 TRANSLATE_WORKERS=0 python -m bench.usage \
+        [--chapters 30] [--synthetic 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, text
+
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.chapter import Chapter
+from app.models.novel import Novel
+from app.repos import chapter as chapter_repo
+from app.services.chapters import rebuild_links_from_chapter_no
+from app.services.llm_stub import stub_completion
+from app.services.pipeline import translate_range
+
+_TOKENS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+_RAW_TOTALS = text(
+    """
+    SELECT source, count(*) AS attempts, count(*) FILTER (WHERE applied) AS applied,
+           sum(calls) AS calls,
+           sum(prompt_tokens) AS prompt_tokens, sum(completion_tokens) AS completion_tokens,
+           sum(cached_tokens) AS cached_tokens
+    FROM translation_usage WHERE novel_id = :novel_id GROUP BY source ORDER BY source
+    """
+)
+
+# What record_usage adds to translation_usage_hourly, for the bulk-loaded rows
+_SYNTHETIC = text(
+    """
+    WITH rows AS (
+        INSERT INTO translation_usage (
+            novel_id, chapter_no, source, model, prompt_tokens, completion_tokens,
+            cached_tokens, calls, cache_hit, applied, latency_ms, created_at
+        )
+        SELECT :novel_id, 1 + i % 500, (ARRAY['api', 'translate_range', 'batch'])[1 + i % 3],
+               'gpt-4.1-mini', 800 + i % 700, 500 + i % 400, (i % 5) * 100, 1, false,
+               i % 20 <> 0, 300 + i % 900, now() - (i % 720) * interval '1 hour'
+        FROM generate_series(1, :n) AS i
+        RETURNING *
+    )
+    INSERT INTO translation_usage_hourly AS h (
+        novel_id, hour, model, source, attempts, cache_hits, applied, calls, prompt_tokens,
+        completion_tokens, cached_tokens, latency_ms, timed, slice_tokens, context_tokens,
+        sliced
+    )
+    SELECT novel_id, date_trunc('hour', created_at), model, source, count(*), 0,
+           count(*) FILTER (WHERE applied), sum(calls), sum(prompt_tokens),
+           sum(completion_tokens), sum(cached_tokens), sum(latency_ms), count(*), 0, 0, 0
+    FROM rows GROUP BY 1, 2, 3, 4
+    ON CONFLICT (novel_id, hour, model, source) DO UPDATE SET
+        attempts = h.attempts + excluded.attempts, applied = h.applied + excluded.applied,
+        calls = h.calls + excluded.calls,
+        prompt_tokens = h.prompt_tokens + excluded.prompt_tokens,
+        completion_tokens = h.completion_tokens + excluded.completion_tokens,
+        cached_tokens = h.cached_tokens + excluded.cached_tokens,
+        latency_ms = h.latency_ms + excluded.latency_ms, timed = h.timed + excluded.timed
+    """
+)
+
+
+def _seed(chapters: int) -> tuple[int, list[int]]:
+    with SessionLocal() as db:
+        novel = Novel(name=f"usage-{time.time():.0f}", source_lang="ko", target_lang="en")
+        db.add(novel)
+        db.flush()
+        db.execute(
+            insert(Chapter),
+            [
+                {
+                    "novel_id": novel.id,
+                    "chapter_no": no,
+                    "title": f"Chapter {no}",
+                    # The novel id keeps earlier runs' translation cache entries from hitting
+                    "raw": f"제{no}화 ({novel.id}).\n\n" + "그는 검을 들어 올리며 숨을 골랐다. " * 20 * no,
+                }
+                for no in range(1, chapters + 1)
+            ],
+        )
+        rebuild_links_from_chapter_no(db, novel.id)
+        db.commit()
+        ids = [c.id for c in chapter_repo.list_chapters(db, novel.id, limit=chapters)]
+        return novel.id, ids
+
+
+def _batch(client: TestClient, novel_id: int) -> dict:
+    r = client.get(f"/novels/{novel_id}/batch/requests.jsonl")
+    r.raise_for_status()
+    lines = []
+    for line in r.text.splitlines():
+        req = json.loads(line)
+        body, _ = stub_completion(
+            model=req["body"]["model"],
+            messages=req["body"]["messages"],
+            latency_ms=0,
+            ms_per_token=0,
+        )
+        response = {"status_code": 200, "body": body}
+        lines.append(json.dumps({"custom_id": req["custom_id"], "response": response}))
+    r = client.post(f"/novels/{novel_id}/batch/results", content="\n".join(lines).encode())
+    r.raise_for_status()
+    return r.json()
+
+
+def _timed_ms(fn, repeat: int = 5) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(runs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chapters", type=int, default=30)
+    parser.add_argument("--synthetic", type=int, default=0, help="Bulk-loaded attempts")
+    args = parser.parse_args()
+
+    novel_id, ids = _seed(args.chapters)
+    client = TestClient(app)
+    third = max(1, args.chapters // 3)
+    try:
+        for chapter_id in ids[:third]:
+            client.post(f"/chapters/{chapter_id}/translate").raise_for_status()
+        with SessionLocal() as db:
+            translate_range(db, novel_id=novel_id, start_no=third + 1, end_no=2 * third)
+        imported = _batch(client, novel_id)
+        print(f"batch    applied {imported['applied']} of {imported['received']} results")
+
+        r = client.get(f"/novels/{novel_id}/usage")
+        r.raise_for_status()
+        usage = r.json()
+        with SessionLocal() as db:
+            raw = [dict(row._mapping) for row in db.execute(_RAW_TOTALS, {"novel_id": novel_id})]
+
+        by_source: dict[str, dict] = {}
+        for row in usage["by_model"]:
+            by_source.setdefault(
+                row["source"], {k: 0 for k in ("attempts", "applied", "calls", *_TOKENS)}
+            )
+            for k in by_source[row["source"]]:
+                by_source[row["source"]][k] += row[k]
+        ok = True
+        for row in raw:
+            rollup = by_source.get(row["source"], {})
+            same = all(int(row[k]) == rollup.get(k) for k in rollup) and rollup
+            ok = ok and bool(same)
+            print(
+                f"{row['source']:<16} attempts {row['attempts']:3d}  "
+                f"applied {row['applied']:3d}  calls {row['calls']:3d}  "
+                f"prompt {row['prompt_tokens']:7d}  completion {row['completion_tokens']:7d}  "
+                f"{'matches' if same else 'DIFFERS FROM'} rollup"
+            )
+        totals = usage["totals"]
+        print(
+            f"total    {totals['attempts']} attempts, {totals['cache_hits']} cache hits, "
+            f"${totals['cost_usd']:.4f}, slice saved {totals['slice_saved_tokens']} tokens"
+        )
+
+        if args.synthetic:
+            t0 = time.perf_counter()
+            with SessionLocal() as db:
+                db.execute(_SYNTHETIC, {"novel_id": novel_id, "n": args.synthetic})
+                db.execute(text("ANALYZE translation_usage; ANALYZE translation_usage_hourly"))
+                db.commit()
+            print(f"loaded   {args.synthetic:,} attempts in {time.perf_counter() - t0:.1f} s")
+            since = datetime.now(UTC) - timedelta(days=7)
+            window = {"since": since.isoformat()}
+            endpoint = _timed_ms(lambda: client.get(f"/novels/{novel_id}/usage", params=window))
+            with SessionLocal() as db:
+                scan = _timed_ms(lambda: db.execute(_RAW_TOTALS, {"novel_id": novel_id}).all())
+            print(f"rollups  GET /novels/{{id}}/usage (7 days)  {endpoint:7.1f} ms (median of 5)")
+            print(f"raw scan totals by source (all time) {scan:7.1f} ms (median of 5)")
+        if not ok:
+            raise SystemExit(1)
+    finally:
+        with SessionLocal() as db:
+            db.delete(db.get(Novel, novel_id))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
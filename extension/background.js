@@ -77,6 +77,17 @@ async function setChapterNo(nextNo) {
 	await chrome.storage.local.set({ chapterNo: String(nextNo) });
 }
 
+// Translation runs as a background job on the server; poll until it settles.
+async function waitForJob(baseUrl, jobId, { intervalMs = 2000, timeoutMs = 10 * 60 * 1000 } = {}) {
+	const deadline = Date.now() + timeoutMs;
+	while (Date.now() < deadline) {
+		const job = await apiFetch(baseUrl, `/jobs/${jobId}`, "GET");
+		if (job.status !== "queued" && job.status !== "running") return job;
+		await new Promise((r) => setTimeout(r, intervalMs));
+	}
+	throw new Error(`Job ${jobId} still running after ${Math.round(timeoutMs / 1000)}s`);
+}
+
 async function runHotkeyFlow() {
 	try {
 		const { tabId, url } = await getActiveHttpTab();
@@ -157,8 +168,17 @@ async function runHotkeyFlow() {
 		// 3) TRANSLATE (best effort; don't block) ?
 		notify(tabId, `Translating id=${created.id}`);
 		try {
-			await apiFetch(settings.backendUrl, `/chapters/${created.id}/translate`, "POST");
-			notify(tabId, `Translated chapter ${settings.chapterNo}.`);
+			const job = await apiFetch(
+				settings.backendUrl,
+				`/chapters/${created.id}/translate/jobs`,
+				"POST"
+			);
+			const done = await waitForJob(settings.backendUrl, job.id);
+			if (done.status === "succeeded") {
+				notify(tabId, `Translated chapter ${settings.chapterNo}.`);
+			} else {
+				notify(tabId, `Translate ${done.status} (raw saved): ${done.error || ""}`);
+			}
 		} catch (err) {
 			console.error("Translate failed:", err);
 			notify(tabId, `Translate failed (raw saved): ${String(err)}`);